@@ -1,132 +1,268 @@
-from flask import Flask, render_template, request, jsonify
-from models import db, Asana, Sequence, Session, User
-from textblob import TextBlob
+from flask import Flask, request, jsonify
+from models import db, configure_database, ensure_indexes, Asana, Sequence, Session, User
+from catalog import content_hash, get_catalog
+from conversation_store import (MAX_CONVERSATION_ID_LENGTH, add_message, create_conversation_store,
+                                new_conversation_id, new_state)
+from lexicon import resume_point, scan
+from response_templates import get_template, render_response
+from session_writer import SessionWriteBuffer
+from static_assets import register_assets
+from http_caching import conditional_response, enable_compression
+from page_cache import PageCache
+from event_log import configure_logging, get_logger, start_trace
+from metrics import PROMETHEUS_CONTENT_TYPE, REQUEST_LATENCY, STAGE_LATENCY, instrument_app, render_metrics, stage_timer, timed
+from sentiment import EMOTION_THRESHOLD, get_polarity_sum, get_sentiment, normalize, score_many, sentiment_cache
+import sentiment
 import json
 import os
 import re
+import time
+from collections import deque, namedtuple
 
 app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///yoga_app.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
+configure_database(app)
+# Request bodies are small JSON documents; this bounds what a client can make the server parse.
+# /api/analyze-batch takes up to MAX_BATCH_SIZE messages (4 MiB is about 400 characters each).
+MAX_REQUEST_BYTES = int(os.environ.get('MAX_REQUEST_BYTES', 256 * 1024))
+MAX_BATCH_REQUEST_BYTES = int(os.environ.get('MAX_BATCH_REQUEST_BYTES', 4 * 1024 * 1024))
+REQUEST_BYTE_LIMITS = {'analyze_batch_endpoint': MAX_BATCH_REQUEST_BYTES}  # endpoint -> limit, else MAX_REQUEST_BYTES
+app.config['MAX_CONTENT_LENGTH'] = max(MAX_REQUEST_BYTES, *REQUEST_BYTE_LIMITS.values())
+configure_logging()
+instrument_app(app)
+register_assets(app)
+enable_compression(app)
+log = get_logger('yoga.app')
+
+# The page routes render request-independent templates, so each is rendered once per process
+PAGE_TEMPLATES = ('emotion_selection.html', 'chat_interface.html', 'voice_chat.html', 'guided_flow.html')
+page_cache = PageCache(app, enabled=os.environ.get('PAGE_CACHE', '1') != '0')
+
+# Upper bound on ids in one GET /api/asanas request
+MAX_BULK_ASANAS = 100
+
+# Per-conversation state (message window, engine memory), keyed by conversation_id
+conversation_store = create_conversation_store()
+
+# Heartbeats/completions are coalesced and written in batches
+session_writer = SessionWriteBuffer(
+    app,
+    flush_interval=int(os.environ.get('SESSION_FLUSH_INTERVAL_MS', 500)) / 1000,
+    max_pending=int(os.environ.get('SESSION_FLUSH_MAX_PENDING', 100))
+)
 
 def is_greeting(text):
     """Check if text is ONLY a greeting (no emotional content)"""
-    text_lower = text.lower()
-    greeting_words = ['hi', 'hello', 'hey', 'namaste', 'vannakkam', 'em chestunav', 'ela unnav', 'epdi iruka', 'kaise ho']
-    emotion_words = ['tension', 'stress', 'sad', 'happy', 'tired', 'worried', 'badhaga', 'santhosham', 'kopam', 'angry']
-    
-    has_greeting = any(word in text_lower for word in greeting_words)
-    has_emotion = any(word in text_lower for word in emotion_words)
+    hits = scan(text)
+    has_greeting = 'greeting_word' in hits.groups
+    has_emotion = 'emotion_word' in hits.groups
     
     # Only consider it a pure greeting if it has greeting words but NO emotional content
     return has_greeting and not has_emotion and len(text.split()) <= 6
 
+@timed('analyze_emotion_and_language')
 def analyze_emotion_and_language(text):
     """Analyze emotion and language with greeting priority"""
-    text_lower = text.lower().strip()
+    key = normalize(text)
+    cached = sentiment_cache.get(key, 'analysis')
+    if cached is not None:
+        return cached
     
     # Detect language first
     language = detect_language(text)
-    print(f"Language detected: {language}")
     
     # Check for common greetings/questions first (override emotion analysis)
-    greeting_patterns = {
-        'telugu': ['em chestunav', 'enti chestunav', 'ela unnav', 'namaste'],
-        'tamil': ['epdi iruka', 'enna panra', 'vanakkam'],
-        'hindi': ['kaise ho', 'kya kar rahe ho', 'namaste'],
-        'english': ['how are you', 'what are you doing', 'hello', 'hi']
-    }
-    
-    # Check if it's a greeting in detected language
-    for lang, patterns in greeting_patterns.items():
-        if any(pattern in text_lower for pattern in patterns):
-            print(f"Detected greeting pattern in {lang}")
-            return 'neutral', 3, language  # Neutral emotion for greetings
+    greeting_lang = greeting_language(text)
+    if greeting_lang:
+        log.debug('greeting_detected', language=greeting_lang)
+        sentiment_cache.set(key, 'analysis', ('neutral', 3, language))
+        return 'neutral', 3, language  # Neutral emotion for greetings
     
     # Only do emotion analysis if not a greeting
-    blob = TextBlob(text)
-    polarity = blob.sentiment.polarity
-    
-    print(f"TextBlob polarity: {polarity}")
-    
-    # Convert polarity to emotion
-    if polarity > 0.3:
-        emotion = 'happy'
-        intensity = min(5, int((polarity + 1) * 2.5))
-    elif polarity < -0.3:
-        emotion = 'stressed'  # Simplified emotion detection
-        intensity = min(5, int(abs(polarity) * 5) + 2)
-    else:
-        emotion = 'neutral'
-        intensity = 3
+    polarity, _ = get_sentiment(text)
+    emotion, intensity = polarity_to_emotion(polarity)
     
-    print(f"Final emotion: {emotion}, intensity: {intensity}, language: {language}")
+    log.debug('emotion_analyzed', polarity=polarity, emotion=emotion, intensity=intensity, language=language)
+    sentiment_cache.set(key, 'analysis', (emotion, intensity, language))
     return emotion, intensity, language
 
-def detect_language(text):
-    """Simple but effective language detection"""
-    text_lower = text.lower().strip()
-    
-    print(f"Detecting language for: '{text_lower}'")
+def polarity_to_emotion(polarity):
+    """Convert a TextBlob polarity to (emotion, intensity)"""
+    # Float noise below this precision must not move a result across a threshold
+    polarity = round(polarity, 9)
+    if polarity > EMOTION_THRESHOLD:
+        return 'happy', min(5, int((polarity + 1) * 2.5))
+    elif polarity < -EMOTION_THRESHOLD:
+        return 'stressed', min(5, int(abs(polarity) * 5) + 2)  # Simplified emotion detection
+    return 'neutral', 3
+
+def greeting_language(text):
+    """Return the language of the first greeting/question pattern found in text, or None"""
+    return greeting_from_groups(scan(text).groups)
+
+def greeting_from_groups(groups):
+    for lang in ('telugu', 'tamil', 'hindi', 'english'):
+        if 'greeting_' + lang in groups:
+            return lang
+    return None
+
+def language_from_groups(groups):
+    """Language for a set of lexicon groups: phrase matches first, then word matches, else English"""
+    for prefix in ('phrase_', 'words_'):
+        for lang in ('telugu', 'tamil', 'hindi'):
+            if prefix + lang in groups:
+                return lang
+    return 'english'
+
+# Lexicon groups that decide language and the greeting override
+CONVERSATION_GROUP_PREFIXES = ('phrase_', 'words_', 'greeting_')
+
+# Trailing words of earlier user messages re-read with each new one: at least this many
+# tokens (enough for the longest lexicon phrase and the post-negation look-ahead), starting
+# where no earlier negation or intensifier is pending (lexicon.resume_point), and at most
+# CONVERSATION_MAX_TAIL_WORDS words, so a run of negators cannot grow it without bound
+CONVERSATION_TAIL_TOKENS = 4
+CONVERSATION_MAX_TAIL_WORDS = 32
+
+MessageFeatures = namedtuple('MessageFeatures', ['polarity_sum', 'scored_phrases', 'groups', 'tail', 'tail_score'])
+
+def message_features(text, tail='', tail_score=None):
+    """What a running conversation aggregate needs from one user message.
     
-    # Direct phrase matching (highest priority)
-    if 'em chestunav' in text_lower or 'enti chestunav' in text_lower:
-        print("Detected Telugu via phrase matching")
-        return 'telugu'
+    The message is scored and scanned after `tail` (the end of the earlier user
+    messages), and the tail's own score is subtracted, so a negation,
+    intensifier or phrase that crosses the message boundary ("I am not" /
+    "happy at all", "kaise" / "ho") counts as it does in the joined text.
+    tail_score is the tail's (polarity_sum, scored_phrases) from the previous
+    message (scored here if missing); the returned tail and tail_score are the
+    ones to keep for the next message. Greetings are not scored: any greeting
+    in a conversation makes the whole analysis neutral.
+    """
+    window = f'{tail} {text}' if tail else text
+    words = window.split()
+    start = max(resume_point(words, CONVERSATION_TAIL_TOKENS), len(words) - CONVERSATION_MAX_TAIL_WORDS)
+    new_tail = ' '.join(words[start:])
+    groups = sorted(g for g in scan(window).groups if g.startswith(CONVERSATION_GROUP_PREFIXES))
+    if greeting_from_groups(groups):
+        return MessageFeatures(0.0, 0, groups, new_tail, [0.0, 0])
+    # Only the message on its own goes through the sentiment cache (analyze_emotion_and_language
+    # scored it already); windows and tails are one-off strings that would evict cached messages
+    polarity_sum, count = get_polarity_sum(window, cache=not tail)
+    if start == 0:
+        new_tail_score = [polarity_sum, count]
+    else:
+        new_tail_score = list(get_polarity_sum(new_tail, cache=False))
+    if tail:
+        tail_sum, tail_count = tail_score if tail_score is not None else get_polarity_sum(tail, cache=False)
+        polarity_sum, count = polarity_sum - tail_sum, count - tail_count
+    return MessageFeatures(polarity_sum, count, groups, new_tail, new_tail_score)
+
+def conversation_tail(aggregate):
+    """(tail, tail_score) to pass to message_features for the next message of an aggregate"""
+    # States stored before the tail (or its score) was kept start without one
+    tail_score = aggregate.get('tail_score')
+    return aggregate.get('tail', ''), tuple(tail_score) if tail_score is not None else None
+
+def fold_message(aggregate, text, features=None):
+    """Add one user message to a conversation aggregate (conversation_store state['analysis']).
     
-    if 'epdi iruka' in text_lower or 'enna panra' in text_lower:
-        print("Detected Tamil via phrase matching")
-        return 'tamil'
+    features are the message_features() for the aggregate's current tail when
+    the caller has computed them already.
+    """
+    if features is None:
+        features = message_features(text, *conversation_tail(aggregate))
+    aggregate['turns'] += 1
+    aggregate['polarity_sum'] += features.polarity_sum
+    aggregate['weight'] += features.scored_phrases
+    aggregate['groups'] = sorted(set(aggregate['groups']).union(features.groups))
+    aggregate['tail'] = features.tail
+    aggregate['tail_score'] = features.tail_score
+
+def aggregate_emotion(aggregate):
+    """(emotion, intensity, language) for an aggregate; agrees with
+    analyze_emotion_and_language on the user messages joined with spaces
+    (tests/test_conversation_analysis.py). With TextBlob it can still differ
+    when a "!" boosts a scored word from before the tail, which has no fixed reach."""
+    groups = set(aggregate['groups'])
+    language = language_from_groups(groups)
+    if greeting_from_groups(groups):
+        return 'neutral', 3, language
+    polarity = aggregate['polarity_sum'] / aggregate['weight'] if aggregate['weight'] else 0.0
+    return polarity_to_emotion(polarity) + (language,)
+
+MAX_BATCH_SIZE = 10000
+
+def analyze_batch(messages, processes=None):
+    """Analyze many messages at once, returning (emotion, intensity, language) per input.
     
-    if 'kaise ho' in text_lower or 'kya kar rahe ho' in text_lower:
-        print("Detected Hindi via phrase matching")
-        return 'hindi'
+    Identical messages (after normalization) are analyzed once, and every
+    message that needs TextBlob is scored up front in one score_many call so
+    large offline batches can use the process pool (processes=1 scores in
+    this process, as /api/analyze-batch does).
+    """
+    unique = {}
+    for message in messages:
+        unique.setdefault(normalize(message), message)
     
-    # Word-based detection
-    telugu_words = ['nenu', 'nuvvu', 'unnav', 'chestunav', 'ela', 'emi', 'enti', 'bagundi', 'ledhu']
-    tamil_words = ['naan', 'nee', 'iruku', 'epdi', 'enna', 'panra', 'sollu', 'illa', 'aama']
-    hindi_words = ['main', 'tum', 'kaise', 'kya', 'kar', 'rahe', 'ho', 'hai', 'achha', 'nahi']
+    results = {}
+    needs_scoring = {}
+    for key, text in unique.items():
+        cached = sentiment_cache.get(key, 'analysis')
+        if cached is not None:
+            results[key] = cached
+        elif greeting_language(text):
+            results[key] = ('neutral', 3, detect_language(text))
+        else:
+            needs_scoring[key] = text
     
-    # Count matches
-    telugu_count = sum(1 for word in telugu_words if word in text_lower)
-    tamil_count = sum(1 for word in tamil_words if word in text_lower)
-    hindi_count = sum(1 for word in hindi_words if word in text_lower)
+    if needs_scoring:
+        texts = list(needs_scoring.values())
+        for key, text, (polarity, _) in zip(needs_scoring, texts, score_many(texts, processes=processes)):
+            results[key] = polarity_to_emotion(polarity) + (detect_language(text),)
+            sentiment_cache.set(key, 'analysis', results[key])
     
-    print(f"Word counts - Telugu: {telugu_count}, Tamil: {tamil_count}, Hindi: {hindi_count}")
+    return [results[normalize(message)] for message in messages]
+
+@timed('detect_language')
+def detect_language(text):
+    """Simple but effective language detection"""
+    text_lower = text.lower().strip()
     
-    if telugu_count > 0:
-        print("Detected Telugu via word matching")
-        return 'telugu'
-    elif tamil_count > 0:
-        print("Detected Tamil via word matching")
-        return 'tamil'
-    elif hindi_count > 0:
-        print("Detected Hindi via word matching")
-        return 'hindi'
-    else:
-        print("Defaulting to English")
-        return 'english'
+    # Direct phrase matching has priority over word matching
+    language = language_from_groups(scan(text_lower).groups)
+    log.debug('language_detected', language=language, text=text_lower)
+    return language
 
 @app.route('/')
 def index():
-    return render_template('emotion_selection.html')
+    return page_cache.response('emotion_selection.html')
 
 @app.route('/chat')
 def chat_interface():
-    return render_template('chat_interface.html')
+    return page_cache.response('chat_interface.html')
 
 @app.route('/voice-chat')
 def voice_chat():
-    return render_template('voice_chat.html')
+    return page_cache.response('voice_chat.html')
 
 @app.route('/guided-flow')
 def guided_flow():
-    return render_template('guided_flow.html')
+    return page_cache.response('guided_flow.html')
+
+@app.before_request
+def begin_request_trace():
+    start_trace()
+
+@app.before_request
+def reject_oversized_request():
+    # Views catch every exception, so the size check has to run before them to produce a 413.
+    # MAX_CONTENT_LENGTH is the largest limit of any route; each endpoint gets its own here.
+    limit = REQUEST_BYTE_LIMITS.get(request.endpoint, MAX_REQUEST_BYTES)
+    if request.content_length and request.content_length > limit:
+        return jsonify({'error': f"request body larger than {limit} bytes"}), 413
 
 @app.errorhandler(404)
 def not_found(error):
-    return render_template('emotion_selection.html'), 404
+    return page_cache.response('emotion_selection.html', status=404)
 
 @app.errorhandler(500)
 def server_error(error):
@@ -152,26 +288,120 @@ def debug_database():
     except Exception as e:
         return jsonify({'error': str(e), 'database_status': 'error'}), 500
 
+@app.route('/api/debug/sentiment-cache', methods=['GET'])
+def debug_sentiment_cache():
+    return jsonify(sentiment_cache.stats())
+
+@app.route('/api/debug/metrics', methods=['GET'])
+def debug_metrics():
+    """Latency percentiles per stage and per route (estimated from the /metrics histograms)"""
+    return jsonify({
+        'stages': {stage: stats for (stage,), stats in STAGE_LATENCY.summary().items()},
+        'routes': {f'{method} {route}': stats for (method, route), stats in REQUEST_LATENCY.summary().items()}
+    })
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return app.response_class(render_metrics(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+def resolve_conversation_id(data):
+    """Return (conversation_id, error); a new id is issued when the client has none yet"""
+    conversation_id = data.get('conversation_id')
+    if conversation_id is None:
+        return new_conversation_id(), None
+    if not isinstance(conversation_id, str) or not 0 < len(conversation_id) <= MAX_CONVERSATION_ID_LENGTH:
+        return None, 'conversation_id must be a non-empty string'
+    return conversation_id, None
+
+def record_user_message(conversation_id, message):
+    """Store a user message and fold it into the conversation's running analysis; returns the user turns.
+    
+    The message is scored against the conversation's tail before the store's
+    update, so scoring one conversation never holds up the others; it is only
+    scored again, under the update, if another message of the same
+    conversation was folded in meanwhile.
+    """
+    tail = (conversation_store.read(conversation_id, lambda state: conversation_tail(state['analysis']))
+            or conversation_tail(new_state()['analysis']))
+    features = message_features(message, *tail)
+    
+    def record(state):
+        fold_message(state['analysis'], message, features if conversation_tail(state['analysis']) == tail else None)
+        return add_message(state, 'user', message)
+    return conversation_store.update(conversation_id, record)
+
+# Only the last HISTORY_WINDOW messages of a client-sent conversation_history are looked at
+HISTORY_WINDOW = int(os.environ.get('CONVERSATION_HISTORY_WINDOW', 50))
+
+HistoryWindow = namedtuple('HistoryWindow', ['user_turns', 'messages'])
+
+def parse_conversation_history(history):
+    """Validate a conversation_history payload in one pass; returns (HistoryWindow, error).
+    
+    Accepts the full transcript (a list of {'sender', 'content'} messages) or the
+    compact form {'user_turns': <int>, 'messages': [the last messages]}. Only the
+    last HISTORY_WINDOW messages are kept, so the work after parsing does not grow
+    with the length of the conversation.
+    """
+    user_turns = None
+    if isinstance(history, dict):
+        user_turns = history.get('user_turns')
+        if not isinstance(user_turns, int) or isinstance(user_turns, bool) or user_turns < 0:
+            return None, 'conversation_history.user_turns must be a non-negative integer'
+        history = history.get('messages', [])
+        if isinstance(history, list):
+            history = history[-HISTORY_WINDOW:]  # the counter already covers older messages
+    if not isinstance(history, list):
+        return None, 'conversation_history must be a list of messages or {"user_turns", "messages"}'
+    
+    window = deque(maxlen=HISTORY_WINDOW)
+    counted = 0
+    for entry in history:
+        if not (isinstance(entry, dict) and isinstance(entry.get('sender'), str)
+                and isinstance(entry.get('content'), str)):
+            return None, 'conversation_history messages need string "sender" and "content"'
+        if entry['sender'] == 'user':
+            counted += 1
+        window.append(entry)
+    
+    if user_turns is None:
+        user_turns = counted
+    elif user_turns < sum(1 for entry in window if entry['sender'] == 'user'):
+        return None, 'conversation_history.user_turns is lower than the user messages sent'
+    return HistoryWindow(user_turns, tuple(window)), None
+
 @app.route('/api/analyze-conversation', methods=['POST'])
 def analyze_conversation():
     try:
         data = request.get_json()
-        if not data or 'conversation_history' not in data:
+        if not data or ('conversation_history' not in data and 'conversation_id' not in data):
             return jsonify({'error': 'Conversation history is required'}), 400
         
-        conversation_history = data['conversation_history']
-        
-        # Extract all user messages
-        user_messages = [msg['content'] for msg in conversation_history if msg['sender'] == 'user']
-        
-        if not user_messages:
+        history = None
+        if 'conversation_history' in data:
+            history, error = parse_conversation_history(data['conversation_history'])
+            if error:
+                return jsonify({'error': error}), 400
+        
+        aggregate = None
+        if 'conversation_id' in data:
+            # Kept up to date as each message arrives, so nothing is re-scored here
+            state = conversation_store.get(str(data['conversation_id']))
+            if state is not None and state['analysis']['turns']:
+                aggregate = state['analysis']
+        if aggregate is None:
+            # No stored conversation (older clients, or it expired or was evicted):
+            # aggregate the recent transcript the client sent, if any
+            aggregate = new_state()['analysis']
+            for msg in history.messages if history else ():
+                if msg['sender'] == 'user':
+                    fold_message(aggregate, msg['content'])
+        
+        if not aggregate['turns']:
             return jsonify({'error': 'No user messages found'}), 400
         
-        # Combine all messages for analysis
-        combined_text = ' '.join(user_messages)
-        
         # Analyze the entire conversation
-        emotion, intensity, detected_lang = analyze_emotion_and_language(combined_text)
+        emotion, intensity, detected_lang = aggregate_emotion(aggregate)
         
         # Map neutral to happy for better user experience
         if emotion == 'neutral':
@@ -192,7 +422,34 @@ def analyze_conversation():
             'intensity': intensity,
             'detected_language': detected_lang,
             'yoga_message': yoga_messages.get(emotion, yoga_messages['happy']),
-            'conversation_analysis': f'Analyzed {len(user_messages)} messages'
+            'conversation_analysis': f"Analyzed {aggregate['turns']} messages"
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/analyze-batch', methods=['POST'])
+def analyze_batch_endpoint():
+    try:
+        data = request.get_json()
+        if not data or 'messages' not in data:
+            return jsonify({'error': 'messages is required'}), 400
+        
+        messages = data['messages']
+        if not isinstance(messages, list) or not all(isinstance(m, str) for m in messages):
+            return jsonify({'error': 'messages must be a list of strings'}), 400
+        if len(messages) > MAX_BATCH_SIZE:
+            return jsonify({'error': f'at most {MAX_BATCH_SIZE} messages per batch'}), 400
+        
+        # Scored on the request thread: worker processes are the unit of parallelism here
+        results = analyze_batch(messages, processes=1)
+        
+        return jsonify({
+            'results': [
+                {'emotion': emotion, 'intensity': intensity, 'detected_language': language}
+                for emotion, intensity, language in results
+            ],
+            'unique_messages': len({normalize(m) for m in messages})
         })
         
     except Exception as e:
@@ -206,7 +463,11 @@ def voice_chat_analyze():
             return jsonify({'error': 'Message is required'}), 400
         
         message = data['message'].strip()
-        conversation_history = data.get('conversation_history', [])
+        conversation_id, error = resolve_conversation_id(data)
+        if not error and 'conversation_history' in data:  # older clients resend the transcript
+            history, error = parse_conversation_history(data['conversation_history'])
+        if error:
+            return jsonify({'error': error}), 400
         
         if len(message) < 2:
             return jsonify({'error': 'Please provide a longer message'}), 400
@@ -214,10 +475,19 @@ def voice_chat_analyze():
         # Analyze emotion from voice input
         emotion, intensity, detected_lang = analyze_emotion_and_language(message)
         
+        # Voice clients count turns before the current message
+        user_turns = record_user_message(conversation_id, message)
+        if 'conversation_history' in data:
+            conversation_turns = history.user_turns
+        else:
+            conversation_turns = user_turns - 1
+        
         # Generate empathetic voice response
         response_data = generate_voice_response(
-            message, emotion, intensity, detected_lang, conversation_history
+            message, emotion, intensity, detected_lang, conversation_turns, conversation_id
         )
+        conversation_store.update(conversation_id, lambda state: add_message(state, 'assistant', response_data['response']))
+        response_data['conversation_id'] = conversation_id
         
         return jsonify(response_data)
         
@@ -232,8 +502,12 @@ def chat_analyze():
             return jsonify({'error': 'Message is required'}), 400
         
         message = data['message'].strip()
-        conversation_history = data.get('conversation_history', [])
         is_quick_response = data.get('is_quick_response', False)
+        conversation_id, error = resolve_conversation_id(data)
+        if not error and 'conversation_history' in data:  # older clients resend the transcript
+            history, error = parse_conversation_history(data['conversation_history'])
+        if error:
+            return jsonify({'error': error}), 400
         
         if len(message) < 2:
             return jsonify({'error': 'Please provide a longer message'}), 400
@@ -241,32 +515,38 @@ def chat_analyze():
         # Analyze emotion and language
         emotion, intensity, detected_lang = analyze_emotion_and_language(message)
         
+        # Chat clients count turns including the current message
+        conversation_turns = record_user_message(conversation_id, message)
+        if 'conversation_history' in data:
+            conversation_turns = history.user_turns
+        
         # Generate conversational response
         response_data = generate_conversational_response(
-            message, emotion, intensity, detected_lang, conversation_history, is_quick_response
+            message, emotion, intensity, detected_lang, conversation_turns, is_quick_response
         )
+        conversation_store.update(conversation_id, lambda state: add_message(state, 'bot', response_data['response']))
+        response_data['conversation_id'] = conversation_id
         
         return jsonify(response_data)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-def generate_conversational_response(message, emotion, intensity, language, history, is_quick_response):
+@timed('generate_conversational_response')
+def generate_conversational_response(message, emotion, intensity, language, conversation_turns, is_quick_response):
     """Generate contextual conversational response using TextBlob analysis"""
     
-    # Count conversation turns
-    conversation_turns = len([h for h in history if h['sender'] == 'user'])
-    
-    # Use TextBlob to analyze message content
-    blob = TextBlob(message)
+    # Use TextBlob to analyze message content (shared cache with analyze_emotion_and_language)
+    _, subjectivity = get_sentiment(message)
     
     # Check message characteristics
+    hits = scan(message)
     is_greeting_msg = is_greeting(message)
-    has_coping_words = any(word in message.lower() for word in ['music', 'songs', 'walk', 'friends', 'family', 'padatam', 'vindam'])
-    is_question = message.strip().endswith('?') or any(word in message.lower() for word in ['what', 'how', 'why', 'when', 'emi', 'ela', 'enna', 'kya'])
+    has_coping_words = 'coping' in hits.groups
+    is_question = message.strip().endswith('?') or 'question_word' in hits.groups
     
     # Determine conversation context
-    if blob.sentiment.subjectivity < 0.3:  # Objective/factual
+    if subjectivity < 0.3:  # Objective/factual
         context = 'general_chat'
     elif has_coping_words:
         context = 'coping_response'
@@ -277,70 +557,7 @@ def generate_conversational_response(message, emotion, intensity, language, hist
     else:
         context = 'supportive_response'
     
-    # Generate dynamic responses based on full message context
-    def get_response(context, language, emotion, intensity, message):
-        message_lower = message.lower()
-        
-        # Check if message has both greeting AND emotion content
-        has_greeting = any(word in message_lower for word in ['em chestunav', 'what are you doing', 'epdi iruka', 'kaise ho'])
-        has_emotion_content = any(word in message_lower for word in ['tension', 'stress', 'sad', 'happy', 'tired', 'worried', 'badhaga', 'santhosham'])
-        
-        # If message has both greeting and emotional content, prioritize emotion
-        if has_greeting and has_emotion_content:
-            if emotion == 'stressed' or 'tension' in message_lower:
-                responses = {
-                    'english': "I can hear you're feeling stressed. What's been going on?",
-                    'telugu': "Nuvvu tension lo unnav anipistundi. Emi jarigindi cheppu?",
-                    'tamil': "Nee tension ah irukura madhiri theriyudhu. Enna nadandhuchu?",
-                    'hindi': "Lagta hai tum tension mein ho. Kya hua hai?"
-                }
-                return responses.get(language, responses['english'])
-        
-        # Pure greeting without emotional content
-        elif has_greeting and not has_emotion_content:
-            responses = {
-                'english': "Just here to chat and help! What's up with you?",
-                'telugu': "Ikkada unna nuvvu tho matladataniki! Nuvvu enti chestunnav?",
-                'tamil': "Inga irken unna kooda pesa! Nee enna panra?",
-                'hindi': "Yahan hun tumse baat karne! Tum kya kar rahe ho?"
-            }
-            return responses.get(language, responses['english'])
-        
-        responses = {
-            'simple_greeting': {
-                'english': "Hey! How's it going?",
-                'telugu': "Enti ra! Ela unnav?",
-                'tamil': "Vanakkam! Epdi iruka?",
-                'hindi': "Namaste! Kaise ho?"
-            },
-            'supportive_response': {
-                'english': f"I can sense you're feeling {emotion}. Want to talk about it?",
-                'telugu': f"Nuvvu {emotion} ga unnav anipistundi. Matladamantava?",
-                'tamil': f"Nee {emotion} ah irukura madhiri theriyudhu. Pesalama?",
-                'hindi': f"Lagta hai tum {emotion} feel kar rahe ho. Baat karna hai?"
-            },
-            'happy_response': {
-                'english': "That's awesome! You sound really happy!",
-                'telugu': "Waah! Chala happy ga unnav!",
-                'tamil': "Super! Romba happy ah iruka!",
-                'hindi': "Bahut achha! Tum bahut khush lag rahe ho!"
-            },
-            'coping_response': {
-                'english': "That's great! Those things really help.",
-                'telugu': "Adi bagundi! Vaati valla help avtundi.",
-                'tamil': "Adhu nalladu! Avai romba help aagum.",
-                'hindi': "Yeh achhi baat hai! Yeh cheezein help karti hain."
-            },
-            'general_chat': {
-                'english': "Tell me more about what's going on.",
-                'telugu': "Inka cheppu emi jarigindi.",
-                'tamil': "Inka enna nadakudhu sollu.",
-                'hindi': "Aur batao kya chal raha hai."
-            }
-        }
-        return responses.get(context, responses['general_chat']).get(language, responses[context]['english'])
-    
-    response = get_response(context, language, emotion, intensity, message)
+    response = chat_response(hits, context, language, emotion)
     
     # Determine if yoga should be suggested (after meaningful conversation)
     suggest_yoga = conversation_turns > 5 and emotion != 'neutral' and context != 'simple_greeting'
@@ -353,13 +570,7 @@ def generate_conversational_response(message, emotion, intensity, language, hist
     # Yoga suggestion based on analysis
     yoga_message = ""
     if suggest_yoga:
-        yoga_templates = {
-            'english': "Want to try some yoga? It might help.",
-            'telugu': "Yoga try cheyyamantava? Help avtundi.",
-            'tamil': "Yoga try pannalama? Help aagum.",
-            'hindi': "Yoga try karna hai? Help karega."
-        }
-        yoga_message = yoga_templates.get(language, yoga_templates['english'])
+        yoga_message = render_response('chat', 'yoga_suggestion', language)
     
     return {
         'response': response,
@@ -372,271 +583,118 @@ def generate_conversational_response(message, emotion, intensity, language, hist
         'conversation_stage': context
     }
 
+def chat_response(hits, context, language, emotion):
+    """Pick the chat reply for a message's lexicon hits and conversation context"""
+    # Check if message has both greeting AND emotion content
+    has_greeting = 'chat_greeting' in hits.groups
+    has_emotion_content = 'chat_emotion' in hits.groups
+    
+    # If message has both greeting and emotional content, prioritize emotion
+    if has_greeting and has_emotion_content:
+        if emotion == 'stressed' or 'tension' in hits.phrases:
+            return render_response('chat', 'greeting_with_stress', language)
+    
+    # Pure greeting without emotional content
+    elif has_greeting and not has_emotion_content:
+        return render_response('chat', 'greeting_only', language)
+    
+    return render_response('chat', context, language, emotion=emotion)
+
 def generate_dynamic_questions(message, emotion, language):
     """Generate contextual questions based on actual message content"""
-    message_lower = message.lower()
-    
     # Context-specific responses
-    if any(word in message_lower for word in ['em chestunav', 'what are you doing', 'epdi iruka', 'kaise ho']):
-        questions = {
-            'english': ["Just here chatting with you!", "What about you? How's your day?"],
-            'telugu': ["Nuvvu tho matladutunna!", "Nuvvu ela unnav? Day ela undi?"],
-            'tamil': ["Unna kooda pesitu irken!", "Nee epdi iruka? Day epdi pochu?"],
-            'hindi': ["Tumse baat kar raha hun!", "Tum kaise ho? Din kaisa gaya?"]
-        }
+    if 'chat_greeting' in scan(message).groups:
+        key = 'chat_greeting'
     elif emotion == 'happy':
-        questions = {
-            'english': ["That's great to hear!", "What made your day so good?"],
-            'telugu': ["Adi vinataniki bagundi!", "Enti jarigindi antha bagundi?"],
-            'tamil': ["Adhu kekka nallairuku!", "Enna nadandhuchu ivlo nallairuku?"],
-            'hindi': ["Yeh sunke achha laga!", "Kya hua itna achha?"]
-        }
+        key = 'happy'
     else:
-        questions = {
-            'english': ["Want to talk about it?", "How are you feeling?"],
-            'telugu': ["Matladamantava?", "Ela feel avutunnav?"],
-            'tamil': ["Pesanum ah?", "Epdi feel panra?"],
-            'hindi': ["Baat karna hai?", "Kaise feel kar rahe ho?"]
-        }
+        key = 'default'
     
-    return questions.get(language, questions['english'])
+    return get_template('questions', key, language)
 
 import random
 import re
 
 class ContextualConversationEngine:
-    def __init__(self):
-        self.conversation_memory = []
-        self.user_context = {
-            'name': None,
-            'mood': None,
-            'topics': [],
-            'last_topic': None
-        }
+    """Stateless response generator; per-conversation memory lives in the conversation store"""
     
     def analyze_context(self, message, language):
         """Analyze message for context clues"""
-        message_lower = message.lower().strip()
+        groups = scan(message).groups
         
         # Extract context patterns
         context = {
-            'is_question': '?' in message or any(word in message_lower for word in ['emi', 'enna', 'kya', 'what', 'how', 'why']),
-            'is_sharing': any(word in message_lower for word in ['nenu', 'naan', 'main', 'i am', 'i was', 'i did']),
-            'is_problem': any(word in message_lower for word in ['problem', 'issue', 'tension', 'stress', 'worry', 'kashtam', 'pareshaani']),
-            'is_positive': any(word in message_lower for word in ['good', 'happy', 'bagundi', 'nallairuku', 'achha', 'great']),
-            'is_work_related': any(word in message_lower for word in ['work', 'job', 'office', 'vellu', 'pani', 'kaam']),
-            'is_family_related': any(word in message_lower for word in ['family', 'parents', 'intlo', 'veetla', 'ghar']),
-            'mentions_time': any(word in message_lower for word in ['today', 'evala', 'inniki', 'aaj', 'yesterday', 'tomorrow'])
+            'is_question': '?' in message or 'ctx_question' in groups,
+            'is_sharing': 'ctx_sharing' in groups,
+            'is_problem': 'ctx_problem' in groups,
+            'is_positive': 'ctx_positive' in groups,
+            'is_work_related': 'ctx_work' in groups,
+            'is_family_related': 'ctx_family' in groups,
+            'mentions_time': 'ctx_time' in groups
         }
         
         return context
     
-    def generate_contextual_response(self, message, emotion, language, history):
+    def generate_contextual_response(self, message, emotion, language, state):
         """Generate human-like contextual responses"""
-        message_lower = message.lower().strip()
         context = self.analyze_context(message, language)
         
-        # Store conversation memory
-        self.conversation_memory.append({
+        # Store conversation memory (the store keeps only the last few exchanges)
+        state['memory'].append({
             'message': message,
             'context': context,
             'emotion': emotion
         })
         
-        # Keep only last 5 exchanges for context
-        if len(self.conversation_memory) > 5:
-            self.conversation_memory = self.conversation_memory[-5:]
-        
         # Generate response based on context
         return self._get_contextual_response(message, context, emotion, language)
     
     def _get_contextual_response(self, message, context, emotion, language):
         """Generate specific contextual responses"""
-        message_lower = message.lower().strip()
-        
-        # Language-specific contextual responses
-        responses = {
-            'telugu': self._get_telugu_response(message_lower, context, emotion),
-            'tamil': self._get_tamil_response(message_lower, context, emotion),
-            'hindi': self._get_hindi_response(message_lower, context, emotion),
-            'english': self._get_english_response(message_lower, context, emotion)
-        }
+        phrases = scan(message).phrases
         
-        return responses.get(language, responses['english'])
-    
-    def _get_telugu_response(self, message, context, emotion):
         # Greeting responses
-        if 'em chestunav' in message or 'enti chestunav' in message:
-            return "Nuvvu tho matladutunna! Nuvvu ela unnav? Emi interesting jarigindi?"
-        
-        if 'ela unnav' in message:
-            return "Nenu bagunnanu! Nuvvu ela unnav? Day ela undi?"
-        
-        # Work-related responses
-        if context['is_work_related']:
-            if context['is_problem']:
-                return "Office lo problem aa? Emi jarigindi cheppu?"
-            else:
-                return "Work ela undi? Busy ga unnava?"
-        
-        # Family-related responses
-        if context['is_family_related']:
-            return "Intlo andaru bagunnara? Emi updates?"
-        
-        # Problem/stress responses
-        if context['is_problem'] or emotion == 'stressed':
-            return "Emi problem? Naku cheppu, solution dorukkuntundi"
-        
-        # Positive responses
-        if context['is_positive'] or emotion == 'happy':
-            return "Waah! Chala bagundi! Emi special jarigindi?"
-        
-        # Question responses
-        if context['is_question']:
-            return "Hmm, adi interesting question. Nee opinion emi?"
-        
-        # Sharing responses
-        if context['is_sharing']:
-            return "Avunu, inka cheppu. Naku interesting ga undi"
-        
-        # Default contextual responses
-        defaults = [
-            "Hmm, artham aindi. Inka emi?",
-            "Avunu, continue cheyyi",
-            "Interesting! Inka details cheppu",
-            "Okay, inka emi jarigindi?"
-        ]
-        return random.choice(defaults)
-    
-    def _get_tamil_response(self, message, context, emotion):
-        # Greeting responses
-        if 'epdi iruka' in message:
-            return "Naan nalla irken! Nee epdi iruka? Enna interesting nadandhuchu?"
-        
-        # Work-related responses
-        if context['is_work_related']:
-            if context['is_problem']:
-                return "Office la problem aa? Enna achu sollu?"
-            else:
-                return "Work epdi pochu? Busy ah iruka?"
-        
-        # Family-related responses
-        if context['is_family_related']:
-            return "Veetla ellam nalla irukanga? Enna updates?"
-        
-        # Problem/stress responses
-        if context['is_problem'] or emotion == 'stressed':
-            return "Enna problem? Enaku sollu, solution kedaikum"
-        
-        # Positive responses
-        if context['is_positive'] or emotion == 'happy':
-            return "Wow! Romba nallairuku! Enna special nadandhuchu?"
-        
-        # Question responses
-        if context['is_question']:
-            return "Hmm, adhu interesting question. Unna opinion enna?"
-        
-        # Sharing responses
-        if context['is_sharing']:
-            return "Aama, inka sollu. Enaku interesting ah iruku"
-        
-        # Default contextual responses
-        defaults = [
-            "Hmm, purinjuchu. Inka enna?",
-            "Aama, continue pannu",
-            "Interesting! Inka details sollu",
-            "Okay, inka enna nadandhuchu?"
-        ]
-        return random.choice(defaults)
-    
-    def _get_hindi_response(self, message, context, emotion):
-        # Greeting responses
-        if 'kaise ho' in message:
-            return "Main theek hun! Tum kaise ho? Kya interesting hua?"
-        
-        # Work-related responses
-        if context['is_work_related']:
-            if context['is_problem']:
-                return "Office mein problem hai? Kya hua batao?"
-            else:
-                return "Kaam kaisa chal raha hai? Busy ho?"
-        
-        # Family-related responses
-        if context['is_family_related']:
-            return "Ghar mein sab theek hai? Kya updates hai?"
-        
-        # Problem/stress responses
-        if context['is_problem'] or emotion == 'stressed':
-            return "Kya problem hai? Mujhe batao, solution mil jayega"
-        
-        # Positive responses
-        if context['is_positive'] or emotion == 'happy':
-            return "Wow! Bahut achha! Kya special hua?"
-        
-        # Question responses
-        if context['is_question']:
-            return "Hmm, interesting question hai. Tumhara opinion kya hai?"
-        
-        # Sharing responses
-        if context['is_sharing']:
-            return "Haan, aur batao. Mujhe interesting lag raha hai"
-        
-        # Default contextual responses
-        defaults = [
-            "Hmm, samajh gaya. Aur kya?",
-            "Haan, continue karo",
-            "Interesting! Aur details batao",
-            "Okay, aur kya hua?"
-        ]
-        return random.choice(defaults)
-    
-    def _get_english_response(self, message, context, emotion):
-        # Greeting responses
-        if 'how are you' in message:
-            return "I'm good! How are you? What's been happening?"
+        for phrase, response in get_template('contextual', 'greetings', language):
+            if phrase in phrases:
+                return response
         
         # Work-related responses
         if context['is_work_related']:
             if context['is_problem']:
-                return "Work troubles? What's going on?"
+                return render_response('contextual', 'work_problem', language)
             else:
-                return "How's work going? Keeping busy?"
+                return render_response('contextual', 'work', language)
         
         # Family-related responses
         if context['is_family_related']:
-            return "How's the family? Any updates?"
+            return render_response('contextual', 'family', language)
         
         # Problem/stress responses
         if context['is_problem'] or emotion == 'stressed':
-            return "What's the problem? Tell me, we can figure it out"
+            return render_response('contextual', 'problem', language)
         
         # Positive responses
         if context['is_positive'] or emotion == 'happy':
-            return "That's awesome! What's the good news?"
+            return render_response('contextual', 'positive', language)
         
         # Question responses
         if context['is_question']:
-            return "Hmm, interesting question. What do you think?"
+            return render_response('contextual', 'question', language)
         
         # Sharing responses
         if context['is_sharing']:
-            return "Yeah, tell me more. Sounds interesting"
+            return render_response('contextual', 'sharing', language)
         
         # Default contextual responses
-        defaults = [
-            "I see, what else?",
-            "Right, go on",
-            "Interesting! Tell me more",
-            "Okay, what happened next?"
-        ]
-        return random.choice(defaults)
+        return random.choice(get_template('contextual', 'default', language))
 
 # Initialize contextual engine
 contextual_engine = ContextualConversationEngine()
 
 class VoiceResponseEngine:
+    """Stateless apart from its response tables; the exchange counter lives in the conversation state"""
+    
     def __init__(self):
-        self.conversation_count = 0
         self.responses = {
             'telugu': {
                 'greetings': {
@@ -737,47 +795,49 @@ class VoiceResponseEngine:
             }
         }
     
-    def get_response(self, message, emotion, language):
-        message_lower = message.lower().strip()
+    def get_response(self, message, emotion, language, state):
+        phrases = scan(message).phrases
         lang_responses = self.responses.get(language, self.responses['english'])
         
         # Check for specific greeting patterns first
         for pattern, response in lang_responses['greetings'].items():
-            if pattern in message_lower:
-                print(f"Matched greeting pattern '{pattern}' in {language}")
-                self.conversation_count = 0  # Reset for new conversation
+            if pattern in phrases:
+                log.debug('voice_greeting_matched', pattern=pattern, language=language)
+                state['voice_count'] = 0  # Reset for new conversation
                 return response
         
         # Check for emotion-based responses (only for first few exchanges)
-        if self.conversation_count < 2 and emotion in lang_responses['emotions']:
-            print(f"Using emotion response for '{emotion}' in {language}")
-            self.conversation_count += 1
+        if state['voice_count'] < 2 and emotion in lang_responses['emotions']:
+            log.debug('voice_emotion_response', emotion=emotion, language=language)
+            state['voice_count'] += 1
             return lang_responses['emotions'][emotion]
         
         # Use varied conversational responses
         if 'responses' in lang_responses:
             import random
             response = random.choice(lang_responses['responses'])
-            print(f"Using varied response in {language}: {response}")
-            self.conversation_count += 1
+            log.debug('voice_varied_response', language=language, response=response)
+            state['voice_count'] += 1
             return response
         
         # Default response
-        print(f"Using default response in {language}")
-        self.conversation_count += 1
+        log.debug('voice_default_response', language=language)
+        state['voice_count'] += 1
         return lang_responses['default']
 
 # Initialize the voice engine
 voice_engine = VoiceResponseEngine()
 
-def generate_voice_response(message, emotion, intensity, language, history):
+@timed('generate_voice_response')
+def generate_voice_response(message, emotion, intensity, language, conversation_turns, conversation_id):
     """Contextual human-like conversation system"""
-    conversation_turns = len([h for h in history if h['sender'] == 'user'])
+    log.debug('voice_message', message=message, emotion=emotion, language=language)
     
-    print(f"Processing: '{message}' | Emotion: {emotion} | Language: {language}")
-    
-    # Generate contextual response
-    response_text = contextual_engine.generate_contextual_response(message, emotion, language, history)
+    # Generate contextual response against this conversation's memory
+    response_text = conversation_store.update(
+        conversation_id,
+        lambda state: contextual_engine.generate_contextual_response(message, emotion, language, state)
+    )
     
     # Determine if ready for yoga suggestion
     suggest_yoga = (
@@ -786,7 +846,7 @@ def generate_voice_response(message, emotion, intensity, language, history):
         intensity >= 3
     )
     
-    print(f"Generated contextual response: '{response_text}'")
+    log.debug('voice_response', response=response_text, ready_for_yoga=suggest_yoga)
     
     return {
         'response': response_text,
@@ -918,24 +978,14 @@ def start_session():
         if emotion == 'neutral':
             emotion = 'happy'
         
-        # Find matching sequence
-        sequence = Sequence.query.filter_by(emotion=emotion).first()
+        # Find matching sequence (from the in-memory catalog)
+        with stage_timer('start_session.resolve_sequence'):
+            sequence = get_catalog().resolve_sequence(emotion, intensity)
         if not sequence:
-            # Fallback to happy sequence if emotion not found
-            sequence = Sequence.query.filter_by(emotion='happy').first()
-            if not sequence:
-                # Check if any sequences exist at all
-                total_sequences = Sequence.query.count()
-                if total_sequences == 0:
-                    return jsonify({
-                        'error': 'Database not initialized. Please run: python seed_data.py',
-                        'debug_info': 'No yoga sequences found in database'
-                    }), 500
-                else:
-                    # Use any available sequence as fallback
-                    sequence = Sequence.query.first()
-                    if not sequence:
-                        return jsonify({'error': 'Database error: No sequences accessible'}), 500
+            return jsonify({
+                'error': 'Database not initialized. Please run: python seed_data.py',
+                'debug_info': 'No yoga sequences found in database'
+            }), 500
         
         # Create session (simplified - no user auth for now)
         session = Session(
@@ -944,33 +994,19 @@ def start_session():
             intensity=intensity,
             sequence_id=sequence.id
         )
-        db.session.add(session)
-        db.session.commit()
-        
-        # Get asana details
-        asana_sequence = json.loads(sequence.asana_sequence)
-        asanas = []
-        for item in asana_sequence:
-            asana = db.session.get(Asana, item['asana_id'])
-            if asana:
-                asanas.append({
-                    'id': asana.id,
-                    'name': asana.name,
-                    'sanskrit_name': asana.sanskrit_name,
-                    'overview_image': asana.overview_image,
-                    'steps': json.loads(asana.step_data),
-                    'duration': item['duration']
-                })
+        with stage_timer('start_session.db_insert'):
+            db.session.add(session)
+            db.session.commit()
         
-        return jsonify({
-            'session_id': session.id,
-            'sequence': {
-                'id': sequence.id,
-                'name': sequence.name,
-                'total_duration': sequence.total_duration,
-                'asanas': asanas
-            }
-        }), 201
+        # Sequence payloads are pre-serialized by the catalog. A client that already holds this
+        # catalog version (GET /api/asanas) only needs the sequence reference: ids and durations.
+        catalog_version = get_catalog().version
+        sequence_json = sequence.reference if data.get('catalog_version') == catalog_version else sequence.payload
+        return app.response_class(
+            '{"session_id": %d, "catalog_version": "%s", "sequence": %s}' % (session.id, catalog_version, sequence_json),
+            status=201,
+            mimetype='application/json'
+        )
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -978,18 +1014,70 @@ def start_session():
 @app.route('/api/asanas/<int:asana_id>', methods=['GET'])
 def get_asana(asana_id):
     try:
-        asana = db.session.get(Asana, asana_id)
+        asana = get_catalog().asanas.get(asana_id)
         if not asana:
             return jsonify({'error': 'Asana not found'}), 404
         
+        return conditional_response(asana.payload, asana.etag)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/asanas', methods=['GET'])
+def get_asanas():
+    """Several asanas in one request: ?ids=1,2,3 (all of them without ids)"""
+    try:
+        catalog = get_catalog()
+        ids_param = request.args.get('ids', '').strip()
+        if ids_param:
+            try:
+                ids = [int(value) for value in ids_param.split(',') if value.strip()]
+            except ValueError:
+                return jsonify({'error': 'ids must be a comma-separated list of numbers'}), 400
+            if len(ids) > MAX_BULK_ASANAS:
+                return jsonify({'error': f'at most {MAX_BULK_ASANAS} ids per request'}), 400
+        else:
+            ids = list(catalog.asanas)
+        
+        found = [catalog.asanas[asana_id] for asana_id in dict.fromkeys(ids) if asana_id in catalog.asanas]
+        missing = [asana_id for asana_id in dict.fromkeys(ids) if asana_id not in catalog.asanas]
+        body = '{"catalog_version": "%s", "asanas": [%s], "missing": %s}' % (
+            catalog.version, ', '.join(asana.payload for asana in found), json.dumps(missing))
+        return conditional_response(body, content_hash(catalog.version, ids_param))
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def session_exists(session_id):
+    """True if the session has pending buffered writes or a database row"""
+    return bool(session_writer.pending(session_id)) or db.session.get(Session, session_id) is not None
+
+def parse_duration(data):
+    """Return (duration or None, error message or None) from a heartbeat/complete payload"""
+    if 'duration' not in data:
+        return None, None
+    try:
+        return int(data['duration']), None
+    except (TypeError, ValueError):
+        return None, 'duration must be a number'
+
+@app.route('/api/session/<int:session_id>', methods=['GET'])
+def get_session(session_id):
+    """Session state including buffered updates that are not yet written (read-your-writes)"""
+    try:
+        session = db.session.get(Session, session_id)
+        if not session:
+            return jsonify({'error': 'Session not found'}), 404
+        
+        pending = session_writer.pending(session_id)
         return jsonify({
-            'id': asana.id,
-            'name': asana.name,
-            'sanskrit_name': asana.sanskrit_name,
-            'overview_image': asana.overview_image,
-            'steps': json.loads(asana.step_data),
-            'difficulty': asana.difficulty,
-            'benefits': asana.benefits
+            'id': session.id,
+            'emotion': session.emotion,
+            'intensity': session.intensity,
+            'sequence_id': session.sequence_id,
+            'duration': pending.get('duration', session.duration),
+            'completed': pending.get('completed', session.completed),
+            'created_at': session.created_at.isoformat() if session.created_at else None
         })
         
     except Exception as e:
@@ -998,8 +1086,7 @@ def get_asana(asana_id):
 @app.route('/api/session/<int:session_id>/update', methods=['POST'])
 def update_session(session_id):
     try:
-        session = db.session.get(Session, session_id)
-        if not session:
+        if not session_exists(session_id):
             return jsonify({'error': 'Session not found'}), 404
         
         data = request.get_json()
@@ -1007,14 +1094,12 @@ def update_session(session_id):
             return jsonify({'error': 'No JSON data provided'}), 400
         
         # Optional heartbeat data
-        if 'duration' in data:
-            try:
-                duration = int(data['duration'])
-                session.duration = duration
-            except ValueError:
-                return jsonify({'error': 'duration must be a number'}), 400
+        duration, error = parse_duration(data)
+        if error:
+            return jsonify({'error': error}), 400
         
-        db.session.commit()
+        # Buffered: written with other heartbeats in the next batched flush
+        session_writer.submit(session_id, duration=duration)
         return jsonify({'message': 'Session updated successfully'})
         
     except Exception as e:
@@ -1023,26 +1108,20 @@ def update_session(session_id):
 @app.route('/api/session/<int:session_id>/complete', methods=['POST'])
 def complete_session(session_id):
     try:
-        session = db.session.get(Session, session_id)
-        if not session:
+        if not session_exists(session_id):
             return jsonify({'error': 'Session not found'}), 404
         
         data = request.get_json()
         if not data:
             return jsonify({'error': 'No JSON data provided'}), 400
         
-        # Mark session as completed
-        session.completed = True
-        
         # Optional rating and notes (would need additional fields in model)
-        if 'duration' in data:
-            try:
-                duration = int(data['duration'])
-                session.duration = duration
-            except ValueError:
-                return jsonify({'error': 'duration must be a number'}), 400
+        duration, error = parse_duration(data)
+        if error:
+            return jsonify({'error': error}), 400
         
-        db.session.commit()
+        # Mark session as completed (buffered like heartbeats)
+        session_writer.submit(session_id, duration=duration, completed=True)
         return jsonify({'message': 'Session completed successfully'})
         
     except Exception as e:
@@ -1051,8 +1130,10 @@ def complete_session(session_id):
 def init_app():
     """Initialize the application with database and default data"""
     with app.app_context():
-        # Create tables
+        # Create tables, then add indexes that older databases are missing
         db.create_all()
+        for index_name in ensure_indexes():
+            log.info('index_created', index=index_name)
         
         # Create default user if not exists
         if not db.session.get(User, 1):
@@ -1062,8 +1143,31 @@ def init_app():
         
         # Check if we need to seed data
         if not Asana.query.first():
-            print("No asanas found. Please run: python seed_data.py")
+            log.warning('catalog_empty', hint='run python seed_data.py')
 
-if __name__ == '__main__':
+def warm_up_worker():
+    """Load the catalog snapshot and the sentiment models so a worker's first requests don't pay for them"""
+    started = time.perf_counter()
+    with app.app_context():
+        catalog = get_catalog()
+    sentiment.warm_up()
+    page_cache.warm_up(PAGE_TEMPLATES)
+    log.info('worker_warmed_up', pid=os.getpid(), asanas=len(catalog.asanas), catalog_source=catalog.stamp[0],
+             sentiment_backend=sentiment.backend.name, seconds=round(time.perf_counter() - started, 3))
+
+def create_app(warm_up=False):
+    """Application factory for WSGI/ASGI servers: prepare the database (idempotent) and return the app.
+
+    Pre-forking servers should create the app once in the master and call
+    warm_up_worker() in every worker (see gunicorn.conf.py); single-process
+    servers can pass warm_up=True.
+    """
     init_app()
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    if warm_up:
+        warm_up_worker()
+    return app
+
+if __name__ == '__main__':
+    # Development server only; production runs `gunicorn -c gunicorn.conf.py` (see README)
+    create_app()
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1', host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
\ No newline at end of file
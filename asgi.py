@@ -0,0 +1,142 @@
+"""ASGI serving mode for the app:  uvicorn asgi:application  (uvicorn is an optional dependency).
+
+Sockets, request bodies and responses are handled on the event loop, so a
+connected client, even a slow one, costs a coroutine rather than a server
+thread. The Flask views (sentiment scoring, response generation, SQLite
+commits) run on a bounded pool of ASGI_WORKER_THREADS threads and never on the
+loop. Session heartbeats and completions are already write-behind
+(session_writer). When more than ASGI_MAX_QUEUED requests are waiting for a
+worker, new ones get a 503 instead of queueing without bound.
+
+Settings: ASGI_WORKER_THREADS (default 8, keep it within DB_POOL_SIZE +
+DB_MAX_OVERFLOW), ASGI_MAX_QUEUED (default 1000).
+"""
+import asyncio
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from app import app, create_app, session_writer
+
+
+class BoundedWSGIAdapter:
+    """Serve a WSGI app over ASGI, running each request on a bounded thread pool"""
+
+    def __init__(self, wsgi_app, max_workers=8, max_queued=1000, max_body=None):
+        self.wsgi_app = wsgi_app
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.max_body = max_body
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='asgi-worker')
+        self._in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return  # websockets are not served
+
+        body = await self._read_body(receive)
+        if body is None:
+            await self._send_json(send, 413, b'{"error": "request body too large"}')
+            return
+        if self._in_flight >= self.max_workers + self.max_queued:
+            await self._send_json(send, 503, b'{"error": "server busy, try again"}')
+            return
+
+        self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            status, headers, content = await loop.run_in_executor(self.executor, self._run_wsgi, scope, body)
+        finally:
+            self._in_flight -= 1
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': content})
+
+    async def _read_body(self, receive):
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if self.max_body is not None and size > self.max_body:
+                return None
+            chunks.append(chunk)
+            if not message.get('more_body'):
+                break
+        return b''.join(chunks)
+
+    def _run_wsgi(self, scope, body):
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                   for name, value in headers]
+
+        result = self.wsgi_app(self._environ(scope, body), start_response)
+        try:
+            content = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return response['status'], response['headers'], content
+
+    @staticmethod
+    def _environ(scope, body):
+        server_name, server_port = scope.get('server') or ('localhost', 80)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server_name,
+            'SERVER_PORT': str(server_port),
+            'SERVER_PROTOCOL': 'HTTP/' + scope.get('http_version', '1.1'),
+            'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope.get('headers', []):
+            key = name.decode('latin-1').upper().replace('-', '_')
+            if key not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                key = 'HTTP_' + key
+            value = value.decode('latin-1')
+            environ[key] = environ[key] + ',' + value if key in environ else value
+        return environ
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await asyncio.get_running_loop().run_in_executor(self.executor, create_app, True)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                session_writer.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    async def _send_json(send, status, body):
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', b'application/json')]})
+        await send({'type': 'http.response.body', 'body': body})
+
+
+application = BoundedWSGIAdapter(
+    app,
+    max_workers=int(os.environ.get('ASGI_WORKER_THREADS', 8)),
+    max_queued=int(os.environ.get('ASGI_MAX_QUEUED', 1000)),
+    max_body=app.config['MAX_CONTENT_LENGTH']
+)
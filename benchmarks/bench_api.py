@@ -0,0 +1,236 @@
+"""API hot paths against a seeded temporary SQLite database, with JSON baselines.
+
+Drives the chat, voice, conversation-analysis and session endpoints through
+the Flask test client with a multilingual corpus (benchmarks/sentiment_samples.json
+plus conversational filler) and several conversation-history lengths. Every
+scenario starts from an empty sentiment cache and a fixed random seed, so runs
+are comparable. Reports throughput and p50/p95/p99 latency per scenario, each
+the median over --repeat runs to damp scheduler noise.
+
+    python benchmarks/bench_api.py                      # run, compare with the baseline if there is one
+    python benchmarks/bench_api.py --save-baseline      # run and store the results as the new baseline
+    python benchmarks/bench_api.py --only chat_analyze --requests 500 --fail-on-regression
+
+A scenario regresses when its p50 or p95 is more than --tolerance (default 25%)
+above the baseline. Baselines are machine-specific; regenerate them on the
+machine that runs the comparison.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE = os.path.join(ROOT, 'benchmarks', 'baselines', 'api.json')
+
+# The app reads these at import time
+WORKDIR = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(WORKDIR, 'bench_api.db')
+os.environ['CATALOG_FILE'] = os.path.join(WORKDIR, 'catalog.bin')  # seeding compiles it; keep the project's own
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+os.chdir(ROOT)  # seed_data loads the asana JSON files relative to the project root
+sys.path.insert(0, ROOT)
+
+import app as yoga_app  # noqa: E402
+from seed_data import seed_database  # noqa: E402
+from sentiment import backend, sentiment_cache  # noqa: E402
+
+FILLER = [
+    'today', 'at work', 'with my family', 'after the meeting', 'this morning', 'since yesterday',
+    'office lo', 'intlo', 'veetla', 'office la', 'ghar pe', 'aaj'
+]
+GREETINGS = ['hi', 'hello', 'Hi, em chestunav?', 'epdi iruka?', 'kaise ho?', 'how are you?']
+HISTORY_LENGTHS = (4, 20, 60)
+
+
+def load_corpus():
+    with open(os.path.join(ROOT, 'benchmarks', 'sentiment_samples.json'), encoding='utf-8') as f:
+        return [sample['text'] for sample in json.load(f)]
+
+
+class Scenario:
+    """A named request generator; make_request(rng, i) returns (method, path, json body, expected status)"""
+
+    def __init__(self, name, make_request, setup=None):
+        self.name = name
+        self.make_request = make_request
+        self.setup = setup
+
+
+def build_scenarios(client, corpus):
+    def message(rng, i):
+        if rng.random() < 0.15:
+            return rng.choice(GREETINGS)
+        # Mostly unique texts so sentiment scoring is exercised, like real traffic
+        return f"{rng.choice(corpus)} {rng.choice(FILLER)} {i}"
+
+    def chat(rng, i):
+        body = {'message': message(rng, i), 'conversation_id': f'bench-chat-{i % 50}'}
+        return 'POST', '/api/chat-analyze', body, 200
+
+    def voice(rng, i):
+        body = {'message': message(rng, i), 'conversation_id': f'bench-voice-{i % 50}'}
+        return 'POST', '/api/voice-chat', body, 200
+
+    def history(length):
+        def make(rng, i):
+            turns = []
+            for turn in range(length):
+                turns.append({'sender': 'user', 'content': message(rng, i * length + turn)})
+                turns.append({'sender': 'bot', 'content': 'Tell me more about what is going on.'})
+            return 'POST', '/api/analyze-conversation', {'conversation_history': turns}, 200
+        return make
+
+    def stored_conversation(rng, i):
+        return 'POST', '/api/analyze-conversation', {'conversation_id': f'bench-stored-{i % 50}'}, 200
+
+    def fill_conversations():
+        rng = random.Random(0)
+        for i in range(50 * 6):
+            client.post('/api/chat-analyze', json={'message': message(rng, i), 'conversation_id': f'bench-stored-{i % 50}'})
+
+    def start(rng, i):
+        emotion = rng.choice(['stressed', 'anxious', 'sad', 'angry', 'tired', 'happy', 'neutral'])
+        return 'POST', '/api/session/start', {'emotion': emotion, 'intensity': rng.randint(1, 5)}, 201
+
+    session_ids = []
+
+    def create_sessions():
+        for i in range(20):
+            response = client.post('/api/session/start', json={'emotion': 'stressed', 'intensity': 1 + i % 5})
+            session_ids.append(response.get_json()['session_id'])
+
+    def update(rng, i):
+        return 'POST', f'/api/session/{rng.choice(session_ids)}/update', {'duration': 10 * (i + 1)}, 200
+
+    def complete(rng, i):
+        return 'POST', f'/api/session/{rng.choice(session_ids)}/complete', {'duration': 600}, 200
+
+    return [
+        Scenario('chat_analyze', chat),
+        Scenario('voice_chat', voice),
+        Scenario('analyze_conversation_by_id', stored_conversation, setup=fill_conversations),
+        *[Scenario(f'analyze_conversation_history_{length}', history(length)) for length in HISTORY_LENGTHS],
+        Scenario('session_start', start),
+        Scenario('session_update', update, setup=create_sessions),
+        Scenario('session_complete', complete, setup=create_sessions),
+    ]
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def run_scenario(client, scenario, requests, warmup, seed):
+    if scenario.setup:
+        scenario.setup()
+    sentiment_cache.clear()
+    rng = random.Random(seed)
+    prepared = [scenario.make_request(rng, i) for i in range(warmup + requests)]
+
+    latencies = []
+    started = time.perf_counter()
+    for i, (method, path, body, expected) in enumerate(prepared):
+        if i == warmup:
+            latencies.clear()
+            started = time.perf_counter()
+        start = time.perf_counter()
+        response = client.open(path, method=method, json=body)
+        latencies.append(time.perf_counter() - start)
+        if response.status_code != expected:
+            raise RuntimeError(f"{scenario.name}: {method} {path} returned {response.status_code}: "
+                               f"{response.get_data(as_text=True)[:200]}")
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': requests,
+        'requests_per_sec': round(requests / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3)
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Print the change against the baseline; returns the names of regressed scenarios"""
+    regressed = []
+    print(f"\nvs baseline from {baseline['meta'].get('recorded_at', '?')} (tolerance {tolerance:.0%})")
+    for name, current in results['scenarios'].items():
+        previous = baseline['scenarios'].get(name)
+        if not previous:
+            print(f"{name:<36} (not in baseline)")
+            continue
+        changes = {key: current[key] / previous[key] - 1 for key in ('p50_ms', 'p95_ms') if previous[key]}
+        worse = any(change > tolerance for change in changes.values())
+        if worse:
+            regressed.append(name)
+        print(f"{name:<36} p50 {changes.get('p50_ms', 0):+7.1%}   p95 {changes.get('p95_ms', 0):+7.1%}"
+              f"   {'REGRESSION' if worse else 'ok'}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--warmup', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--only', action='append', help='run just this scenario (repeatable)')
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--output', help='also write the results to this JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args()
+
+    with yoga_app.app.app_context():
+        seed_database()
+    yoga_app.init_app()
+    client = yoga_app.app.test_client()
+
+    results = {
+        'meta': {
+            'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'sentiment_backend': backend.name,
+            'requests': args.requests,
+            'repeat': args.repeat,
+            'seed': args.seed
+        },
+        'scenarios': {}
+    }
+    for scenario in build_scenarios(client, load_corpus()):
+        if args.only and scenario.name not in args.only:
+            continue
+        runs = [run_scenario(client, scenario, args.requests, args.warmup, args.seed) for _ in range(args.repeat)]
+        stats = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+        results['scenarios'][scenario.name] = stats
+        print(f"{scenario.name:<36} {stats['requests_per_sec']:8.1f} req/s   p50 {stats['p50_ms']:7.3f} ms   "
+              f"p95 {stats['p95_ms']:7.3f} ms   p99 {stats['p99_ms']:7.3f} ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    regressed = []
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+        print(f"\nbaseline saved to {os.path.relpath(args.baseline, ROOT)}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressed = compare(results, json.load(f), args.tolerance)
+    return 1 if regressed and args.fail_on_regression else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
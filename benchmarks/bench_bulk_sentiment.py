@@ -0,0 +1,76 @@
+"""Bulk re-analysis: scalar LexiconBackend per message vs the vectorized bulk_sentiment scorer.
+
+Scores a synthetic multilingual corpus both ways, checks that polarity,
+subjectivity and (emotion, intensity) agree for every message within the
+tolerance, and reports messages per second (--textblob adds the per-message
+TextBlob rate on a slice of the corpus for reference). Exits non-zero on any mismatch.
+
+Run from the project root:  python benchmarks/bench_bulk_sentiment.py [--messages 20000 --textblob]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app import polarity_to_emotion  # noqa: E402
+from bulk_sentiment import classify, score_corpus  # noqa: E402
+from sentiment import LexiconBackend, TextBlobBackend  # noqa: E402
+
+TOLERANCE = 1e-9
+FILLER = ['today', 'at', 'work', 'the', 'office', 'ga', 'unnanu', 'iruku', 'hoon', 'and', 'my', 'family']
+
+
+def corpus(size, seed=11):
+    with open(os.path.join(ROOT, 'benchmarks', 'sentiment_samples.json'), encoding='utf-8') as f:
+        samples = [sample['text'] for sample in json.load(f)]
+    rng = random.Random(seed)
+    return [rng.choice(samples) + ' ' + ' '.join(rng.choices(FILLER, k=rng.randint(0, 6))) for _ in range(size)]
+
+
+def main(size, textblob=False):
+    texts = corpus(size)
+    backend = LexiconBackend()
+
+    start = time.perf_counter()
+    scalar = [backend.score(text) for text in texts]
+    scalar_emotions = [polarity_to_emotion(polarity) for polarity, *_ in scalar]
+    scalar_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    polarity, subjectivity, _, _ = score_corpus(texts)
+    emotions, intensities = classify(polarity)
+    vector_seconds = time.perf_counter() - start
+
+    mismatches = 0
+    for i, (expected, expected_emotion) in enumerate(zip(scalar, scalar_emotions)):
+        if (abs(expected[0] - polarity[i]) > TOLERANCE or abs(expected[1] - subjectivity[i]) > TOLERANCE
+                or expected_emotion != (emotions[i], intensities[i])):
+            mismatches += 1
+            print(f"MISMATCH {texts[i]!r}: scalar={expected} {expected_emotion} "
+                  f"vectorized=({polarity[i]}, {subjectivity[i]}) ({emotions[i]}, {intensities[i]})")
+
+    print(f"{size} messages, {mismatches} mismatches")
+    print(f"scalar     : {size / scalar_seconds:10.0f} messages/s")
+    print(f"vectorized : {size / vector_seconds:10.0f} messages/s  ({scalar_seconds / vector_seconds:.1f}x)")
+    if textblob:
+        reference = TextBlobBackend()
+        reference.warm_up()
+        sample = texts[:2000]
+        start = time.perf_counter()
+        for text in sample:
+            reference.score(text)
+        print(f"textblob   : {len(sample) / (time.perf_counter() - start):10.0f} messages/s")
+    return mismatches
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=20000)
+    parser.add_argument('--textblob', action='store_true')
+    args = parser.parse_args()
+    sys.exit(1 if main(args.messages, args.textblob) else 0)
@@ -0,0 +1,77 @@
+"""Worker catalog load time: database rows vs the compiled catalog file.
+
+Seeds a temporary database and compiles the same definitions into a
+temporary catalog file, checks that both sources give identical payloads, and
+times Catalog.load() against Catalog.load_file() (mmap, checksum, decode,
+pre-serialize). Cold times come from a fresh process per source.
+
+Run from the project root:  python benchmarks/bench_catalog_load.py [--repeat 200]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKDIR = tempfile.mkdtemp()
+CATALOG_PATH = os.path.join(WORKDIR, 'catalog.bin')
+
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(WORKDIR, 'bench_catalog.db')
+os.environ['CATALOG_FILE'] = ''  # time each source explicitly
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+sys.path.insert(0, ROOT)
+
+import app as yoga_app  # noqa: E402
+from catalog import Catalog  # noqa: E402
+from catalog_file import compile_catalog  # noqa: E402
+from seed_data import seed_database  # noqa: E402
+
+COLD = '''
+import sys, time
+sys.path.insert(0, {root!r})
+import app
+from catalog import Catalog
+start = time.perf_counter()
+with app.app.app_context():
+    {load}
+print((time.perf_counter() - start) * 1000)
+'''
+
+
+def timed(load, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        load()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def cold(load):
+    result = subprocess.run([sys.executable, '-c', COLD.format(root=ROOT, load=load)], env=os.environ,
+                            capture_output=True, text=True, check=True)
+    return float(result.stdout.split()[-1])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    with yoga_app.app.app_context():
+        seed_database()
+        size = compile_catalog(CATALOG_PATH)
+        from_database, from_file = Catalog.load(), Catalog.load_file(CATALOG_PATH)
+        if from_database.version != from_file.version:
+            sys.exit('payloads differ between the database and the compiled file')
+
+        print(f"catalog file: {size} bytes, version {from_file.version}")
+        for label, load, cold_load in [
+            ('database', Catalog.load, 'Catalog.load()'),
+            ('compiled file', lambda: Catalog.load_file(CATALOG_PATH), f'Catalog.load_file({CATALOG_PATH!r})'),
+        ]:
+            print(f"{label:<14} warm {timed(load, args.repeat):7.3f} ms   cold (first load in a process) "
+                  f"{cold(cold_load):7.3f} ms")
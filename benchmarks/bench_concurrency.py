@@ -0,0 +1,196 @@
+"""Simultaneous conversations one process can hold: threaded dev server vs ASGI mode vs gunicorn.
+
+Starts the app as a real HTTP server in a subprocess (Flask's threaded
+development server, `uvicorn asgi:application` and `gunicorn -c
+gunicorn.conf.py`, the last two if installed) against a seeded temporary
+database, and opens N concurrent connections, each posting one unique chat or voice message. With --slow-send-ms every client
+waits between its headers and its body, like a phone on a poor network, which
+is what ties up a server thread per connection. Reports throughput,
+p50/p95/p99 latency, failures (errors, resets, timeouts) and the server's peak
+thread count and resident memory (summed over its worker processes).
+
+Run from the project root:  python benchmarks/bench_concurrency.py [--levels 10 100 500] [--slow-send-ms 200]
+Size gunicorn with e.g.  WEB_THREADS=8 python benchmarks/bench_concurrency.py --servers gunicorn
+(more than one worker needs CONVERSATION_STORE=redis, see gunicorn.conf.py)
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+THREADED_SERVER = '''
+import sys
+sys.path.insert(0, {root!r})
+import app
+app.init_app()
+app.app.run(host='127.0.0.1', port={port}, threaded=True, debug=False)
+'''
+
+SEED = '''
+import sys
+sys.path.insert(0, {root!r})
+import app, seed_data
+with app.app.app_context():
+    seed_data.seed_database()
+'''
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_until_listening(port, process, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with {process.returncode}")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('server did not start')
+
+
+class ProcessSampler(threading.Thread):
+    """Tracks the peak thread count and RSS of a process and its children from /proc (Linux only)"""
+
+    def __init__(self, pid):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.peak_threads = 0
+        self.peak_rss_mb = 0.0
+        self.running = True
+
+    def run(self):
+        while self.running:
+            try:
+                with open(f'/proc/{self.pid}/task/{self.pid}/children') as f:
+                    pids = [self.pid] + [int(child) for child in f.read().split()]
+            except OSError:
+                return
+            threads, rss_kb = 0, 0
+            for pid in pids:
+                try:
+                    with open(f'/proc/{pid}/status') as f:
+                        for line in f:
+                            if line.startswith('Threads:'):
+                                threads += int(line.split()[1])
+                            elif line.startswith('VmRSS:'):
+                                rss_kb += int(line.split()[1])
+                except OSError:
+                    continue  # a worker exited between the two reads
+            self.peak_threads = max(self.peak_threads, threads)
+            self.peak_rss_mb = max(self.peak_rss_mb, rss_kb / 1024)
+            time.sleep(0.05)
+
+
+async def converse(port, i, slow_send, timeout):
+    path = '/api/chat-analyze' if i % 2 else '/api/voice-chat'
+    body = json.dumps({'message': f'I am so stressed about work, deadline number {i}',
+                       'conversation_id': f'bench-concurrency-{i}'}).encode()
+    head = (f'POST {path} HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nContent-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\nConnection: close\r\n\r\n').encode()
+    start = time.perf_counter()
+    writer = None
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout)
+        writer.write(head)
+        await writer.drain()
+        if slow_send:
+            await asyncio.sleep(slow_send)
+        writer.write(body)
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        await asyncio.wait_for(reader.read(), timeout)
+        ok = status_line.split(b' ')[1:2] == [b'200']
+    except (OSError, asyncio.TimeoutError, IndexError):
+        ok = False
+    finally:
+        if writer is not None:
+            writer.close()
+    return ok, time.perf_counter() - start
+
+
+async def run_level(port, clients, slow_send, timeout):
+    started = time.perf_counter()
+    results = await asyncio.gather(*(converse(port, i, slow_send, timeout) for i in range(clients)))
+    elapsed = time.perf_counter() - started
+    latencies = sorted(latency for ok, latency in results if ok)
+    failures = sum(1 for ok, _ in results if not ok)
+    return elapsed, latencies, failures
+
+
+def percentile_ms(sorted_values, q):
+    if not sorted_values:
+        return float('nan')
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))] * 1000
+
+
+def bench_server(label, command, port, env, args):
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_listening(port, process)
+        asyncio.run(run_level(port, 5, 0, args.timeout))  # warm up imports and caches
+        for clients in args.levels:
+            sampler = ProcessSampler(process.pid)
+            sampler.start()
+            elapsed, latencies, failures = asyncio.run(run_level(port, clients, args.slow_send_ms / 1000, args.timeout))
+            sampler.running = False
+            sampler.join()
+            print(f"{label:<10} {clients:6d} clients   {len(latencies) / elapsed:7.1f} req/s   "
+                  f"p50 {percentile_ms(latencies, 0.50):8.1f} ms   p95 {percentile_ms(latencies, 0.95):8.1f} ms   "
+                  f"p99 {percentile_ms(latencies, 0.99):8.1f} ms   {failures:5d} failed   "
+                  f"{sampler.peak_threads:5d} threads   {sampler.peak_rss_mb:6.1f} MB")
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--levels', type=int, nargs='+', default=[10, 100, 500, 1000])
+    parser.add_argument('--slow-send-ms', type=float, default=200,
+                        help='delay between request headers and body (0 for fast clients)')
+    parser.add_argument('--timeout', type=float, default=30, help='per-request client timeout in seconds')
+    parser.add_argument('--servers', nargs='+', choices=['threaded', 'asgi', 'gunicorn'],
+                        default=['threaded', 'asgi', 'gunicorn'])
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    env = dict(os.environ, DATABASE_URL='sqlite:///' + os.path.join(workdir, 'bench_concurrency.db'),
+               CATALOG_FILE=os.path.join(workdir, 'catalog.bin'))
+    env.setdefault('LOG_LEVEL', 'WARNING')
+    subprocess.run([sys.executable, '-c', SEED.format(root=ROOT)], cwd=ROOT, env=env,
+                   stdout=subprocess.DEVNULL, check=True)
+
+    commands = {
+        'threaded': lambda port: [sys.executable, '-c', THREADED_SERVER.format(root=ROOT, port=port)],
+        'asgi': lambda port: [sys.executable, '-m', 'uvicorn', 'asgi:application', '--port', str(port),
+                              '--log-level', 'warning', '--backlog', '4096'],
+        'gunicorn': lambda port: [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                                  '--bind', f'127.0.0.1:{port}', '--backlog', '4096', '--log-level', 'warning'],
+    }
+    modules = {'asgi': 'uvicorn', 'gunicorn': 'gunicorn'}
+    for server in args.servers:
+        if server in modules and importlib.util.find_spec(modules[server]) is None:
+            print(f"{server:<10} skipped (pip install {modules[server]})")
+            continue
+        port = free_port()
+        bench_server(server, commands[server](port), port, env, args)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""/api/analyze-conversation: full recompute over the joined transcript vs the running aggregate.
+
+For growing conversations it checks that both give the same (emotion, intensity,
+language) after every turn, and times the cost of one analysis per turn.
+Messages are cut at random word boundaries, so negations, intensifiers and
+phrases often straddle two messages. Exits non-zero on any disagreement.
+
+Run from the project root:  python benchmarks/bench_conversation.py [--turns 120]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import aggregate_emotion, analyze_emotion_and_language, fold_message  # noqa: E402
+from conversation_store import new_state  # noqa: E402
+from sentiment import sentiment_cache  # noqa: E402
+
+CORPUS = [
+    'I am really stressed about work today',
+    'my manager keeps adding deadlines and I feel terrible',
+    'Nenu chala badhaga unnanu, intlo problem undi',
+    'office la romba tension, nothing is going right',
+    'aaj bahut kaam tha aur main thak gaya',
+    'I went for a walk with friends and it was lovely',
+    'the weather is nice but I am still worried',
+    'everything feels overwhelming and I cannot sleep',
+    'santhosham ga undi today, family tho time spend chesanu',
+    'I had a great lunch, best pasta ever',
+    'honestly I am angry at myself for missing the exam',
+    'it is fine I guess, just a normal day',
+    'I am not happy at all',
+    'work was very bad but the evening was really good',
+    'main theek nahi hoon',
+]
+GREETINGS = ['hello', 'Hi, em chestunav?', 'kaise ho']
+
+
+def conversations(turns, count, seed=7):
+    rng = random.Random(seed)
+    for index in range(count):
+        pool = CORPUS + (GREETINGS if index % 3 == 0 else [])
+        words = []
+        while len(words) < turns * 8:
+            words += rng.choice(pool).split()
+        cuts = sorted(rng.sample(range(1, len(words)), turns - 1))
+        yield [' '.join(words[start:end]) for start, end in zip([0] + cuts, cuts + [len(words)])]
+
+
+def main(turns, count):
+    mismatches = 0
+    full_seconds = incremental_seconds = 0.0
+    for messages in conversations(turns, count):
+        aggregate = new_state()['analysis']
+        for turn in range(1, len(messages) + 1):
+            start = time.perf_counter()
+            expected = analyze_emotion_and_language(' '.join(messages[:turn]))
+            full_seconds += time.perf_counter() - start
+
+            start = time.perf_counter()
+            fold_message(aggregate, messages[turn - 1])
+            actual = aggregate_emotion(aggregate)
+            incremental_seconds += time.perf_counter() - start
+
+            if actual != expected:
+                mismatches += 1
+                print(f"MISMATCH at turn {turn}: full={expected} incremental={actual}")
+    analyses = turns * count
+    print(f"{analyses} analyses ({count} conversations x {turns} turns), {mismatches} mismatches")
+    print(f"full recompute : {full_seconds / analyses * 1000:8.3f} ms/analysis")
+    print(f"incremental    : {incremental_seconds / analyses * 1000:8.3f} ms/analysis")
+    print(f"sentiment cache: {sentiment_cache.stats()}")
+    return mismatches
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--turns', type=int, default=120)
+    parser.add_argument('--conversations', type=int, default=6)
+    args = parser.parse_args()
+    sys.exit(1 if main(args.turns, args.conversations) else 0)
@@ -0,0 +1,75 @@
+"""Per-message keyword matching: legacy substring scans vs the compiled lexicon.
+
+Run from the project root:  python benchmarks/bench_lexicon.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexicon import scan, _scan_lower  # noqa: E402
+
+MESSAGES = [
+    'Hi, em chestunav?',
+    'I am really stressed about work today, my manager keeps adding deadlines',
+    'Nenu chala badhaga unnanu, intlo problem undi',
+    'epdi iruka? office la romba tension',
+    'kaise ho? aaj bahut kaam tha aur main thak gaya',
+    'I went for a walk with friends and listened to music, feeling good',
+    'what should I do when everything feels overwhelming?',
+    'santhosham ga undi today, family tho time spend chesanu',
+]
+
+
+def legacy_scan(text):
+    """The per-call keyword checks app.py ran before the lexicon (without the prints)"""
+    text_lower = text.lower().strip()
+    # detect_language
+    for phrases in (['em chestunav', 'enti chestunav'], ['epdi iruka', 'enna panra'], ['kaise ho', 'kya kar rahe ho']):
+        any(p in text_lower for p in phrases)
+    for words in (['nenu', 'nuvvu', 'unnav', 'chestunav', 'ela', 'emi', 'enti', 'bagundi', 'ledhu'],
+                  ['naan', 'nee', 'iruku', 'epdi', 'enna', 'panra', 'sollu', 'illa', 'aama'],
+                  ['main', 'tum', 'kaise', 'kya', 'kar', 'rahe', 'ho', 'hai', 'achha', 'nahi']):
+        sum(1 for w in words if w in text_lower)
+    # analyze_emotion_and_language greeting override
+    greeting_patterns = {
+        'telugu': ['em chestunav', 'enti chestunav', 'ela unnav', 'namaste'],
+        'tamil': ['epdi iruka', 'enna panra', 'vanakkam'],
+        'hindi': ['kaise ho', 'kya kar rahe ho', 'namaste'],
+        'english': ['how are you', 'what are you doing', 'hello', 'hi']
+    }
+    for patterns in greeting_patterns.values():
+        any(p in text_lower for p in patterns)
+    # is_greeting
+    any(w in text_lower for w in ['hi', 'hello', 'hey', 'namaste', 'vannakkam', 'em chestunav', 'ela unnav', 'epdi iruka', 'kaise ho'])
+    any(w in text_lower for w in ['tension', 'stress', 'sad', 'happy', 'tired', 'worried', 'badhaga', 'santhosham', 'kopam', 'angry'])
+    # generate_conversational_response
+    any(w in text_lower for w in ['music', 'songs', 'walk', 'friends', 'family', 'padatam', 'vindam'])
+    any(w in text_lower for w in ['what', 'how', 'why', 'when', 'emi', 'ela', 'enna', 'kya'])
+    any(w in text_lower for w in ['em chestunav', 'what are you doing', 'epdi iruka', 'kaise ho'])
+    any(w in text_lower for w in ['tension', 'stress', 'sad', 'happy', 'tired', 'worried', 'badhaga', 'santhosham'])
+    # ContextualConversationEngine.analyze_context
+    for words in (['emi', 'enna', 'kya', 'what', 'how', 'why'],
+                  ['nenu', 'naan', 'main', 'i am', 'i was', 'i did'],
+                  ['problem', 'issue', 'tension', 'stress', 'worry', 'kashtam', 'pareshaani'],
+                  ['good', 'happy', 'bagundi', 'nallairuku', 'achha', 'great'],
+                  ['work', 'job', 'office', 'vellu', 'pani', 'kaam'],
+                  ['family', 'parents', 'intlo', 'veetla', 'ghar'],
+                  ['today', 'evala', 'inniki', 'aaj', 'yesterday', 'tomorrow']):
+        any(w in text_lower for w in words)
+
+
+def uncached_scan(text):
+    return _scan_lower.__wrapped__(text.lower().strip())
+
+
+def bench(func, number=2000):
+    seconds = timeit.timeit(lambda: [func(m) for m in MESSAGES], number=number)
+    return seconds / (number * len(MESSAGES)) * 1e6
+
+
+if __name__ == '__main__':
+    print(f"legacy substring scans : {bench(legacy_scan):7.2f} us/message")
+    print(f"lexicon (uncached)     : {bench(uncached_scan):7.2f} us/message")
+    print(f"lexicon (memoized)     : {bench(scan):7.2f} us/message")
@@ -0,0 +1,57 @@
+"""Request latency with logging off vs DEBUG events (queued, synchronous, sampled).
+
+Each configuration runs in a fresh process (logging is configured at import)
+against a temporary database, posting unique messages to /api/chat-analyze and
+/api/voice-chat through the Flask test client. Log output goes to a pipe that
+this process drains, like a container log collector.
+
+Run from the project root:  python benchmarks/bench_logging.py [--requests 400]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONFIGS = [
+    ('off (WARNING)', {'LOG_LEVEL': 'WARNING'}),
+    ('debug, queued', {'LOG_LEVEL': 'DEBUG'}),
+    ('debug, synchronous', {'LOG_LEVEL': 'DEBUG', 'LOG_ASYNC': '0'}),
+    ('debug, 10% of requests', {'LOG_LEVEL': 'DEBUG', 'LOG_DEBUG_SAMPLE_RATE': '0.1'}),
+]
+
+CHILD = '''
+import json, sys, time
+sys.path.insert(0, {root!r})
+import app
+client = app.app.test_client()
+latencies = []
+for i in range({requests}):
+    path = '/api/chat-analyze' if i % 2 else '/api/voice-chat'
+    start = time.perf_counter()
+    client.post(path, json={{'message': f'I am really stressed about work today, deadline {{i}}'}})
+    latencies.append(time.perf_counter() - start)
+latencies.sort()
+sys.stderr.write(json.dumps([latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.95)]]))
+'''
+
+
+def run(settings, requests):
+    env = dict(os.environ, DATABASE_URL='sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db'), **settings)
+    result = subprocess.run([sys.executable, '-c', CHILD.format(root=ROOT, requests=requests)],
+                            env=env, capture_output=True, text=True, check=True)
+    p50, p95 = json.loads(result.stderr.strip().splitlines()[-1])
+    return p50 * 1000, p95 * 1000, result.stdout.count('\n')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=400)
+    args = parser.parse_args()
+
+    for label, settings in CONFIGS:
+        p50, p95, lines = run(settings, args.requests)
+        print(f"{label:<24} p50 {p50:6.3f} ms   p95 {p95:6.3f} ms   {lines:6d} log lines")
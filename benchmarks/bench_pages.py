@@ -0,0 +1,80 @@
+"""Page routes and a crawler-style 404 flood, rendered per request vs served from the page cache.
+
+Each configuration (PAGE_CACHE=0 / 1) runs in a fresh process through the
+Flask test client. The flood requests the paths vulnerability scanners and
+crawlers probe (/wp-login.php, /.env, ...), half of them with
+Accept-Encoding: gzip. The page mix requests the four page routes, and the
+revalidation run repeats it with the ETag from a previous response. Reports
+throughput, latency and the average body size sent.
+
+Run from the project root:  python benchmarks/bench_pages.py [--requests 3000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONFIGS = [
+    ('rendered per request', {'PAGE_CACHE': '0'}),
+    ('page cache', {'PAGE_CACHE': '1'}),
+]
+
+CHILD = '''
+import json, random, sys, time
+sys.path.insert(0, {root!r})
+import app
+client = app.app.test_client()
+rng = random.Random(7)
+probes = ['/wp-login.php', '/.env', '/admin/', '/phpmyadmin/index.php', '/xmlrpc.php', '/.git/config',
+          '/wp-content/plugins/x/readme.txt', '/cgi-bin/test.cgi', '/vendor/phpunit/eval-stdin.php', '/robots.txt']
+pages = ['/', '/chat', '/voice-chat', '/guided-flow']
+etags = {{page: client.get(page).headers.get('ETag') for page in pages}}
+
+def run(make_request, expected):
+    for i in range(50):
+        make_request(i)
+    latencies = []
+    sent = 0
+    started = time.perf_counter()
+    for i in range({requests}):
+        start = time.perf_counter()
+        response = make_request(i)
+        latencies.append(time.perf_counter() - start)
+        sent += len(response.data)
+        assert response.status_code in expected, response.status_code
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return [{requests} / elapsed, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.95)], sent / {requests}]
+
+results = {{
+    '404 flood': run(lambda i: client.get(rng.choice(probes) + f'?r={{i}}',
+                                          headers={{'Accept-Encoding': 'gzip'}} if i % 2 else {{}}), (404,)),
+    'pages': run(lambda i: client.get(pages[i % 4], headers={{'Accept-Encoding': 'gzip'}}), (200,)),
+    'pages, revalidated': run(lambda i: client.get(pages[i % 4], headers={{'If-None-Match': etags[pages[i % 4]] or '',
+                                                                         'Accept-Encoding': 'gzip'}}), (200, 304)),
+}}
+sys.stderr.write(json.dumps(results))
+'''
+
+
+def run(settings, requests):
+    env = dict(os.environ, DATABASE_URL='sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db'),
+               LOG_LEVEL='WARNING', **settings)
+    result = subprocess.run([sys.executable, '-c', CHILD.format(root=ROOT, requests=requests)],
+                            env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stderr.strip().splitlines()[-1])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=3000)
+    args = parser.parse_args()
+
+    for label, settings in CONFIGS:
+        for scenario, (per_sec, p50, p95, size) in run(settings, args.requests).items():
+            print(f"{label:<22} {scenario:<20} {per_sec:8.1f} req/s   p50 {p50 * 1000:6.3f} ms   "
+                  f"p95 {p95 * 1000:6.3f} ms   {size:8.0f} bytes/response")
@@ -0,0 +1,371 @@
+"""Response selection: per-call dict literals (legacy) vs the precompiled response registry.
+
+Checks that both pick the same reply for every message/language/emotion/context
+combination, then reports time and peak allocated bytes per call. Exits
+non-zero on any difference.
+
+Run from the project root:  python benchmarks/bench_responses.py
+"""
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import ContextualConversationEngine, chat_response, generate_dynamic_questions  # noqa: E402
+from lexicon import scan  # noqa: E402
+
+MESSAGES = [
+    'Hi, em chestunav?',
+    'hello, I am so much tension today',
+    'I am really stressed about work today, my manager keeps adding deadlines',
+    'Nenu chala badhaga unnanu, intlo problem undi',
+    'epdi iruka? office la romba tension',
+    'kaise ho? aaj bahut kaam tha',
+    'ela unnav',
+    'how are you',
+    'I went for a walk with friends and listened to music',
+    'what should I do now?',
+    'my family is visiting tomorrow',
+    'just a normal day',
+]
+LANGUAGES = ['english', 'telugu', 'tamil', 'hindi', 'french']
+EMOTIONS = ['happy', 'stressed', 'neutral']
+CHAT_CONTEXTS = ['general_chat', 'coping_response', 'simple_greeting', 'happy_response', 'supportive_response']
+
+
+def legacy_chat_response(hits, context, language, emotion):
+    """generate_conversational_response's inner get_response before the registry"""
+    # Check if message has both greeting AND emotion content
+    has_greeting = 'chat_greeting' in hits.groups
+    has_emotion_content = 'chat_emotion' in hits.groups
+
+    # If message has both greeting and emotional content, prioritize emotion
+    if has_greeting and has_emotion_content:
+        if emotion == 'stressed' or 'tension' in hits.phrases:
+            responses = {
+                'english': "I can hear you're feeling stressed. What's been going on?",
+                'telugu': "Nuvvu tension lo unnav anipistundi. Emi jarigindi cheppu?",
+                'tamil': "Nee tension ah irukura madhiri theriyudhu. Enna nadandhuchu?",
+                'hindi': "Lagta hai tum tension mein ho. Kya hua hai?"
+            }
+            return responses.get(language, responses['english'])
+
+    # Pure greeting without emotional content
+    elif has_greeting and not has_emotion_content:
+        responses = {
+            'english': "Just here to chat and help! What's up with you?",
+            'telugu': "Ikkada unna nuvvu tho matladataniki! Nuvvu enti chestunnav?",
+            'tamil': "Inga irken unna kooda pesa! Nee enna panra?",
+            'hindi': "Yahan hun tumse baat karne! Tum kya kar rahe ho?"
+        }
+        return responses.get(language, responses['english'])
+
+    responses = {
+        'simple_greeting': {
+            'english': "Hey! How's it going?",
+            'telugu': "Enti ra! Ela unnav?",
+            'tamil': "Vanakkam! Epdi iruka?",
+            'hindi': "Namaste! Kaise ho?"
+        },
+        'supportive_response': {
+            'english': f"I can sense you're feeling {emotion}. Want to talk about it?",
+            'telugu': f"Nuvvu {emotion} ga unnav anipistundi. Matladamantava?",
+            'tamil': f"Nee {emotion} ah irukura madhiri theriyudhu. Pesalama?",
+            'hindi': f"Lagta hai tum {emotion} feel kar rahe ho. Baat karna hai?"
+        },
+        'happy_response': {
+            'english': "That's awesome! You sound really happy!",
+            'telugu': "Waah! Chala happy ga unnav!",
+            'tamil': "Super! Romba happy ah iruka!",
+            'hindi': "Bahut achha! Tum bahut khush lag rahe ho!"
+        },
+        'coping_response': {
+            'english': "That's great! Those things really help.",
+            'telugu': "Adi bagundi! Vaati valla help avtundi.",
+            'tamil': "Adhu nalladu! Avai romba help aagum.",
+            'hindi': "Yeh achhi baat hai! Yeh cheezein help karti hain."
+        },
+        'general_chat': {
+            'english': "Tell me more about what's going on.",
+            'telugu': "Inka cheppu emi jarigindi.",
+            'tamil': "Inka enna nadakudhu sollu.",
+            'hindi': "Aur batao kya chal raha hai."
+        }
+    }
+    return responses.get(context, responses['general_chat']).get(language, responses[context]['english'])
+
+
+def legacy_dynamic_questions(message, emotion, language):
+    # Context-specific responses
+    if 'chat_greeting' in scan(message).groups:
+        questions = {
+            'english': ["Just here chatting with you!", "What about you? How's your day?"],
+            'telugu': ["Nuvvu tho matladutunna!", "Nuvvu ela unnav? Day ela undi?"],
+            'tamil': ["Unna kooda pesitu irken!", "Nee epdi iruka? Day epdi pochu?"],
+            'hindi': ["Tumse baat kar raha hun!", "Tum kaise ho? Din kaisa gaya?"]
+        }
+    elif emotion == 'happy':
+        questions = {
+            'english': ["That's great to hear!", "What made your day so good?"],
+            'telugu': ["Adi vinataniki bagundi!", "Enti jarigindi antha bagundi?"],
+            'tamil': ["Adhu kekka nallairuku!", "Enna nadandhuchu ivlo nallairuku?"],
+            'hindi': ["Yeh sunke achha laga!", "Kya hua itna achha?"]
+        }
+    else:
+        questions = {
+            'english': ["Want to talk about it?", "How are you feeling?"],
+            'telugu': ["Matladamantava?", "Ela feel avutunnav?"],
+            'tamil': ["Pesanum ah?", "Epdi feel panra?"],
+            'hindi': ["Baat karna hai?", "Kaise feel kar rahe ho?"]
+        }
+    
+    return questions.get(language, questions['english'])
+
+
+class LegacyResponder:
+    """ContextualConversationEngine's per-language responders before the registry"""
+
+    def _get_contextual_response(self, message, context, emotion, language):
+        """Generate specific contextual responses"""
+        phrases = scan(message).phrases
+        
+        # Language-specific contextual responses
+        responders = {
+            'telugu': self._get_telugu_response,
+            'tamil': self._get_tamil_response,
+            'hindi': self._get_hindi_response,
+            'english': self._get_english_response
+        }
+        
+        return responders.get(language, self._get_english_response)(phrases, context, emotion)
+    
+    def _get_telugu_response(self, phrases, context, emotion):
+        # Greeting responses
+        if 'em chestunav' in phrases or 'enti chestunav' in phrases:
+            return "Nuvvu tho matladutunna! Nuvvu ela unnav? Emi interesting jarigindi?"
+        
+        if 'ela unnav' in phrases:
+            return "Nenu bagunnanu! Nuvvu ela unnav? Day ela undi?"
+        
+        # Work-related responses
+        if context['is_work_related']:
+            if context['is_problem']:
+                return "Office lo problem aa? Emi jarigindi cheppu?"
+            else:
+                return "Work ela undi? Busy ga unnava?"
+        
+        # Family-related responses
+        if context['is_family_related']:
+            return "Intlo andaru bagunnara? Emi updates?"
+        
+        # Problem/stress responses
+        if context['is_problem'] or emotion == 'stressed':
+            return "Emi problem? Naku cheppu, solution dorukkuntundi"
+        
+        # Positive responses
+        if context['is_positive'] or emotion == 'happy':
+            return "Waah! Chala bagundi! Emi special jarigindi?"
+        
+        # Question responses
+        if context['is_question']:
+            return "Hmm, adi interesting question. Nee opinion emi?"
+        
+        # Sharing responses
+        if context['is_sharing']:
+            return "Avunu, inka cheppu. Naku interesting ga undi"
+        
+        # Default contextual responses
+        defaults = [
+            "Hmm, artham aindi. Inka emi?",
+            "Avunu, continue cheyyi",
+            "Interesting! Inka details cheppu",
+            "Okay, inka emi jarigindi?"
+        ]
+        return random.choice(defaults)
+    
+    def _get_tamil_response(self, phrases, context, emotion):
+        # Greeting responses
+        if 'epdi iruka' in phrases:
+            return "Naan nalla irken! Nee epdi iruka? Enna interesting nadandhuchu?"
+        
+        # Work-related responses
+        if context['is_work_related']:
+            if context['is_problem']:
+                return "Office la problem aa? Enna achu sollu?"
+            else:
+                return "Work epdi pochu? Busy ah iruka?"
+        
+        # Family-related responses
+        if context['is_family_related']:
+            return "Veetla ellam nalla irukanga? Enna updates?"
+        
+        # Problem/stress responses
+        if context['is_problem'] or emotion == 'stressed':
+            return "Enna problem? Enaku sollu, solution kedaikum"
+        
+        # Positive responses
+        if context['is_positive'] or emotion == 'happy':
+            return "Wow! Romba nallairuku! Enna special nadandhuchu?"
+        
+        # Question responses
+        if context['is_question']:
+            return "Hmm, adhu interesting question. Unna opinion enna?"
+        
+        # Sharing responses
+        if context['is_sharing']:
+            return "Aama, inka sollu. Enaku interesting ah iruku"
+        
+        # Default contextual responses
+        defaults = [
+            "Hmm, purinjuchu. Inka enna?",
+            "Aama, continue pannu",
+            "Interesting! Inka details sollu",
+            "Okay, inka enna nadandhuchu?"
+        ]
+        return random.choice(defaults)
+    
+    def _get_hindi_response(self, phrases, context, emotion):
+        # Greeting responses
+        if 'kaise ho' in phrases:
+            return "Main theek hun! Tum kaise ho? Kya interesting hua?"
+        
+        # Work-related responses
+        if context['is_work_related']:
+            if context['is_problem']:
+                return "Office mein problem hai? Kya hua batao?"
+            else:
+                return "Kaam kaisa chal raha hai? Busy ho?"
+        
+        # Family-related responses
+        if context['is_family_related']:
+            return "Ghar mein sab theek hai? Kya updates hai?"
+        
+        # Problem/stress responses
+        if context['is_problem'] or emotion == 'stressed':
+            return "Kya problem hai? Mujhe batao, solution mil jayega"
+        
+        # Positive responses
+        if context['is_positive'] or emotion == 'happy':
+            return "Wow! Bahut achha! Kya special hua?"
+        
+        # Question responses
+        if context['is_question']:
+            return "Hmm, interesting question hai. Tumhara opinion kya hai?"
+        
+        # Sharing responses
+        if context['is_sharing']:
+            return "Haan, aur batao. Mujhe interesting lag raha hai"
+        
+        # Default contextual responses
+        defaults = [
+            "Hmm, samajh gaya. Aur kya?",
+            "Haan, continue karo",
+            "Interesting! Aur details batao",
+            "Okay, aur kya hua?"
+        ]
+        return random.choice(defaults)
+    
+    def _get_english_response(self, phrases, context, emotion):
+        # Greeting responses
+        if 'how are you' in phrases:
+            return "I'm good! How are you? What's been happening?"
+        
+        # Work-related responses
+        if context['is_work_related']:
+            if context['is_problem']:
+                return "Work troubles? What's going on?"
+            else:
+                return "How's work going? Keeping busy?"
+        
+        # Family-related responses
+        if context['is_family_related']:
+            return "How's the family? Any updates?"
+        
+        # Problem/stress responses
+        if context['is_problem'] or emotion == 'stressed':
+            return "What's the problem? Tell me, we can figure it out"
+        
+        # Positive responses
+        if context['is_positive'] or emotion == 'happy':
+            return "That's awesome! What's the good news?"
+        
+        # Question responses
+        if context['is_question']:
+            return "Hmm, interesting question. What do you think?"
+        
+        # Sharing responses
+        if context['is_sharing']:
+            return "Yeah, tell me more. Sounds interesting"
+        
+        # Default contextual responses
+        defaults = [
+            "I see, what else?",
+            "Right, go on",
+            "Interesting! Tell me more",
+            "Okay, what happened next?"
+        ]
+        return random.choice(defaults)
+
+
+def cases():
+    engine = ContextualConversationEngine()
+    for message in MESSAGES:
+        hits = scan(message)
+        context = engine.analyze_context(message, None)
+        for language in LANGUAGES:
+            for emotion in EMOTIONS:
+                yield message, hits, context, language, emotion
+
+
+def check():
+    engine = ContextualConversationEngine()
+    legacy = LegacyResponder()
+    differences = 0
+    for message, hits, context, language, emotion in cases():
+        pairs = [(legacy_dynamic_questions(message, emotion, language),
+                  list(generate_dynamic_questions(message, emotion, language)))]
+        for chat_context in CHAT_CONTEXTS:
+            pairs.append((legacy_chat_response(hits, chat_context, language, emotion),
+                          chat_response(hits, chat_context, language, emotion)))
+        random.seed(1)
+        expected = legacy._get_contextual_response(message, context, emotion, language)
+        random.seed(1)
+        pairs.append((expected, engine._get_contextual_response(message, context, emotion, language)))
+        for expected, actual in pairs:
+            if expected != actual:
+                differences += 1
+                print(f"DIFFERENT for {message!r} {language} {emotion}: {expected!r} != {actual!r}")
+    return differences
+
+
+def measure(label, func, number=2000):
+    seconds = timeit.timeit(func, number=number)
+    tracemalloc.start()
+    func()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    peak -= before
+    print(f"{label:<34} {seconds / number * 1e6:8.2f} us/call   peak {peak:6d} bytes/call")
+
+
+if __name__ == '__main__':
+    differences = check()
+    print(f"{sum(1 for _ in cases())} combinations, {differences} differences")
+
+    engine = ContextualConversationEngine()
+    legacy = LegacyResponder()
+    hits = scan(MESSAGES[2])
+    context = engine.analyze_context(MESSAGES[2], 'english')
+    measure('chat reply (legacy)', lambda: legacy_chat_response(hits, 'supportive_response', 'telugu', 'stressed'))
+    measure('chat reply (registry)', lambda: chat_response(hits, 'supportive_response', 'telugu', 'stressed'))
+    measure('follow-up questions (legacy)', lambda: legacy_dynamic_questions(MESSAGES[2], 'stressed', 'tamil'))
+    measure('follow-up questions (registry)', lambda: generate_dynamic_questions(MESSAGES[2], 'stressed', 'tamil'))
+    measure('contextual reply (legacy)', lambda: legacy._get_contextual_response(MESSAGES[-1], context, 'neutral', 'hindi'))
+    measure('contextual reply (registry)', lambda: engine._get_contextual_response(MESSAGES[-1], context, 'neutral', 'hindi'))
+    sys.exit(1 if differences else 0)
@@ -0,0 +1,91 @@
+"""Sentiment backends compared on latency, on a labelled sample set, and on held-out chat messages.
+
+Accuracy is the share of samples in sentiment_samples.json whose emotion (after
+the same thresholds analyze_emotion_and_language applies) matches the label.
+That set was written alongside lexicon.SENTIMENT_WORDS, so the lexicon
+backend's accuracy on it is a regression check, not a measure of quality.
+Agreement, how often the two backends produce the same emotion, is reported on
+it and on held-out messages that predate the word lists: the example messages
+in the templates and the message lists of bench_lexicon / bench_conversation.
+
+Run from the project root:  python benchmarks/bench_sentiment_backends.py [--repeat 20]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import timeit
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app import polarity_to_emotion  # noqa: E402
+from sentiment import BACKENDS  # noqa: E402
+from bench_conversation import CORPUS  # noqa: E402
+from bench_lexicon import MESSAGES  # noqa: E402
+
+# Example user messages quoted in the page templates
+TEMPLATE_EXAMPLES = [
+    ('chat_interface.html', re.compile(r'<li>"([^"]+)"')),
+    ('text_analysis.html', re.compile(r"'([^']+?)\.\.\.'")),
+]
+
+
+def load_samples():
+    with open(os.path.join(ROOT, 'benchmarks', 'sentiment_samples.json'), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def held_out_messages():
+    messages = []
+    for template, pattern in TEMPLATE_EXAMPLES:
+        with open(os.path.join(ROOT, 'templates', template), encoding='utf-8') as f:
+            messages += pattern.findall(f.read())
+    return list(dict.fromkeys(messages + MESSAGES + CORPUS))
+
+
+def emotion(backend, text):
+    return polarity_to_emotion(backend.score(text)[0])[0]
+
+
+def report_agreement(label, texts, backends, show_differences=False):
+    (first, a), (second, b) = backends.items()
+    predictions = [(emotion(a, text), emotion(b, text)) for text in texts]
+    agree = sum(x == y for x, y in predictions)
+    print(f"agreement {first} vs {second} on {label}: {agree}/{len(texts)} ({agree / len(texts):.0%})")
+    if show_differences:
+        for text, (x, y) in zip(texts, predictions):
+            if x != y:
+                print(f"    {first} {x:<9} {second} {y:<9} {text!r}")
+
+
+def main(repeat):
+    samples = load_samples()
+    texts = [sample['text'] for sample in samples]
+    backends = {}
+    for name, backend_class in BACKENDS.items():
+        backend = backends[name] = backend_class()
+        backend.warm_up()
+        seconds = timeit.timeit(lambda: [backend.score(text) for text in texts], number=repeat)
+
+        correct = defaultdict(lambda: [0, 0])
+        for sample, text in zip(samples, texts):
+            stats = correct[sample['language']]
+            stats[0] += emotion(backend, text) == sample['label']
+            stats[1] += 1
+        total = sum(c for c, _ in correct.values()) / len(samples)
+        by_language = '  '.join(f"{lang} {c}/{n}" for lang, (c, n) in sorted(correct.items()))
+        print(f"{name:<9} {seconds / (repeat * len(texts)) * 1e6:9.1f} us/message   "
+              f"accuracy on the labelled set {total:6.1%}   ({by_language})")
+
+    report_agreement('the labelled set', texts, backends)
+    report_agreement('held-out chat messages', held_out_messages(), backends, show_differences=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    main(args.repeat)
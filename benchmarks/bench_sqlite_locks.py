@@ -0,0 +1,106 @@
+"""Concurrent session inserts against SQLite: stock settings vs the production profile.
+
+Several writer processes insert Session-shaped rows (one commit each, like
+start_session) while reader processes run history scans. Reports write
+throughput and write latency percentiles, which is where writer-lock stalls show.
+
+Run from the project root:  python benchmarks/bench_sqlite_locks.py [--writers 4 --readers 2 --inserts 300]
+"""
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import SQLITE_PROFILES, apply_sqlite_pragmas  # noqa: E402
+
+SCHEMA = '''CREATE TABLE session (
+    id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, emotion VARCHAR(50) NOT NULL,
+    intensity INTEGER NOT NULL, sequence_id INTEGER NOT NULL, completed BOOLEAN,
+    duration INTEGER, created_at DATETIME)'''
+
+
+def connect(path, profile):
+    conn = sqlite3.connect(path, timeout=30)
+    apply_sqlite_pragmas(conn, SQLITE_PROFILES[profile])
+    return conn
+
+
+def writer(path, profile, inserts, results):
+    conn = connect(path, profile)
+    latencies = []
+    locked = 0
+    for i in range(inserts):
+        start = time.perf_counter()
+        try:
+            conn.execute('INSERT INTO session (user_id, emotion, intensity, sequence_id, completed, created_at) '
+                         "VALUES (1, 'stressed', 3, 2, 0, datetime('now'))")
+            conn.commit()
+        except sqlite3.OperationalError:
+            conn.rollback()
+            locked += 1
+        latencies.append(time.perf_counter() - start)
+    results.put((latencies, locked))
+
+
+def reader(path, profile, stop):
+    conn = connect(path, profile)
+    while not stop.is_set():
+        conn.execute('BEGIN')
+        conn.execute('SELECT user_id, count(*), max(created_at) FROM session GROUP BY user_id').fetchall()
+        time.sleep(0.002)  # hold the read transaction briefly, like a slow request
+        conn.execute('COMMIT')
+
+
+def run(profile, writers, readers, inserts):
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    conn = connect(path, profile)
+    conn.execute(SCHEMA)
+    conn.commit()
+    conn.close()
+
+    results = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    reader_procs = [multiprocessing.Process(target=reader, args=(path, profile, stop)) for _ in range(readers)]
+    writer_procs = [multiprocessing.Process(target=writer, args=(path, profile, inserts, results)) for _ in range(writers)]
+    for proc in reader_procs:
+        proc.start()
+    start = time.perf_counter()
+    for proc in writer_procs:
+        proc.start()
+    collected = [results.get() for _ in writer_procs]
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for proc in writer_procs + reader_procs:
+        proc.join()
+
+    latencies = sorted(lat for lats, _ in collected for lat in lats)
+    pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000  # noqa: E731
+    return {
+        'profile': profile,
+        'writes_per_sec': len(latencies) / elapsed,
+        'p50_ms': pick(0.50),
+        'p95_ms': pick(0.95),
+        'p99_ms': pick(0.99),
+        'max_ms': latencies[-1] * 1000,
+        'stalled_ms_total': sum(max(0.0, lat * 1000 - pick(0.50)) for lat in latencies),
+        'locked_errors': sum(locked for _, locked in collected)
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=2)
+    parser.add_argument('--inserts', type=int, default=300)
+    args = parser.parse_args()
+
+    for profile in ('default', 'production'):
+        r = run(profile, args.writers, args.readers, args.inserts)
+        print(f"{r['profile']:<11} {r['writes_per_sec']:8.0f} writes/s  p50 {r['p50_ms']:6.2f} ms  "
+              f"p95 {r['p95_ms']:6.2f} ms  p99 {r['p99_ms']:7.2f} ms  max {r['max_ms']:7.2f} ms  "
+              f"lock wait {r['stalled_ms_total']:8.0f} ms  locked errors {r['locked_errors']}")
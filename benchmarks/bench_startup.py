@@ -0,0 +1,49 @@
+"""Cold-start cost of the app modules, measured with `python -X importtime`.
+
+Reports the wall time of each snippet, the cumulative import time of its entry
+module, and whether NLTK/TextBlob got imported. The warm_up() case shows what a
+worker pays when it opts in to loading the sentiment models at boot.
+
+Run from the project root:  python benchmarks/bench_startup.py [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = [
+    ('import app', 'app'),
+    ('import seed_data', 'seed_data'),
+    ('import sentiment; sentiment.warm_up()', 'sentiment'),
+]
+
+
+def measure(code, module):
+    probe = (f"import time; _start = time.perf_counter(); {code}; _wall = time.perf_counter() - _start; "
+             "import sys; print(_wall * 1000, 'nltk' in sys.modules, 'textblob' in sys.modules)")
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', probe],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            _, total, name = line.split('|')
+            if total.strip().isdigit():
+                cumulative[name.strip()] = int(total)
+    wall_ms, nltk_loaded, textblob_loaded = result.stdout.split()[-3:]
+    return float(wall_ms), cumulative.get(module, 0) / 1000, nltk_loaded == 'True', textblob_loaded == 'True'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    for code, module in CASES:
+        runs = [measure(code, module) for _ in range(args.repeat)]
+        wall = statistics.median(run[0] for run in runs)
+        entry = statistics.median(run[1] for run in runs)
+        print(f"{code:<40} wall {wall:7.1f} ms   {module} import {entry:7.1f} ms   "
+              f"nltk loaded: {runs[0][2]!s:<5}  textblob loaded: {runs[0][3]}")
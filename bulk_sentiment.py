@@ -0,0 +1,154 @@
+"""Vectorized lexicon sentiment for large batches (requires NumPy, an optional dependency).
+
+The corpus is tokenized once into a flat array of lexicon ids with a document
+id per token. Negation, post-negation and intensifier context is resolved with
+array shifts and running maxima instead of a per-token loop, each scored token
+becomes one entry (document, feature) of a sparse count matrix, and the matrix
+is multiplied by the feature weight vectors with np.bincount. The results are
+the same as LexiconBackend.score for every text.
+"""
+import re
+from itertools import repeat
+
+import numpy as np
+
+from lexicon import (
+    INTENSIFIERS, NEGATION_WINDOW, NEGATIONS, POST_NEGATIONS, SENTIMENT_FEATURES, SENTIMENT_WORDS,
+    TOKEN_PATTERN, FEATURE_POLARITY, FEATURE_SUBJECTIVITY
+)
+from sentiment import EMOTION_THRESHOLD
+
+EMOTIONS = np.array(['neutral', 'happy', 'stressed'])
+
+# Texts are joined with NUL and tokenized in one regex pass; NUL tokens mark document ends
+_SEPARATOR = '\x00'
+_CORPUS_TOKEN_RE = re.compile(TOKEN_PATTERN + '|' + _SEPARATOR)
+
+
+def _compile_vocabulary():
+    """Lexicon ids for every token the scorer looks at (0 = any other token) and per-id attributes"""
+    words = list(SENTIMENT_WORDS)
+    intensifiers = list(INTENSIFIERS)
+    vocabulary = {_SEPARATOR: -1}
+    for token in words + intensifiers + sorted(NEGATIONS) + sorted(POST_NEGATIONS):
+        vocabulary.setdefault(token, len(vocabulary))
+
+    size = len(vocabulary)
+    attributes = {
+        'sentiment': np.zeros(size, dtype=bool),
+        'intensifier': np.zeros(size, dtype=bool),
+        'negation': np.zeros(size, dtype=bool),
+        'post_negation': np.zeros(size, dtype=bool),
+        'word_index': np.zeros(size, dtype=np.intp),
+        'intensifier_index': np.zeros(size, dtype=np.intp),  # 0 = no intensifier
+    }
+    for token, token_id in vocabulary.items():
+        if token_id < 0:
+            continue
+        if token in SENTIMENT_WORDS:
+            attributes['sentiment'][token_id] = True
+            attributes['word_index'][token_id] = words.index(token)
+        if token in INTENSIFIERS:
+            attributes['intensifier'][token_id] = True
+            attributes['intensifier_index'][token_id] = intensifiers.index(token) + 1
+        attributes['negation'][token_id] = token in NEGATIONS
+        attributes['post_negation'][token_id] = token in POST_NEGATIONS
+
+    # (negated, intensifier index, word index) -> feature id
+    features = np.zeros((2, len(intensifiers) + 1, len(words)), dtype=np.intp)
+    for (negated, intensifier, word), feature_id in SENTIMENT_FEATURES.items():
+        intensifier_index = 0 if intensifier is None else intensifiers.index(intensifier) + 1
+        features[int(negated), intensifier_index, words.index(word)] = feature_id
+    return vocabulary, attributes, features
+
+
+_VOCABULARY, _ATTRIBUTES, _FEATURES = _compile_vocabulary()
+_POLARITY = np.array(FEATURE_POLARITY)
+_SUBJECTIVITY = np.array(FEATURE_SUBJECTIVITY)
+
+
+def _shift(values, offset, fill):
+    """values moved by offset positions (positive = look back), padding with fill"""
+    shifted = np.full_like(values, fill)
+    if offset > 0:
+        shifted[offset:] = values[:-offset]
+    else:
+        shifted[:offset] = values[-offset:]
+    return shifted
+
+
+def _last_position(mask, positions):
+    """For every position, the last earlier position where mask is set (-1 if none)"""
+    marked = np.where(mask, positions, -1)
+    return _shift(np.maximum.accumulate(marked), 1, -1)
+
+
+def corpus_features(texts):
+    """Return (document ids, feature ids) of every scored token in texts, i.e. the non-zero
+    entries of the document x feature count matrix"""
+    corpus = _SEPARATOR.join(texts).lower()
+    if corpus.count(_SEPARATOR) != max(len(texts) - 1, 0):
+        # NUL is not a token character, so blanking it inside a text does not change its tokens
+        corpus = _SEPARATOR.join(text.replace(_SEPARATOR, ' ') for text in texts).lower()
+    tokens = _CORPUS_TOKEN_RE.findall(corpus)
+    ids = np.fromiter(map(_VOCABULARY.get, tokens, repeat(0)), dtype=np.intp, count=len(tokens))
+    separators = ids < 0
+    documents = np.cumsum(separators)[~separators]
+    ids = ids[~separators]
+    lengths = np.bincount(documents, minlength=len(texts))
+    positions = np.arange(len(ids))
+
+    sentiment = _ATTRIBUTES['sentiment'][ids]
+    intensifier = _ATTRIBUTES['intensifier'][ids]
+    negation = _ATTRIBUTES['negation'][ids]
+    post_negation = _ATTRIBUTES['post_negation'][ids]
+
+    def same_document(offset):
+        return _shift(documents, offset, -1) == documents
+
+    # An intensifier directly before a sentiment word only modifies that word
+    skipped = intensifier & _shift(sentiment, -1, False) & same_document(-1)
+    scored = sentiment & ~skipped
+    counts_down = ~negation & ~skipped & ~scored  # tokens that use up the negation window
+
+    last_negation = _last_position(negation, positions)
+    last_scored = _last_position(scored, positions)
+    used = np.cumsum(counts_down) - counts_down  # window tokens strictly before each position
+    document_start = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    since_negation = used - used[np.maximum(last_negation, 0)]
+    negated = ((last_negation >= document_start) & (last_negation > last_scored)
+               & (since_negation < NEGATION_WINDOW))
+    for offset in (-1, -2):
+        negated |= _shift(post_negation, offset, False) & same_document(offset)
+
+    previous = _shift(ids, 1, 0)
+    has_intensifier = _shift(intensifier, 1, False) & same_document(1) & (previous != ids)
+    intensifier_index = np.where(has_intensifier, _ATTRIBUTES['intensifier_index'][previous], 0)
+
+    where = np.flatnonzero(scored)
+    features = _FEATURES[negated[where].astype(np.intp), intensifier_index[where],
+                         _ATTRIBUTES['word_index'][ids[where]]]
+    return documents[where], features
+
+
+def score_corpus(texts):
+    """Return arrays (polarity, subjectivity, polarity_sum, count) with one entry per text"""
+    documents, features = corpus_features(texts)
+    count = np.bincount(documents, minlength=len(texts))
+    polarity_sum = np.bincount(documents, weights=_POLARITY[features], minlength=len(texts)).astype(float)
+    subjectivity_sum = np.bincount(documents, weights=_SUBJECTIVITY[features], minlength=len(texts)).astype(float)
+    divisor = np.maximum(count, 1)
+    return polarity_sum / divisor, subjectivity_sum / divisor, polarity_sum, count
+
+
+def classify(polarity):
+    """Vectorized polarity_to_emotion: returns (emotion array, intensity array)"""
+    polarity = np.round(np.asarray(polarity, dtype=float), 9)
+    happy = polarity > EMOTION_THRESHOLD
+    stressed = polarity < -EMOTION_THRESHOLD
+    intensity = np.select(
+        [happy, stressed],
+        [np.minimum(5, np.floor((polarity + 1) * 2.5)), np.minimum(5, np.floor(np.abs(polarity) * 5) + 2)],
+        3
+    ).astype(int)
+    return EMOTIONS[happy + 2 * stressed], intensity
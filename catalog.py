@@ -0,0 +1,265 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+from sqlalchemy import case, func, literal
+
+from catalog_file import CATALOG_FILE as DEFAULT_CATALOG_FILE, CatalogError, CompiledCatalog, file_stamp
+from event_log import get_logger
+from models import db, Asana, CatalogState, Sequence
+from static_assets import rewrite_static_url
+
+INTENSITY_LEVELS = range(1, 6)
+
+# How often (seconds) a worker checks whether the catalog changed (reseeded or recompiled); 0 checks on every call
+CATALOG_VERSION_CHECK_INTERVAL = float(os.environ.get('CATALOG_VERSION_CHECK_INTERVAL', 5))
+# Compiled catalog (python catalog_file.py); used instead of the database when present. Empty disables it.
+CATALOG_FILE = os.environ.get('CATALOG_FILE', DEFAULT_CATALOG_FILE)
+
+log = get_logger('yoga.catalog')
+
+# Read-only views of the seeded rows. `payload` is the pre-serialized JSON the API returns,
+# `etag` a hash of it; `reference` is the sequence without the asana details, for clients
+# that already hold the catalog version it was built from.
+CatalogAsana = namedtuple('CatalogAsana', [
+    'id', 'name', 'sanskrit_name', 'overview_image', 'steps', 'difficulty', 'benefits', 'payload', 'etag'
+])
+CatalogSequence = namedtuple('CatalogSequence', [
+    'id', 'name', 'emotion', 'intensity_min', 'intensity_max', 'total_duration', 'asana_sequence', 'payload',
+    'reference'
+])
+
+
+def content_hash(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()[:16]
+
+
+class Catalog:
+    """Immutable snapshot of all Asana and Sequence rows, loaded once per process.
+
+    The catalog only changes when seed_data.py runs, so requests read from this
+    snapshot instead of querying and re-parsing JSON every time.
+    """
+
+    def __init__(self, asanas, sequences, stamp=None):
+        self.stamp = stamp  # the catalog_stamp() the rows were read at
+        self.asanas = MappingProxyType({asana.id: asana for asana in asanas})
+        self.sequences = MappingProxyType({sequence.id: sequence for sequence in sequences})
+        by_emotion = {}
+        for sequence in sequences:
+            by_emotion.setdefault(sequence.emotion, []).append(sequence)
+        self.by_emotion = MappingProxyType({emotion: tuple(seqs) for emotion, seqs in by_emotion.items()})
+
+        # (emotion, intensity) -> best-fitting sequence, precomputed for every level
+        self.index = MappingProxyType({
+            (emotion, intensity): min(seqs, key=lambda seq: fit_key(seq, intensity))
+            for emotion, seqs in by_emotion.items()
+            for intensity in INTENSITY_LEVELS
+        })
+        self.default = sequences[0] if sequences else None
+        # Changes whenever any payload does (reseeding, rebuilt static assets)
+        self.version = content_hash(*(asana.payload for asana in asanas), *(seq.payload for seq in sequences))
+
+    def __bool__(self):
+        return bool(self.sequences)
+
+    @classmethod
+    def load(cls, stamp=None):
+        """Build a catalog from the database (requires an app context)"""
+        if stamp is None:
+            stamp = 'database', stored_catalog_version()  # read first: a reseed after this triggers another reload
+        return cls.from_rows(Asana.query.order_by(Asana.id).all(), Sequence.query.order_by(Sequence.id).all(), stamp)
+
+    @classmethod
+    def load_file(cls, path, stamp=None, catalog_version=None):
+        """Build a catalog from a compiled catalog file.
+
+        Raises CatalogError if the file is invalid, or if catalog_version is
+        given and the file was compiled at another catalog version.
+        """
+        if stamp is None:
+            stamp = 'file', catalog_version, file_stamp(path)
+        with CompiledCatalog(path) as compiled:
+            if catalog_version is not None and compiled.catalog_version != catalog_version:
+                raise CatalogError(f"{path}: compiled at catalog version {compiled.catalog_version}, "
+                                   f"the database is at {catalog_version}")
+            return cls.from_rows(compiled.asanas(), compiled.sequences(), stamp)
+
+    @classmethod
+    def from_rows(cls, asana_rows, sequence_rows, stamp=None):
+        """Build a catalog from Asana/Sequence rows or compiled records, both in id order"""
+        asanas = []
+        for row in asana_rows:
+            # Image paths are stored as /static/... and served from their fingerprinted copies when built
+            steps = tuple(dict(step, image=rewrite_static_url(step['image'])) if step.get('image') else step
+                          for step in json.loads(row.step_data or '[]'))
+            overview_image = rewrite_static_url(row.overview_image)
+            payload = json.dumps({
+                'id': row.id,
+                'name': row.name,
+                'sanskrit_name': row.sanskrit_name,
+                'overview_image': overview_image,
+                'steps': list(steps),
+                'difficulty': row.difficulty,
+                'benefits': row.benefits
+            })
+            asanas.append(CatalogAsana(
+                id=row.id,
+                name=row.name,
+                sanskrit_name=row.sanskrit_name,
+                overview_image=overview_image,
+                steps=steps,
+                difficulty=row.difficulty,
+                benefits=row.benefits,
+                payload=payload,
+                etag=content_hash(payload)
+            ))
+        asanas_by_id = {asana.id: asana for asana in asanas}
+
+        sequences = []
+        for row in sequence_rows:
+            items = tuple(json.loads(row.asana_sequence or '[]'))
+            sequence_asanas = []
+            for item in items:
+                asana = asanas_by_id.get(item['asana_id'])
+                if asana:
+                    sequence_asanas.append({
+                        'id': asana.id,
+                        'name': asana.name,
+                        'sanskrit_name': asana.sanskrit_name,
+                        'overview_image': asana.overview_image,
+                        'steps': list(asana.steps),
+                        'duration': item['duration']
+                    })
+            sequences.append(CatalogSequence(
+                id=row.id,
+                name=row.name,
+                emotion=row.emotion,
+                intensity_min=row.intensity_min,
+                intensity_max=row.intensity_max,
+                total_duration=row.total_duration,
+                asana_sequence=items,
+                payload=json.dumps({
+                    'id': row.id,
+                    'name': row.name,
+                    'total_duration': row.total_duration,
+                    'asanas': sequence_asanas
+                }),
+                reference=json.dumps({
+                    'id': row.id,
+                    'name': row.name,
+                    'total_duration': row.total_duration,
+                    'asanas': [{'id': asana['id'], 'duration': asana['duration']} for asana in sequence_asanas]
+                })
+            ))
+
+        return cls(asanas, sequences, stamp)
+
+    def resolve_sequence(self, emotion, intensity):
+        """Return the best-fitting sequence for (emotion, intensity), falling back to happy, then to any sequence"""
+        return self.index.get((emotion, intensity)) or self.index.get(('happy', intensity)) or self.default
+
+
+def fit_key(sequence, intensity):
+    """Sort key for how well a sequence's intensity range fits: inside the range first,
+    then the nearest range, then the narrowest, then the lowest id"""
+    low = sequence.intensity_min if sequence.intensity_min is not None else 1
+    high = sequence.intensity_max if sequence.intensity_max is not None else 5
+    distance = low - intensity if intensity < low else max(0, intensity - high)
+    return distance, high - low, sequence.id
+
+
+def query_sequence(emotion, intensity):
+    """Database equivalent of Catalog.resolve_sequence, used to cross-check the index"""
+    low = func.coalesce(Sequence.intensity_min, 1)
+    high = func.coalesce(Sequence.intensity_max, 5)
+    distance = case(
+        (literal(intensity) < low, low - intensity),
+        (literal(intensity) > high, intensity - high),
+        else_=0
+    )
+    for key in (emotion, 'happy'):
+        sequence = (Sequence.query.filter_by(emotion=key)
+                    .order_by(distance, high - low, Sequence.id)
+                    .first())
+        if sequence:
+            return sequence
+    return Sequence.query.order_by(Sequence.id).first()
+
+
+_catalog = None
+_lock = threading.Lock()
+_next_version_check = 0.0
+
+
+def stored_catalog_version():
+    """The catalog version seed_data last wrote (0 for a database seeded before versions existed)"""
+    state = db.session.get(CatalogState, 1)
+    return state.version if state else 0
+
+
+def catalog_stamp():
+    """Identifies the current catalog source: ('file', version, (mtime, size)) when there is a compiled
+    file, else ('database', version), where version is the stored catalog version"""
+    version = stored_catalog_version()
+    if CATALOG_FILE and os.path.exists(CATALOG_FILE):
+        return 'file', version, file_stamp(CATALOG_FILE)
+    return 'database', version
+
+
+def _load_catalog():
+    stamp = catalog_stamp()
+    if stamp[0] == 'file':
+        try:
+            # A file from an older (or another) seed would serve rows the database no longer has
+            return Catalog.load_file(CATALOG_FILE, stamp, catalog_version=stamp[1])
+        except (CatalogError, OSError) as e:
+            # Keep serving from the database; the stamp stops this from retrying until the file
+            # or the stored version changes
+            log.error('catalog_file_unusable', path=CATALOG_FILE, error=str(e))
+    return Catalog.load(stamp)
+
+
+def get_catalog():
+    """Return the process-wide catalog, loading it on first use (requires an app context).
+
+    The catalog comes from the compiled catalog file when there is one and it
+    was compiled at the stored catalog version, else from the database. An
+    empty catalog (database not seeded yet) is not kept, so seeding is picked
+    up without a restart. Every CATALOG_VERSION_CHECK_INTERVAL seconds the stamp (the stored catalog
+    version, and the file's mtime/size) is compared with the loaded one, so a
+    reseed or recompile reaches running workers without a restart.
+    """
+    global _catalog, _next_version_check
+    catalog = _catalog
+    if catalog is not None and time.monotonic() >= _next_version_check:
+        _next_version_check = time.monotonic() + CATALOG_VERSION_CHECK_INTERVAL
+        if catalog_stamp() != catalog.stamp:
+            with _lock:
+                if _catalog is catalog:
+                    _catalog = None
+            catalog = None
+    if catalog is None:
+        with _lock:
+            catalog = _catalog
+            if catalog is None:
+                catalog = _load_catalog()
+                if catalog:
+                    _catalog = catalog
+                    _next_version_check = time.monotonic() + CATALOG_VERSION_CHECK_INTERVAL
+    return catalog
+
+
+def invalidate_catalog():
+    """Drop the cached catalog; the next get_catalog() reloads it from the compiled file or the database"""
+    global _catalog
+    with _lock:
+        _catalog = None
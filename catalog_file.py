@@ -0,0 +1,283 @@
+"""Compiled single-file catalog:  python catalog_file.py [--output PATH]
+
+Validates every pose file and sequence definition (the ones seed_data seeds)
+against ASANA_SCHEMA / SEQUENCE_SCHEMA and writes them to one file, which
+workers memory-map at startup instead of reading the catalog rows
+(catalog.get_catalog). seed_data writes the file after every seed that changes
+it; running this module recompiles it for a database that already holds the
+current definitions.
+
+    header   b'YCAT', format version (u16), reserved (u16), catalog version
+             (u64, CatalogState.version of the seed it was written with),
+             asana count (u32), sequence count (u32), hash of the definitions
+             (32 bytes), SHA-256 of everything after the header (32 bytes)
+    index    one (id u32, offset u64, length u32) entry per record, asanas first
+    records  one compact JSON array per record: id, then the columns in
+             ASANA_COLUMNS / SEQUENCE_COLUMNS order
+
+Integers are little-endian and offsets count from the start of the file, so a
+single record can be read through the index without decoding the others
+(CompiledCatalog.read_record). The file is written under a temporary name and
+renamed into place, so a worker never maps half a file; running workers pick
+up a recompiled file by its mtime and size. Workers use the file only while
+its catalog version is the one stored in the database, so a reseed that did
+not rewrite it falls back to the database rows.
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+from collections import namedtuple
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CATALOG_FILE = os.path.join(ROOT, 'catalog.bin')
+
+MAGIC = b'YCAT'
+FORMAT_VERSION = 2
+HEADER = struct.Struct('<4sHHQII32s32s')
+INDEX_ENTRY = struct.Struct('<IQI')
+
+# Columns that come from the definitions (seed_data hashes the same ones)
+ASANA_COLUMNS = ('name', 'sanskrit_name', 'overview_image', 'step_data', 'difficulty', 'benefits')
+SEQUENCE_COLUMNS = ('name', 'emotion', 'intensity_min', 'intensity_max', 'asana_sequence', 'total_duration')
+
+# Same attribute names as the Asana/Sequence rows, so catalog.Catalog.from_rows takes either
+AsanaRecord = namedtuple('AsanaRecord', ('id',) + ASANA_COLUMNS)
+SequenceRecord = namedtuple('SequenceRecord', ('id',) + SEQUENCE_COLUMNS)
+
+DIFFICULTIES = ('beginner', 'intermediate', 'advanced')
+
+# column -> (type, check on the value or None, what the check requires)
+ASANA_SCHEMA = {
+    'name': (str, bool, 'non-empty'),
+    'sanskrit_name': (str, None, None),
+    'overview_image': (str, lambda value: value.startswith('/static/'), 'a /static/ path'),
+    'step_data': (str, None, None),
+    'difficulty': (str, lambda value: value in DIFFICULTIES, f'one of {", ".join(DIFFICULTIES)}'),
+    'benefits': (str, None, None),
+}
+STEP_SCHEMA = {
+    'instruction': (str, bool, 'non-empty'),
+    'duration': (int, lambda value: value > 0, 'positive'),
+    'image': (str, lambda value: value.startswith('/static/'), 'a /static/ path'),
+}
+SEQUENCE_SCHEMA = {
+    'name': (str, bool, 'non-empty'),
+    'emotion': (str, bool, 'non-empty'),
+    'intensity_min': (int, lambda value: 1 <= value <= 5, 'between 1 and 5'),
+    'intensity_max': (int, lambda value: 1 <= value <= 5, 'between 1 and 5'),
+    'asana_sequence': (str, None, None),
+    'total_duration': (int, lambda value: value > 0, 'positive'),
+}
+SEQUENCE_ITEM_SCHEMA = {
+    'asana_id': (int, None, None),
+    'duration': (int, lambda value: value > 0, 'positive'),
+}
+
+
+class CatalogError(Exception):
+    """The definitions failed validation, or a compiled file is unreadable, corrupt or of another format"""
+
+
+def _check(values, schema, where):
+    errors = []
+    for column, (expected, check, requirement) in schema.items():
+        value = values.get(column)
+        # bool is an int subclass, but never a valid duration or id
+        if not isinstance(value, expected) or isinstance(value, bool):
+            errors.append(f"{where}: {column} must be {expected.__name__}, got {value!r}")
+        elif check is not None and not check(value):
+            errors.append(f"{where}: {column} must be {requirement}, got {value!r}")
+    return errors
+
+
+def _parse_list(values, column, where, errors):
+    try:
+        items = json.loads(values[column])
+    except (TypeError, ValueError):
+        errors.append(f"{where}: {column} is not valid JSON")
+        return []
+    if not isinstance(items, list) or not items:
+        errors.append(f"{where}: {column} must be a non-empty list")
+        return []
+    return items
+
+
+def validate(asanas, sequences):
+    """Return the list of problems in the asana and sequence definitions (empty when they are valid)"""
+    errors = []
+    asana_ids = set()
+    for asana in asanas:
+        where = f"asana {asana.get('id')}"
+        if asana.get('id') in asana_ids:
+            errors.append(f"{where}: duplicate id")
+        asana_ids.add(asana.get('id'))
+        errors.extend(_check(asana, ASANA_SCHEMA, where))
+        if isinstance(asana.get('step_data'), str):
+            for number, step in enumerate(_parse_list(asana, 'step_data', where, errors), start=1):
+                if not isinstance(step, dict):
+                    errors.append(f"{where}: step {number} must be an object")
+                    continue
+                errors.extend(_check(step, STEP_SCHEMA, f"{where} step {number}"))
+
+    sequence_ids = set()
+    for sequence in sequences:
+        where = f"sequence {sequence.get('id')}"
+        if sequence.get('id') in sequence_ids:
+            errors.append(f"{where}: duplicate id")
+        sequence_ids.add(sequence.get('id'))
+        sequence_errors = _check(sequence, SEQUENCE_SCHEMA, where)
+        errors.extend(sequence_errors)
+        if sequence_errors:
+            continue
+        if sequence['intensity_min'] > sequence['intensity_max']:
+            errors.append(f"{where}: intensity_min is above intensity_max")
+        items = _parse_list(sequence, 'asana_sequence', where, errors)
+        for number, item in enumerate(items, start=1):
+            if not isinstance(item, dict):
+                errors.append(f"{where}: item {number} must be an object")
+                continue
+            item_errors = _check(item, SEQUENCE_ITEM_SCHEMA, f"{where} item {number}")
+            errors.extend(item_errors)
+            if not item_errors and item['asana_id'] not in asana_ids:
+                errors.append(f"{where} item {number}: unknown asana_id {item['asana_id']}")
+        durations = [item.get('duration') for item in items if isinstance(item, dict)]
+        if all(isinstance(duration, int) for duration in durations) and sum(durations) != sequence['total_duration']:
+            errors.append(f"{where}: total_duration {sequence['total_duration']} is not the sum "
+                          f"of its durations ({sum(durations)})")
+    return errors
+
+
+def definitions_hash(asanas, sequences):
+    digest = hashlib.sha256()
+    for records, columns in ((asanas, ASANA_COLUMNS), (sequences, SEQUENCE_COLUMNS)):
+        for record in records:
+            digest.update(json.dumps([record['id']] + [record[column] for column in columns]).encode('utf-8'))
+    return digest.digest()
+
+
+def write_catalog_file(asanas, sequences, path=CATALOG_FILE, catalog_version=0):
+    """Validate the definitions and write the compiled file; raises CatalogError listing every problem"""
+    errors = validate(asanas, sequences)
+    if errors:
+        raise CatalogError('invalid catalog definitions:\n  ' + '\n  '.join(errors))
+
+    records = [json.dumps([asana['id']] + [asana[column] for column in ASANA_COLUMNS],
+                          ensure_ascii=False, separators=(',', ':')).encode('utf-8') for asana in asanas]
+    records += [json.dumps([sequence['id']] + [sequence[column] for column in SEQUENCE_COLUMNS],
+                           ensure_ascii=False, separators=(',', ':')).encode('utf-8') for sequence in sequences]
+    ids = [asana['id'] for asana in asanas] + [sequence['id'] for sequence in sequences]
+
+    offset = HEADER.size + INDEX_ENTRY.size * len(records)
+    index = bytearray()
+    for record_id, record in zip(ids, records):
+        index += INDEX_ENTRY.pack(record_id, offset, len(record))
+        offset += len(record)
+    body = bytes(index) + b''.join(records)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, 0, catalog_version, len(asanas), len(sequences),
+                         definitions_hash(asanas, sequences), hashlib.sha256(body).digest())
+
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(header + body)
+    os.replace(temporary, path)
+    return len(header) + len(body)
+
+
+def file_stamp(path):
+    """What get_catalog() compares to notice a recompiled file"""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class CompiledCatalog:
+    """A memory-mapped compiled catalog file, verified against its header when opened"""
+
+    def __init__(self, path=CATALOG_FILE):
+        self.path = path
+        with open(path, 'rb') as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file
+                raise CatalogError(f"{path}: empty file") from None
+        try:
+            self._verify()
+        except CatalogError:
+            self.close()
+            raise
+
+    def _verify(self):
+        if len(self._map) < HEADER.size:
+            raise CatalogError(f"{self.path}: truncated header")
+        (magic, version, _, self.catalog_version, self.asana_count, self.sequence_count, self.definitions_hash,
+         checksum) = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise CatalogError(f"{self.path}: not a compiled catalog")
+        if version != FORMAT_VERSION:
+            raise CatalogError(f"{self.path}: format version {version}, expected {FORMAT_VERSION}")
+        with memoryview(self._map) as view:
+            if hashlib.sha256(view[HEADER.size:]).digest() != checksum:
+                raise CatalogError(f"{self.path}: checksum mismatch")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._map.close()
+
+    def _entry(self, position):
+        return INDEX_ENTRY.unpack_from(self._map, HEADER.size + INDEX_ENTRY.size * position)
+
+    def _record(self, position):
+        _, offset, length = self._entry(position)
+        return json.loads(self._map[offset:offset + length])
+
+    def asanas(self):
+        return [AsanaRecord(*self._record(position)) for position in range(self.asana_count)]
+
+    def sequences(self):
+        return [SequenceRecord(*self._record(position))
+                for position in range(self.asana_count, self.asana_count + self.sequence_count)]
+
+    def read_record(self, kind, record_id):
+        """One asana or sequence by id, decoding only that record (None if absent)"""
+        start, count, record_type = ((0, self.asana_count, AsanaRecord) if kind == 'asana'
+                                     else (self.asana_count, self.sequence_count, SequenceRecord))
+        for position in range(start, start + count):
+            if self._entry(position)[0] == record_id:
+                return record_type(*self._record(position))
+        return None
+
+
+def compile_catalog(path=CATALOG_FILE):
+    """Compile the definitions seed_data uses, stamped with the database's catalog version (requires an
+    app context); returns the file size in bytes. Raises CatalogError when the database does not hold
+    these definitions, since workers would then serve poses and sequences the database lacks."""
+    from seed_data import asana_definitions, seeded_catalog_version, sequence_definitions
+    asanas, sequences = asana_definitions(), sequence_definitions()
+    catalog_version = seeded_catalog_version(asanas, sequences)
+    if catalog_version is None:
+        raise CatalogError('the database does not hold the current definitions; run python seed_data.py, '
+                           'which also compiles the catalog file')
+    return write_catalog_file(asanas, sequences, path, catalog_version)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Validate the pose and sequence definitions and compile them')
+    parser.add_argument('--output', default=CATALOG_FILE)
+    args = parser.parse_args()
+    from app import app
+    with app.app_context():
+        try:
+            size = compile_catalog(args.output)
+        except CatalogError as e:
+            raise SystemExit(str(e))
+    with CompiledCatalog(args.output) as compiled:
+        print(f"compiled {compiled.asana_count} asanas and {compiled.sequence_count} sequences into "
+              f"{os.path.relpath(args.output, ROOT)} ({size} bytes, catalog version {compiled.catalog_version}, "
+              f"definitions {compiled.definitions_hash.hex()[:16]})")
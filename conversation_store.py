@@ -0,0 +1,166 @@
+import copy
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+MAX_CONVERSATION_ID_LENGTH = 64
+
+
+def new_conversation_id():
+    return uuid.uuid4().hex
+
+
+def new_state():
+    return {
+        'messages': [],    # last N {'sender', 'content'} entries
+        'user_turns': 0,   # total user messages, not limited by the window
+        'memory': [],      # ContextualConversationEngine context for the last exchanges
+        'voice_count': 0,  # VoiceResponseEngine exchange counter
+        'analysis': {      # running aggregate for /api/analyze-conversation
+            'turns': 0,
+            'polarity_sum': 0.0,
+            'weight': 0,
+            'groups': [],
+            'tail': '',    # last words of the user messages, re-read with the next one
+            'tail_score': [0.0, 0]  # the tail's (polarity_sum, scored_phrases) on its own
+        }
+    }
+
+
+def add_message(state, sender, content):
+    """Record a message in a conversation state; returns the total number of user turns"""
+    state['messages'].append({'sender': sender, 'content': content})
+    if sender == 'user':
+        state['user_turns'] += 1
+    return state['user_turns']
+
+
+class _BaseStore:
+    def __init__(self, max_messages=20, max_memory=5, idle_ttl=1800):
+        self.max_messages = max_messages
+        self.max_memory = max_memory
+        self.idle_ttl = idle_ttl
+
+    def _trim(self, state):
+        del state['messages'][:-self.max_messages]
+        del state['memory'][:-self.max_memory]
+
+    def read(self, conversation_id, func):
+        """Return func(state) for the conversation's state without changing it, or None if unknown/expired"""
+        state = self.get(conversation_id)
+        return func(state) if state is not None else None
+
+
+class InProcessConversationStore(_BaseStore):
+    """Thread-safe per-conversation state kept in this process.
+
+    Each conversation keeps a bounded message window and context memory; the
+    least recently used conversations are evicted beyond max_conversations and
+    conversations idle for longer than idle_ttl seconds are dropped.
+    """
+
+    def __init__(self, max_conversations=10000, **kwargs):
+        super().__init__(**kwargs)
+        self.max_conversations = max_conversations
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, conversation_id):
+        """Return a copy of the conversation state, or None if unknown/expired"""
+        with self._lock:
+            state = self._lookup(conversation_id)
+            return copy.deepcopy(state) if state is not None else None
+
+    def read(self, conversation_id, func):
+        # Runs func on the stored state instead of a copy, so func must not modify it or return its mutable parts
+        with self._lock:
+            state = self._lookup(conversation_id)
+            return func(state) if state is not None else None
+
+    def update(self, conversation_id, func):
+        """Run func(state) atomically on the conversation's state (created if missing) and return its result"""
+        with self._lock:
+            state = self._lookup(conversation_id)
+            if state is None:
+                state = self._states[conversation_id] = new_state()
+                self._evict()
+            try:
+                return func(state)
+            finally:
+                # Also when func raises, so the state stays valid for later lookups
+                self._trim(state)
+                state['_touched'] = time.monotonic()
+
+    def __len__(self):
+        return len(self._states)
+
+    def _lookup(self, conversation_id):
+        state = self._states.get(conversation_id)
+        if state is None:
+            return None
+        if self.idle_ttl and '_touched' in state and time.monotonic() - state['_touched'] > self.idle_ttl:
+            del self._states[conversation_id]
+            return None
+        self._states.move_to_end(conversation_id)
+        return state
+
+    def _evict(self):
+        while len(self._states) > self.max_conversations:
+            self._states.popitem(last=False)
+        # Idle conversations sit at the front of the LRU order
+        now = time.monotonic()
+        while self._states and self.idle_ttl:
+            oldest = next(iter(self._states.values()))
+            if '_touched' in oldest and now - oldest['_touched'] > self.idle_ttl:
+                self._states.popitem(last=False)
+            else:
+                break
+
+
+class RedisConversationStore(_BaseStore):
+    """Conversation state shared between worker processes through a Redis-compatible server.
+
+    States are stored as JSON with an idle expiry; updates use WATCH/MULTI so
+    concurrent requests for the same conversation do not lose writes.
+    """
+
+    def __init__(self, client, prefix='yoga:conversation:', **kwargs):
+        super().__init__(**kwargs)
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, conversation_id):
+        raw = self.client.get(self.prefix + conversation_id)
+        return json.loads(raw) if raw else None
+
+    def update(self, conversation_id, func):
+        key = self.prefix + conversation_id
+
+        def transaction(pipe):
+            raw = pipe.get(key)
+            state = json.loads(raw) if raw else new_state()
+            result = func(state)
+            self._trim(state)
+            pipe.multi()
+            pipe.set(key, json.dumps(state), ex=self.idle_ttl or None)
+            return result
+
+        return self.client.transaction(transaction, key, value_from_callable=True)
+
+
+def create_conversation_store():
+    """Build the store selected by CONVERSATION_STORE ('memory' or 'redis')"""
+    options = {
+        'max_messages': int(os.environ.get('CONVERSATION_MAX_MESSAGES', 20)),
+        'idle_ttl': int(os.environ.get('CONVERSATION_IDLE_TTL', 1800))
+    }
+    if os.environ.get('CONVERSATION_STORE', 'memory') == 'redis':
+        import redis  # optional dependency, only needed for the shared store
+        client = redis.Redis.from_url(os.environ.get('REDIS_URL', 'redis://localhost:6379/0'))
+        return RedisConversationStore(client, **options)
+    return InProcessConversationStore(
+        max_conversations=int(os.environ.get('CONVERSATION_MAX_CONVERSATIONS', 10000)), **options
+    )
@@ -0,0 +1,152 @@
+"""Structured application events on top of the logging module.
+
+Events are a name plus keyword fields. They are level-gated before anything
+is built, DEBUG events are sampled per request (start_trace) at
+LOG_DEBUG_SAMPLE_RATE, and records go through a queue to a listener thread
+that does all formatting and I/O, so request threads never wait on stdout.
+With LOG_REDACT on (the default) message text fields are replaced by their
+length.
+
+Settings (read by configure_logging): LOG_LEVEL (default INFO), LOG_FORMAT
+('json' or 'text'), LOG_DEBUG_SAMPLE_RATE (0..1, default 1), LOG_REDACT
+('1'/'0'), LOG_ASYNC ('1'/'0').
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+
+# Fields that carry user or bot text
+CONTENT_FIELDS = frozenset({'text', 'message', 'response'})
+
+_settings = {'sample_rate': 1.0, 'redact': True}
+_trace_sampled = contextvars.ContextVar('trace_sampled', default=None)
+_listener = None
+
+
+class EventLogger:
+    """logging.Logger wrapper that emits named events with structured fields"""
+
+    def __init__(self, name):
+        self.logger = logging.getLogger(name)
+
+    def debug(self, event, **fields):
+        if self.logger.isEnabledFor(logging.DEBUG) and _debug_sampled():
+            self._emit(logging.DEBUG, event, fields)
+
+    def info(self, event, **fields):
+        if self.logger.isEnabledFor(logging.INFO):
+            self._emit(logging.INFO, event, fields)
+
+    def warning(self, event, **fields):
+        if self.logger.isEnabledFor(logging.WARNING):
+            self._emit(logging.WARNING, event, fields)
+
+    def error(self, event, **fields):
+        if self.logger.isEnabledFor(logging.ERROR):
+            self._emit(logging.ERROR, event, fields)
+
+    def _emit(self, level, event, fields):
+        # Built directly: Logger.log would also walk the stack for the caller's file and line.
+        # The message stays unformatted; the listener renders it with the fields.
+        record = self.logger.makeRecord(self.logger.name, level, '', 0, event, (), None,
+                                        extra={'event_fields': fields})
+        self.logger.handle(record)
+
+
+def get_logger(name):
+    return EventLogger(name)
+
+
+def start_trace():
+    """Decide once per request whether its DEBUG events are kept"""
+    rate = _settings['sample_rate']
+    _trace_sampled.set(rate >= 1.0 or random.random() < rate)
+
+
+def _debug_sampled():
+    sampled = _trace_sampled.get()
+    if sampled is None:  # outside a request: sample each event on its own
+        rate = _settings['sample_rate']
+        return rate >= 1.0 or random.random() < rate
+    return sampled
+
+
+def _render_fields(fields):
+    if not _settings['redact']:
+        return fields
+    return {key: f'<redacted {len(value)} chars>' if key in CONTENT_FIELDS and isinstance(value, str) else value
+            for key, value in fields.items()}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'event': record.getMessage()
+        }
+        entry.update(_render_fields(getattr(record, 'event_fields', {})))
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s %(message)s')
+
+    def format(self, record):
+        line = super().format(record)
+        fields = _render_fields(getattr(record, 'event_fields', {}))
+        return line + ''.join(f' {key}={value!r}' for key, value in fields.items())
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queues the record as-is; the stock QueueHandler formats it on the calling thread"""
+
+    def prepare(self, record):
+        return record
+
+
+def configure_logging(stream=None):
+    """Install the handlers on the root logger from the LOG_* settings (safe to call more than once)"""
+    global _listener
+    _settings['sample_rate'] = float(os.environ.get('LOG_DEBUG_SAMPLE_RATE', 1.0))
+    _settings['redact'] = os.environ.get('LOG_REDACT', '1') != '0'
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if os.environ.get('LOG_FORMAT', 'json') == 'json' else TextFormatter())
+
+    root = logging.getLogger()
+    root.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
+    stop_logging()
+    for handler in [h for h in root.handlers if getattr(h, '_event_log', False)]:
+        root.removeHandler(handler)
+
+    if os.environ.get('LOG_ASYNC', '1') != '0':
+        records = queue.SimpleQueue()
+        handler = _DeferredQueueHandler(records)
+        _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+        _listener.start()
+    else:
+        handler = output
+    handler._event_log = True
+    root.addHandler(handler)
+
+
+def stop_logging():
+    """Drain queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
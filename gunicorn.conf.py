@@ -0,0 +1,73 @@
+"""gunicorn settings for production:  gunicorn -c gunicorn.conf.py
+
+Pre-fork gthread workers. The app (and the database schema) is loaded once in
+the master; every worker resets the state a fork does not carry over (the log
+listener thread, pooled SQLite connections), warms its catalog snapshot and
+sentiment models before taking traffic, and flushes buffered session writes
+when it exits, including on a graceful SIGTERM/SIGHUP restart.
+
+Sizing (python benchmarks/bench_concurrency.py --servers gunicorn): sentiment
+scoring is CPU-bound and holds the GIL, so throughput scales with processes,
+not threads. Use one worker per CPU core (WEB_CONCURRENCY) and a few threads
+per worker (WEB_THREADS, default 4) to overlap SQLite commits and slow
+clients; more threads only add latency. Keep WEB_THREADS within
+DB_POOL_SIZE + DB_MAX_OVERFLOW. Each worker has its own sentiment cache and
+metrics.
+
+Conversation state (the chat and voice pages send only a conversation_id)
+is shared between workers only with CONVERSATION_STORE=redis. Without it the
+default is a single worker, and starting more is refused: requests for one
+conversation would land on workers that never saw its earlier messages. For
+the same reason workers are only recycled (WEB_MAX_REQUESTS) with Redis; a
+recycled worker would take every live conversation with it.
+"""
+import multiprocessing
+import os
+
+wsgi_app = 'wsgi:application'
+bind = os.environ.get('BIND', '0.0.0.0:' + os.environ.get('PORT', '5000'))
+shared_conversations = os.environ.get('CONVERSATION_STORE', 'memory') == 'redis'
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() if shared_conversations else 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('WEB_THREADS', 4))
+preload_app = True
+timeout = int(os.environ.get('WEB_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+# Recycle workers now and then so a slow leak can't grow without bound (0 = never; the
+# in-process conversation store would lose every conversation with the worker)
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 10000 if shared_conversations else 0))
+max_requests_jitter = max_requests // 10
+accesslog = None  # requests are already timed per route in /metrics
+
+
+def on_starting(server):
+    if server.cfg.workers > 1 and not shared_conversations:
+        raise RuntimeError(f'{server.cfg.workers} workers need CONVERSATION_STORE=redis: the in-process '
+                           'conversation store is per worker, so set WEB_CONCURRENCY=1 or configure REDIS_URL')
+    if server.cfg.max_requests and not shared_conversations:
+        raise RuntimeError('recycling workers (WEB_MAX_REQUESTS) needs CONVERSATION_STORE=redis: a recycled worker '
+                           'drops the conversations in its in-process store, so set WEB_MAX_REQUESTS=0')
+
+
+def post_fork(server, worker):
+    from app import db, app
+    from event_log import configure_logging
+
+    configure_logging()  # the master's queue listener thread does not survive the fork
+    with app.app_context():
+        db.engine.dispose(close=False)  # connections opened in the master stay with the master
+
+
+def post_worker_init(worker):
+    from app import warm_up_worker
+
+    warm_up_worker()
+
+
+def worker_exit(server, worker):
+    from app import session_writer
+    from event_log import stop_logging
+
+    session_writer.close()
+    stop_logging()
@@ -0,0 +1,65 @@
+"""HTTP validators for pre-serialized payloads, and negotiated gzip for larger responses.
+
+Catalog responses carry weak ETags (the same validator covers the identity
+and gzip encodings of a body) and a short shared-cache lifetime, so a client
+revalidates with If-None-Match and gets a 304 without a body. Compressed
+copies of bodies that have an ETag are kept, since those bodies repeat
+verbatim; everything else is compressed per response.
+
+Settings: CATALOG_MAX_AGE (seconds, default 300), GZIP_MIN_BYTES (default
+1024; smaller bodies are sent as they are), GZIP_LEVEL (default 6).
+"""
+import gzip
+import os
+import threading
+
+from flask import Response, request
+
+CATALOG_MAX_AGE = int(os.environ.get('CATALOG_MAX_AGE', 300))
+GZIP_MIN_BYTES = int(os.environ.get('GZIP_MIN_BYTES', 1024))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', 6))
+COMPRESSIBLE_MIMETYPES = frozenset({'application/json', 'text/html', 'text/plain', 'text/css', 'image/svg+xml'})
+MAX_CACHED_BODIES = 1024
+
+_compressed = {}  # ETag header -> gzip bytes
+_compressed_lock = threading.Lock()
+
+
+def conditional_response(body, etag, max_age=CATALOG_MAX_AGE, mimetype='application/json'):
+    """Return body with a weak ETag and Cache-Control, or a 304 if the client already has it"""
+    headers = {'ETag': f'W/"{etag}"', 'Cache-Control': f'public, max-age={max_age}'}
+    if request.if_none_match.contains_weak(etag):
+        return Response(status=304, headers=headers)
+    return Response(body, headers=headers, mimetype=mimetype)
+
+
+def _gzip(data, etag):
+    if etag is None:
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    compressed = _compressed.get(etag)
+    if compressed is None:
+        compressed = gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+        with _compressed_lock:
+            if len(_compressed) >= MAX_CACHED_BODIES:
+                _compressed.clear()  # validators change only on reseed/redeploy, so this is rare
+            _compressed[etag] = compressed
+    return compressed
+
+
+def enable_compression(app):
+    """gzip responses of GZIP_MIN_BYTES or more for clients that accept it"""
+
+    @app.after_request
+    def compress_response(response):
+        if (response.status_code not in (200, 201) or response.direct_passthrough or response.is_streamed
+                or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+        data = response.get_data()
+        if len(data) < GZIP_MIN_BYTES:
+            return response
+        response.vary.add('Accept-Encoding')
+        if not request.accept_encodings['gzip']:
+            return response
+        response.set_data(_gzip(data, response.headers.get('ETag')))
+        response.headers['Content-Encoding'] = 'gzip'
+        return response
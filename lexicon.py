@@ -0,0 +1,216 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+# Every keyword/phrase table used by the chat analysis, grouped by purpose.
+# Entries are matched as whole words, so inflected forms are listed explicitly.
+TABLES = {
+    # detect_language: direct phrases (highest priority)
+    'phrase_telugu': ['em chestunav', 'enti chestunav'],
+    'phrase_tamil': ['epdi iruka', 'enna panra'],
+    'phrase_hindi': ['kaise ho', 'kya kar rahe ho'],
+
+    # detect_language: word-based detection
+    'words_telugu': ['nenu', 'nuvvu', 'unnav', 'chestunav', 'ela', 'emi', 'enti', 'bagundi', 'ledhu'],
+    'words_tamil': ['naan', 'nee', 'iruku', 'epdi', 'enna', 'panra', 'sollu', 'illa', 'aama'],
+    'words_hindi': ['main', 'tum', 'kaise', 'kya', 'kar', 'rahe', 'ho', 'hai', 'achha', 'nahi'],
+
+    # analyze_emotion_and_language: greetings that override emotion analysis
+    'greeting_telugu': ['em chestunav', 'enti chestunav', 'ela unnav', 'namaste'],
+    'greeting_tamil': ['epdi iruka', 'enna panra', 'vanakkam'],
+    'greeting_hindi': ['kaise ho', 'kya kar rahe ho', 'namaste'],
+    'greeting_english': ['how are you', 'what are you doing', 'hello', 'hi'],
+
+    # is_greeting
+    'greeting_word': ['hi', 'hello', 'hey', 'namaste', 'vannakkam', 'em chestunav', 'ela unnav', 'epdi iruka', 'kaise ho'],
+    'emotion_word': ['tension', 'stress', 'stressed', 'stressful', 'sad', 'happy', 'tired', 'worried',
+                     'badhaga', 'santhosham', 'kopam', 'angry'],
+
+    # generate_conversational_response / generate_dynamic_questions
+    'coping': ['music', 'songs', 'walk', 'walks', 'walking', 'friends', 'family', 'padatam', 'vindam'],
+    'question_word': ['what', 'how', 'why', 'when', 'emi', 'ela', 'enna', 'kya'],
+    'chat_greeting': ['em chestunav', 'what are you doing', 'epdi iruka', 'kaise ho'],
+    'chat_emotion': ['tension', 'stress', 'stressed', 'stressful', 'sad', 'happy', 'tired', 'worried',
+                     'badhaga', 'santhosham'],
+
+    # ContextualConversationEngine.analyze_context
+    'ctx_question': ['emi', 'enna', 'kya', 'what', 'how', 'why'],
+    'ctx_sharing': ['nenu', 'naan', 'main', 'i am', 'i was', 'i did'],
+    'ctx_problem': ['problem', 'problems', 'issue', 'issues', 'tension', 'stress', 'stressed', 'stressful',
+                    'worry', 'worried', 'worries', 'worrying', 'kashtam', 'pareshaani'],
+    'ctx_positive': ['good', 'happy', 'bagundi', 'nallairuku', 'achha', 'great'],
+    'ctx_work': ['work', 'working', 'job', 'jobs', 'office', 'vellu', 'pani', 'kaam'],
+    'ctx_family': ['family', 'parents', 'intlo', 'veetla', 'ghar'],
+    'ctx_time': ['today', 'evala', 'inniki', 'aaj', 'yesterday', 'tomorrow'],
+
+    # Phrases checked individually by the response engines
+    'reply_phrase': ['em chestunav', 'enti chestunav', 'ela unnav', 'epdi iruka', 'kaise ho', 'how are you'],
+    'voice_greeting': ['em chestunav', 'enti chestunav', 'ela unnav', 'namaste', 'hello', 'epdi iruka',
+                       'enna panra', 'vanakkam', 'kaise ho', 'kya kar rahe ho', 'how are you',
+                       'what are you doing', 'hi'],
+}
+
+Hits = namedtuple('Hits', ['phrases', 'groups'])
+
+TOKEN_PATTERN = r"[a-z0-9]+"
+_TOKEN_RE = re.compile(TOKEN_PATTERN)
+
+
+def _compile(tables):
+    """Fold all tables into one phrase -> groups map (a word-level trie flattened into a dict)"""
+    index = {}
+    for group, phrases in tables.items():
+        for phrase in phrases:
+            index.setdefault(' '.join(phrase.split()), set()).add(group)
+    longest = max(len(phrase.split()) for phrase in index)
+    return {phrase: frozenset(groups) for phrase, groups in index.items()}, longest
+
+
+_INDEX, _MAX_WORDS = _compile(TABLES)
+
+
+@lru_cache(maxsize=2048)
+def _scan_lower(text_lower):
+    tokens = _TOKEN_RE.findall(text_lower)
+    phrases = set()
+    groups = set()
+    for i in range(len(tokens)):
+        for n in range(1, min(_MAX_WORDS, len(tokens) - i) + 1):
+            phrase = tokens[i] if n == 1 else ' '.join(tokens[i:i + n])
+            hit = _INDEX.get(phrase)
+            if hit:
+                phrases.add(phrase)
+                groups |= hit
+    return Hits(frozenset(phrases), frozenset(groups))
+
+
+def scan(text):
+    """Return every lexicon phrase and group found in text, in a single pass over its words"""
+    return _scan_lower(text.lower().strip())
+
+
+def tokenize(text):
+    """Lowercased word tokens of text, as the scanners see them"""
+    return _TOKEN_RE.findall(text.lower())
+
+
+# Sentiment lexicon for the dict-backed scorer: word -> (polarity, subjectivity).
+# English values follow TextBlob's scale; romanized Telugu/Tamil/Hindi words are
+# scored like their closest English equivalent.
+SENTIMENT_WORDS = {
+    # English, positive
+    'happy': (0.8, 1.0), 'great': (0.8, 0.75), 'good': (0.7, 0.6), 'awesome': (1.0, 1.0),
+    'amazing': (0.6, 0.9), 'wonderful': (1.0, 1.0), 'love': (0.5, 0.6), 'lovely': (0.5, 0.75),
+    'nice': (0.6, 1.0), 'best': (1.0, 0.3), 'better': (0.5, 0.5), 'excited': (0.4, 0.75),
+    'calm': (0.3, 0.75), 'relaxed': (0.4, 0.6), 'peaceful': (0.5, 0.8), 'fine': (0.4, 0.5),
+    'glad': (0.5, 1.0), 'grateful': (0.6, 0.8), 'proud': (0.6, 0.8), 'fun': (0.3, 0.2),
+    'enjoy': (0.4, 0.5), 'enjoyed': (0.4, 0.5), 'beautiful': (0.85, 1.0), 'okay': (0.2, 0.5),
+    'ok': (0.2, 0.5), 'super': (0.6, 0.7),
+    # English, negative
+    'sad': (-0.5, 1.0), 'unhappy': (-0.6, 0.9), 'stressed': (-0.6, 0.8), 'stress': (-0.5, 0.8),
+    'stressful': (-0.6, 0.8), 'tension': (-0.5, 0.7), 'tense': (-0.5, 0.7), 'worried': (-0.5, 0.8),
+    'worry': (-0.4, 0.7), 'worrying': (-0.5, 0.8), 'anxious': (-0.6, 0.9), 'anxiety': (-0.6, 0.9),
+    'angry': (-0.5, 1.0), 'anger': (-0.5, 1.0), 'upset': (-0.6, 0.9), 'tired': (-0.4, 0.7),
+    'exhausted': (-0.6, 0.8), 'terrible': (-1.0, 1.0), 'awful': (-1.0, 1.0), 'bad': (-0.7, 0.67),
+    'horrible': (-1.0, 1.0), 'depressed': (-0.8, 0.9), 'lonely': (-0.6, 0.9), 'overwhelmed': (-0.6, 0.9),
+    'frustrated': (-0.7, 0.9), 'scared': (-0.6, 0.9), 'afraid': (-0.6, 0.9), 'hate': (-0.8, 0.9),
+    'problem': (-0.3, 0.5), 'problems': (-0.3, 0.5), 'issue': (-0.2, 0.4), 'hurt': (-0.5, 0.8),
+    'pain': (-0.5, 0.7), 'crying': (-0.5, 0.8), 'difficult': (-0.5, 1.0), 'hard': (-0.3, 0.5),
+    'worst': (-1.0, 1.0), 'sick': (-0.7, 0.9), 'annoyed': (-0.5, 0.8), 'miserable': (-0.9, 1.0),
+    'nervous': (-0.4, 0.8),
+    # Telugu
+    'badhaga': (-0.7, 0.9), 'badha': (-0.6, 0.9), 'kashtam': (-0.6, 0.8), 'kopam': (-0.6, 0.9),
+    'bayam': (-0.6, 0.9), 'chirakuga': (-0.5, 0.8), 'alasata': (-0.4, 0.7), 'santhosham': (0.8, 0.9),
+    'santhoshamga': (0.8, 0.9), 'bagundi': (0.6, 0.7), 'bagunnanu': (0.6, 0.7), 'bagunna': (0.6, 0.7),
+    # Tamil
+    'kavalai': (-0.6, 0.9), 'sogama': (-0.6, 0.9), 'kobam': (-0.6, 0.9), 'kashtama': (-0.6, 0.8),
+    'bayama': (-0.6, 0.9), 'santhosama': (0.8, 0.9), 'sandhosham': (0.8, 0.9), 'nallairuku': (0.6, 0.7),
+    'nalla': (0.5, 0.6),
+    # Hindi
+    'khush': (0.7, 0.9), 'khushi': (0.7, 0.9), 'achha': (0.5, 0.6), 'accha': (0.5, 0.6), 'acha': (0.5, 0.6),
+    'badiya': (0.6, 0.7), 'badhiya': (0.6, 0.7), 'dukhi': (-0.7, 0.9), 'udaas': (-0.6, 0.9),
+    'pareshaan': (-0.6, 0.8), 'pareshaani': (-0.6, 0.8), 'gussa': (-0.6, 0.9), 'bura': (-0.6, 0.7),
+    'thaka': (-0.4, 0.7), 'thak': (-0.4, 0.7), 'tanav': (-0.5, 0.8),
+}
+
+# Word immediately before a sentiment word -> multiplier
+INTENSIFIERS = {
+    'very': 1.3, 'really': 1.3, 'so': 1.3, 'extremely': 1.5, 'too': 1.3, 'super': 1.3,
+    'chala': 1.3, 'ekkuva': 1.3, 'romba': 1.3, 'jaasthi': 1.3, 'bahut': 1.3, 'bohot': 1.3, 'bahot': 1.3,
+}
+
+# English negators flip the next sentiment word within NEGATION_WINDOW tokens;
+# Telugu/Tamil/Hindi negators follow the word they negate.
+NEGATIONS = {'not', 'no', 'never', 'dont', 'don', 'didn', 'isn', 'wasn', 'aren', 'cannot', 'cant'}
+POST_NEGATIONS = {'ledhu', 'ledu', 'kaadu', 'illa', 'illai', 'nahi', 'nahin', 'mat'}
+NEGATION_WINDOW = 3
+NEGATION_FACTOR = -0.5
+
+
+def _clamp(value, low=-1.0, high=1.0):
+    return max(low, min(high, value))
+
+
+def _compile_sentiment():
+    """Expand the sentiment words into features (negated, intensifier, word) with final weights"""
+    feature_ids = {}
+    polarity = []
+    subjectivity = []
+    for word, (p, s) in SENTIMENT_WORDS.items():
+        for intensifier, factor in [(None, 1.0)] + list(INTENSIFIERS.items()):
+            for negated in (False, True):
+                feature_p = _clamp(p * factor)
+                if negated:
+                    feature_p *= NEGATION_FACTOR
+                feature_ids[(negated, intensifier, word)] = len(polarity)
+                polarity.append(feature_p)
+                subjectivity.append(_clamp(s * factor, 0.0))
+    return feature_ids, tuple(polarity), tuple(subjectivity)
+
+
+SENTIMENT_FEATURES, FEATURE_POLARITY, FEATURE_SUBJECTIVITY = _compile_sentiment()
+
+
+def sentiment_features(text):
+    """Return the sentiment feature id of every scored word in text, in order"""
+    tokens = tokenize(text)
+    features = []
+    negation_left = 0
+    for i, token in enumerate(tokens):
+        if token in NEGATIONS:
+            negation_left = NEGATION_WINDOW
+            continue
+        if token in INTENSIFIERS and tokens[i + 1:i + 2] and tokens[i + 1] in SENTIMENT_WORDS:
+            continue  # 'super happy': super only modifies the next word
+        if token in SENTIMENT_WORDS:
+            previous = tokens[i - 1] if i else None
+            intensifier = previous if previous in INTENSIFIERS and previous != token else None
+            negated = negation_left > 0 or any(t in POST_NEGATIONS for t in tokens[i + 1:i + 3])
+            features.append(SENTIMENT_FEATURES[(negated, intensifier, token)])
+            negation_left = 0
+        elif negation_left:
+            negation_left -= 1
+    return features
+
+
+def resume_point(words, min_tokens):
+    """Index of the last of `words` (a whitespace-split text) from which sentiment_features can
+    score the rest on its own, giving every later word the feature it has in the whole text,
+    with at least min_tokens tokens from there on; 0 if there is none.
+
+    A position is closed right after an intensifier or while a negator among the
+    NEGATION_WINDOW tokens before it may still apply (conservatively: a sentiment word in
+    between would already have used the negation up).
+    """
+    tokens, starts = [], []
+    for word in words:
+        starts.append(len(tokens))
+        tokens.extend(tokenize(word))
+    for i in range(len(words) - 1, 0, -1):
+        start = starts[i]
+        if len(tokens) - start < min_tokens:
+            continue
+        before = tokens[max(0, start - NEGATION_WINDOW):start]
+        if not NEGATIONS.intersection(before) and not (before and before[-1] in INTENSIFIERS):
+            return i
+    return 0
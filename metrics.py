@@ -0,0 +1,150 @@
+"""In-process latency histograms, exported in the Prometheus text format.
+
+Observations are bucketed on the fly (one bisect and a few integer updates
+under a lock), so instrumentation is cheap enough to leave on. Quantiles are
+estimated from the buckets the same way Prometheus' histogram_quantile does.
+Each worker process keeps its own histograms.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# Seconds; sized for sub-millisecond stages up to slow requests
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_registry = []
+
+
+class Histogram:
+    """Fixed-bucket histogram with one series per combination of label values"""
+
+    def __init__(self, name, documentation, labels, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [per-bucket counts (last one is +Inf), sum]
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, seconds, *label_values):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += seconds
+
+    def snapshot(self):
+        """Return {label values: (per-bucket counts, sum)}"""
+        with self._lock:
+            return {key: (list(counts), total) for key, (counts, total) in self._series.items()}
+
+    def quantile(self, q, counts):
+        """Estimate the q-quantile from per-bucket counts (linear within the bucket)"""
+        count = sum(counts)
+        if not count:
+            return None
+        rank = q * count
+        cumulative = 0
+        for index, bucket_count in enumerate(counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                if index == len(self.buckets):
+                    return self.buckets[-1]  # +Inf bucket: the largest finite bound is all we know
+                lower = self.buckets[index - 1] if index else 0.0
+                return lower + (self.buckets[index] - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+    def summary(self):
+        """Return {label values: {count, sum, p50, p95, p99}} with times in milliseconds"""
+        result = {}
+        for key, (counts, total) in self.snapshot().items():
+            result[key] = {'count': sum(counts), 'sum_ms': round(total * 1000, 3)}
+            for q in (0.5, 0.95, 0.99):
+                estimate = self.quantile(q, counts)
+                result[key][f'p{int(q * 100)}_ms'] = round(estimate * 1000, 3)
+        return result
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for key, (counts, total) in sorted(self.snapshot().items()):
+            labels = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(self.labels, key))
+            prefix = labels + ',' if labels else ''
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{self.name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{labels}}} {total!r}')
+            lines.append(f'{self.name}_count{{{labels}}} {cumulative}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+STAGE_LATENCY = Histogram('yoga_stage_duration_seconds', 'Time spent in one hot-path stage', ('stage',))
+REQUEST_LATENCY = Histogram('yoga_request_duration_seconds', 'Request handling time by route', ('method', 'route'))
+
+
+def timed(stage):
+    """Decorator recording every call of the function under STAGE_LATENCY[stage]"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                STAGE_LATENCY.observe(time.perf_counter() - start, stage)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def stage_timer(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.observe(time.perf_counter() - start, stage)
+
+
+def render_metrics():
+    """All histograms in the Prometheus text exposition format"""
+    lines = []
+    for histogram in _registry:
+        lines.extend(histogram.render())
+    return '\n'.join(lines) + '\n'
+
+
+def instrument_app(app):
+    """Time every request by route and JSON serialization as its own stage"""
+    from flask import g, request
+    from flask.json.provider import DefaultJSONProvider
+
+    class TimedJSONProvider(DefaultJSONProvider):
+        def response(self, *args, **kwargs):
+            with stage_timer('json_serialize'):
+                return super().response(*args, **kwargs)
+
+    app.json = TimedJSONProvider(app)
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request_time(response):
+        started = g.pop('request_started', None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else '<unmatched>'
+            REQUEST_LATENCY.observe(time.perf_counter() - started, request.method, route)
+        return response
@@ -1,9 +1,65 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, inspect
 from datetime import datetime
 import json
+import os
 
 db = SQLAlchemy()
 
+DEFAULT_DATABASE_URL = 'sqlite:///yoga_app.db'
+
+# PRAGMAs applied to every new SQLite connection, selected with DB_PROFILE
+SQLITE_PROFILES = {
+    'default': {},
+    'production': {
+        'journal_mode': 'WAL',        # readers no longer block the writer
+        'synchronous': 'NORMAL',      # fsync at checkpoints instead of every commit (safe with WAL)
+        'busy_timeout': 5000,         # wait for the write lock instead of failing with "database is locked"
+        'mmap_size': 268435456,       # 256 MB memory-mapped reads
+        'temp_store': 'MEMORY'
+    }
+}
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas):
+    """Run the given PRAGMAs on a raw sqlite3 connection"""
+    cursor = dbapi_connection.cursor()
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name}={value}')
+    cursor.close()
+
+def configure_database(app):
+    """Configure the DSN, connection pool and SQLite profile from the environment, then bind db to app.
+
+    DATABASE_URL    SQLAlchemy URL (default sqlite:///yoga_app.db)
+    DB_PROFILE      'production' (default) or 'default' for SQLite's stock settings
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT  connection pool sizing
+    """
+    url = app.config.setdefault('SQLALCHEMY_DATABASE_URI', os.environ.get('DATABASE_URL', DEFAULT_DATABASE_URL))
+    app.config.setdefault('SQLALCHEMY_TRACK_MODIFICATIONS', False)
+    profile = SQLITE_PROFILES[app.config.setdefault('DB_PROFILE', os.environ.get('DB_PROFILE', 'production'))]
+    is_sqlite = url.startswith('sqlite')
+    
+    options = {}
+    if not (is_sqlite and (url in ('sqlite://', 'sqlite:///:memory:') or 'mode=memory' in url)):
+        options.update({
+            'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+            'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+            'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30))
+        })
+    if is_sqlite:
+        # Let connections move between request threads; busy_timeout (ms) also applied as the driver timeout
+        options['connect_args'] = {'check_same_thread': False, 'timeout': profile.get('busy_timeout', 5000) / 1000}
+    else:
+        options.update({'pool_pre_ping': True, 'pool_recycle': 1800})
+    for key, value in options.items():
+        app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {}).setdefault(key, value)
+    
+    db.init_app(app)
+    
+    if is_sqlite and profile:
+        with app.app_context():
+            event.listen(db.engine, 'connect', lambda dbapi_connection, record: apply_sqlite_pragmas(dbapi_connection, profile))
+
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
@@ -21,6 +77,13 @@ class Session(db.Model):
     duration = db.Column(db.Integer)  # in seconds
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_session_user_created', 'user_id', 'created_at'),
+        # Partial index: only in-progress sessions, which is what heartbeats and history views look for
+        db.Index('ix_session_incomplete', 'user_id', 'created_at',
+                 sqlite_where=db.text('completed = 0'), postgresql_where=db.text('completed = false')),
+    )
+
 class Asana(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -40,4 +103,26 @@ class Sequence(db.Model):
     asana_sequence = db.Column(db.Text)  # JSON array of asana IDs with durations
     total_duration = db.Column(db.Integer)  # in seconds
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    sessions = db.relationship('Session', backref='sequence', lazy=True)
\ No newline at end of file
+    sessions = db.relationship('Session', backref='sequence', lazy=True)
+
+    __table_args__ = (
+        db.Index('ix_sequence_emotion_intensity', 'emotion', 'intensity_min', 'intensity_max'),
+    )
+
+class CatalogState(db.Model):
+    """Single row (id 1): the catalog version, bumped by seed_data whenever asanas or sequences change"""
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    content_hash = db.Column(db.String(64))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+def ensure_indexes():
+    """Create any index declared on the models that an existing database is missing (requires an app context)"""
+    inspector = inspect(db.engine)
+    created = []
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            if not inspector.has_index(table.name, index.name):
+                index.create(bind=db.engine)
+                created.append(index.name)
+    return created
@@ -0,0 +1,70 @@
+"""Pre-rendered HTML pages.
+
+The page routes and the 404 page render templates that depend on nothing in
+the request. Each page is therefore rendered once per process (at worker
+warm-up or on first use) and kept as bytes, together with a gzip variant and
+an ETag. Pages are revalidated on every load (Cache-Control: no-cache),
+because a deploy changes the fingerprinted asset URLs inside them. A matching
+If-None-Match gets a 304 without a body.
+
+PAGE_CACHE=0, or debug mode, renders on every request instead, for template work.
+"""
+import gzip
+import hashlib
+import threading
+from collections import namedtuple
+
+from flask import Response, render_template, request
+
+from http_caching import GZIP_LEVEL
+
+RenderedPage = namedtuple('RenderedPage', ['body', 'gzip_body', 'etag'])
+
+
+class PageCache:
+    """Rendered bytes of request-independent templates, keyed by template name"""
+
+    def __init__(self, app, enabled=True):
+        self.app = app
+        self.enabled = enabled
+        self._pages = {}
+        self._lock = threading.Lock()
+
+    def get(self, template):
+        page = self._pages.get(template)
+        if page is None:
+            with self._lock:
+                page = self._pages.get(template)
+                if page is None:
+                    with self.app.app_context():
+                        body = render_template(template).encode('utf-8')
+                    page = self._pages[template] = RenderedPage(
+                        body=body,
+                        gzip_body=gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0),
+                        etag=hashlib.sha256(body).hexdigest()[:16]
+                    )
+        return page
+
+    def warm_up(self, templates):
+        for template in templates:
+            self.get(template)
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+
+    def response(self, template, status=200):
+        """Serve template from the cache: a 304 for a current ETag, gzip when accepted"""
+        if not self.enabled or self.app.debug:
+            return render_template(template), status
+        page = self.get(template)
+        headers = {'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+        if status == 200:
+            headers['ETag'] = f'W/"{page.etag}"'
+            if request.if_none_match.contains_weak(page.etag):
+                return Response(status=304, headers=headers)
+        body = page.body
+        if request.accept_encodings['gzip']:
+            body = page.gzip_body
+            headers['Content-Encoding'] = 'gzip'
+        return Response(body, status=status, headers=headers, mimetype='text/html')
@@ -0,0 +1,79 @@
+"""Chat response templates, compiled once from responses.json.
+
+Every (section, key) maps to a tuple with one entry per language in LANGUAGES
+order; a language missing from the data file falls back to English when the
+table is compiled, so lookups are a dict probe plus a tuple index. Entries are
+strings or tuples of strings for keys that offer several choices; {emotion}
+is the one placeholder, and entries that have it are also rendered for each
+of EMOTIONS up front, so a reply for those is a lookup too.
+"""
+import json
+import os
+from string import Formatter
+
+RESPONSES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'responses.json')
+
+LANGUAGES = ('english', 'telugu', 'tamil', 'hindi')
+_LANGUAGE_INDEX = {language: i for i, language in enumerate(LANGUAGES)}
+
+# What app.polarity_to_emotion can return
+EMOTIONS = ('happy', 'stressed', 'neutral')
+
+
+def _freeze(value):
+    """JSON lists become tuples, all the way down"""
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _strings(value):
+    if isinstance(value, str):
+        yield value
+    else:
+        for item in value:
+            yield from _strings(item)
+
+
+def _compile(path):
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    tables = {}
+    for section, entries in data.items():
+        for key, by_language in entries.items():
+            if 'english' not in by_language:
+                raise ValueError(f"{path}: {section}.{key} has no English entry")
+            tables[section, key] = tuple(_freeze(by_language.get(language, by_language['english']))
+                                         for language in LANGUAGES)
+            for template in by_language.values():
+                fields = {field for text in _strings(template)
+                          for _, field, _, _ in Formatter().parse(text) if field is not None}
+                if fields - {'emotion'}:
+                    raise ValueError(f"{path}: {section}.{key} uses placeholders other than {{emotion}}")
+    return tables
+
+
+def _render_emotions(tables):
+    """(section, key) -> one {emotion: text} dict per language, for the entries with an {emotion} placeholder"""
+    return {name: tuple({emotion: template.format(emotion=emotion) for emotion in EMOTIONS} for template in entries)
+            for name, entries in tables.items()
+            if any(isinstance(template, str) and '{emotion}' in template for template in entries)}
+
+
+_TABLES = _compile(RESPONSES_FILE)
+_BY_EMOTION = _render_emotions(_TABLES)
+
+
+def get_template(section, key, language):
+    """Return the entry for (section, key) in language, or the English one for other languages"""
+    return _TABLES[section, key][_LANGUAGE_INDEX.get(language, 0)]
+
+
+def render_response(section, key, language, emotion=None):
+    """Return the entry for (section, key) in language with its {emotion} placeholder filled in"""
+    index = _LANGUAGE_INDEX.get(language, 0)
+    by_emotion = _BY_EMOTION.get((section, key))
+    if by_emotion is None:
+        return _TABLES[section, key][index]
+    rendered = by_emotion[index].get(emotion)
+    return rendered if rendered is not None else _TABLES[section, key][index].format(emotion=emotion)
@@ -1,37 +1,67 @@
-from models import db, Asana, Sequence
+"""Catalog seeding: python seed_data.py [--reset]
+
+Seeding is incremental and safe to run on every deploy. Every asana and
+sequence definition is hashed and compared with the hash of the row it would
+replace, and only new or changed rows are written, with bulk inserts/updates
+in one transaction. Ids are fixed by the definitions (asana ids by position
+in ASANA_FILES; sequences reference them in asana_sequence, sessions reference
+sequence ids), so sessions and users are never touched. When anything changed,
+the catalog version in CatalogState is bumped; running workers notice it and
+reload their catalog (catalog.get_catalog). After the commit the compiled
+catalog file (catalog.CATALOG_FILE) is rewritten with that version unless it
+already holds it, so workers never read a file older than the database rows.
+Rows that are no longer defined
+are left in place, since sessions may still reference them. --reset drops
+and recreates every table (the old behaviour).
+"""
+from models import db, Asana, CatalogState, Sequence
+from catalog import CATALOG_FILE, invalidate_catalog
+from catalog_file import (ASANA_COLUMNS, SEQUENCE_COLUMNS, CatalogError, CompiledCatalog, definitions_hash, validate,
+                          write_catalog_file)
+from sqlalchemy import insert, inspect, update
+from collections import namedtuple
+from datetime import datetime
+import argparse
+import hashlib
 import json
 import os
 
-def load_asana_data():
-    """Load asana data from JSON files"""
-    asana_files = [
-        'mountain_pose.json', 'forward_fold.json', 'downward_dog.json', 
-        'childs_pose.json', 'warrior_one.json', 'tree_pose.json',
-        'cat_cow.json', 'cobra_pose.json', 'seated_meditation.json',
-        'bridge_pose.json', 'legs_up_wall.json'
-    ]
-    
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Asana id = position in this list (1-based); sequence definitions refer to these ids
+ASANA_FILES = (
+    'mountain_pose.json', 'forward_fold.json', 'downward_dog.json',
+    'childs_pose.json', 'warrior_one.json', 'tree_pose.json',
+    'cat_cow.json', 'cobra_pose.json', 'seated_meditation.json',
+    'bridge_pose.json', 'legs_up_wall.json'
+)
+
+SeedResult = namedtuple('SeedResult', ['inserted', 'updated', 'unchanged', 'stale', 'version', 'compiled'])
+
+def asana_definitions():
+    """Column values for every asana, read from the pose JSON files"""
     asanas = []
-    for filename in asana_files:
-        if os.path.exists(filename):
-            with open(filename, 'r') as f:
-                data = json.load(f)
-                asana = Asana(
-                    name=data['name'],
-                    sanskrit_name=data['sanskrit_name'],
-                    overview_image=data['overview_image'],
-                    step_data=json.dumps(data['steps']),
-                    difficulty=data['difficulty'],
-                    benefits=data['benefits']
-                )
-                asanas.append(asana)
+    for asana_id, filename in enumerate(ASANA_FILES, start=1):
+        # A missing file is an error: skipping it would shift the ids the sequences refer to
+        with open(os.path.join(ROOT, filename), 'r') as f:
+            data = json.load(f)
+        asanas.append({
+            'id': asana_id,
+            'name': data['name'],
+            'sanskrit_name': data['sanskrit_name'],
+            'overview_image': data['overview_image'],
+            'step_data': json.dumps(data['steps']),
+            'difficulty': data['difficulty'],
+            'benefits': data['benefits']
+        })
     return asanas
 
-def create_sequences():
-    """Create sequences for the 6 emotions: anxious, stressed, sad, angry, overwhelmed, tired"""
+def sequence_definitions():
+    """Sequences for the 6 emotions: anxious, stressed, sad, angry, overwhelmed, tired (ids are fixed: sessions reference them)"""
     sequences = [
         # CALMING & GROUNDING SEQUENCES (for high-stress emotions)
         {
+            'id': 1,
             'name': 'Anxiety Relief Flow',
             'emotion': 'anxious',
             'intensity_min': 1,
@@ -46,6 +76,7 @@ def create_sequences():
             'total_duration': 1050
         },
         {
+            'id': 2,
             'name': 'Stress Release Flow', 
             'emotion': 'stressed',
             'intensity_min': 1,
@@ -61,6 +92,7 @@ def create_sequences():
             'total_duration': 930
         },
         {
+            'id': 3,
             'name': 'Anger Cooling Flow',
             'emotion': 'angry', 
             'intensity_min': 1,
@@ -76,6 +108,7 @@ def create_sequences():
             'total_duration': 1170
         },
         {
+            'id': 4,
             'name': 'Overwhelm Relief Flow',
             'emotion': 'overwhelmed',
             'intensity_min': 1,
@@ -92,6 +125,7 @@ def create_sequences():
         
         # ENERGIZING & UPLIFTING SEQUENCES (for low-energy emotions)
         {
+            'id': 5,
             'name': 'Mood Lifting Flow',
             'emotion': 'sad',
             'intensity_min': 1,
@@ -107,6 +141,7 @@ def create_sequences():
             'total_duration': 720
         },
         {
+            'id': 6,
             'name': 'Energy Boost Flow',
             'emotion': 'tired',
             'intensity_min': 1,
@@ -124,30 +159,108 @@ def create_sequences():
         }
     ]
     
-    return [Sequence(**seq) for seq in sequences]
+    return sequences
+
+def row_hash(values, columns):
+    """Hash of the given columns of a definition or a row (a dict or a model instance)"""
+    get = values.get if isinstance(values, dict) else lambda column: getattr(values, column)
+    canonical = json.dumps([get(column) for column in columns], ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
 
-def seed_database():
-    """Seed the database with asanas and sequences"""
-    # Clear existing data
-    db.drop_all()
+def catalog_content_hash(asanas, sequences):
+    """CatalogState.content_hash of a database seeded with these definitions"""
+    return hashlib.sha256(''.join(
+        [row_hash(asana, ASANA_COLUMNS) for asana in asanas] +
+        [row_hash(sequence, SEQUENCE_COLUMNS) for sequence in sequences]).encode()).hexdigest()
+
+def seeded_catalog_version(asanas, sequences):
+    """The stored catalog version if the database was seeded with exactly these definitions, else None"""
+    if not inspect(db.engine).has_table(CatalogState.__tablename__):  # never seeded
+        return None
+    state = db.session.get(CatalogState, 1)
+    if state is None or state.content_hash != catalog_content_hash(asanas, sequences):
+        return None
+    return state.version
+
+def compile_catalog_file(asanas, sequences, catalog_version, path):
+    """Rewrite the compiled catalog unless it already holds these definitions at this version; True if written"""
+    try:
+        with CompiledCatalog(path) as compiled:
+            if (compiled.catalog_version == catalog_version
+                    and compiled.definitions_hash == definitions_hash(asanas, sequences)):
+                return False
+    except (CatalogError, OSError):  # missing, corrupt or of an older format
+        pass
+    write_catalog_file(asanas, sequences, path, catalog_version)
+    return True
+
+def sync_table(model, definitions, columns):
+    """Bulk-insert new and bulk-update changed definitions; returns (inserted, updated, unchanged, stale ids)"""
+    existing = {row.id: row_hash(row, columns) for row in model.query.all()}
+    inserts = [definition for definition in definitions if definition['id'] not in existing]
+    updates = [definition for definition in definitions
+               if definition['id'] in existing and existing[definition['id']] != row_hash(definition, columns)]
+    if inserts:
+        db.session.execute(insert(model), inserts)
+    if updates:
+        db.session.execute(update(model), updates)  # bulk UPDATE by primary key
+    defined = {definition['id'] for definition in definitions}
+    stale = sorted(set(existing) - defined)
+    return len(inserts), len(updates), len(definitions) - len(inserts) - len(updates), stale
+
+def seed_database(reset=False):
+    """Bring the asana and sequence tables in line with the definitions (see the module docstring)"""
+    if reset:
+        db.drop_all()
     db.create_all()
     
-    # Add asanas
-    asanas = load_asana_data()
-    for asana in asanas:
-        db.session.add(asana)
-    
-    db.session.commit()
-    
-    # Add sequences
-    sequences = create_sequences()
-    for sequence in sequences:
-        db.session.add(sequence)
+    asanas = asana_definitions()
+    sequences = sequence_definitions()
+    errors = validate(asanas, sequences)
+    if errors:
+        raise CatalogError('invalid catalog definitions:\n  ' + '\n  '.join(errors))
+    try:
+        asana_counts = sync_table(Asana, asanas, ASANA_COLUMNS)
+        sequence_counts = sync_table(Sequence, sequences, SEQUENCE_COLUMNS)
+        
+        state = db.session.get(CatalogState, 1)
+        if state is None:
+            state = CatalogState(id=1, version=0)
+            db.session.add(state)
+        changed = asana_counts[0] + asana_counts[1] + sequence_counts[0] + sequence_counts[1]
+        if changed:
+            state.version += 1
+            state.updated_at = datetime.utcnow()
+        state.content_hash = catalog_content_hash(asanas, sequences)  # also fills it in for older databases
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
     
-    db.session.commit()
-    print(f"Seeded {len(asanas)} asanas and {len(sequences)} sequences")
+    # Only after the commit: a file must never describe rows the database does not have
+    compiled = bool(CATALOG_FILE) and compile_catalog_file(asanas, sequences, state.version, CATALOG_FILE)
+    if changed or compiled:
+        invalidate_catalog()
+    result = SeedResult(
+        inserted=asana_counts[0] + sequence_counts[0],
+        updated=asana_counts[1] + sequence_counts[1],
+        unchanged=asana_counts[2] + sequence_counts[2],
+        stale={'asanas': asana_counts[3], 'sequences': sequence_counts[3]},
+        version=state.version,
+        compiled=compiled
+    )
+    print(f"Seeded {len(asanas)} asanas and {len(sequences)} sequences: {result.inserted} inserted, "
+          f"{result.updated} updated, {result.unchanged} unchanged; catalog version {result.version}")
+    if compiled:
+        print(f"Compiled {CATALOG_FILE} at catalog version {result.version}")
+    if asana_counts[3] or sequence_counts[3]:
+        print(f"Kept rows that are no longer defined: {result.stale}")
+    return result
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Seed or update the asana/sequence catalog')
+    parser.add_argument('--reset', action='store_true', help='drop all tables first (deletes sessions and users)')
+    args = parser.parse_args()
     from app import app
     with app.app_context():
-        seed_database()
\ No newline at end of file
+        seed_database(reset=args.reset)
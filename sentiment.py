@@ -0,0 +1,288 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from lexicon import FEATURE_POLARITY, FEATURE_SUBJECTIVITY, sentiment_features
+from metrics import timed
+
+
+class SentimentBackend:
+    """Scores one text as (polarity, subjectivity, polarity_sum, scored_phrases).
+
+    polarity is the mean of the scored phrase polarities, so polarity_sum and
+    scored_phrases let callers combine several texts exactly.
+    """
+
+    name = None
+    parallel = True  # whether large batches are worth spreading over a process pool
+
+    def score(self, text):
+        raise NotImplementedError
+
+    def score_many(self, texts):
+        return [self.score(text) for text in texts]
+
+    def warm_up(self):
+        self.score('warm up: feeling good today')
+
+
+class TextBlobBackend(SentimentBackend):
+    """TextBlob's pattern analyzer (English only)"""
+
+    name = 'textblob'
+
+    def __init__(self):
+        # TextBlob pulls in NLTK, which is slow to import; it is loaded on first use
+        # (or by warm_up()) so seeding and catalog-only requests never pay for it.
+        self._textblob = None
+        self._import_lock = threading.Lock()
+
+    def score(self, text):
+        if self._textblob is None:
+            with self._import_lock:
+                if self._textblob is None:
+                    from textblob import TextBlob
+                    self._textblob = TextBlob
+        assessed = self._textblob(text).sentiment_assessments
+        polarity_sum = sum(assessment[1] for assessment in assessed.assessments)
+        return assessed.polarity, assessed.subjectivity, polarity_sum, len(assessed.assessments)
+
+
+class LexiconBackend(SentimentBackend):
+    """Dict-backed scorer over lexicon.SENTIMENT_WORDS (English plus romanized Telugu/Tamil/Hindi).
+
+    Negations and intensifiers are resolved into precompiled features, so
+    scoring is one tokenize pass and a few tuple lookups.
+    """
+
+    name = 'lexicon'
+    parallel = False
+
+    def score(self, text):
+        features = sentiment_features(text)
+        if not features:
+            return 0.0, 0.0, 0.0, 0
+        polarity_sum = sum(FEATURE_POLARITY[f] for f in features)
+        subjectivity_sum = sum(FEATURE_SUBJECTIVITY[f] for f in features)
+        return polarity_sum / len(features), subjectivity_sum / len(features), polarity_sum, len(features)
+
+    def score_many(self, texts):
+        # Large batches go through the vectorized scorer when NumPy is installed
+        if len(texts) >= VECTORIZE_THRESHOLD:
+            try:
+                from bulk_sentiment import score_corpus
+            except ImportError:
+                pass
+            else:
+                return list(zip(*(column.tolist() for column in score_corpus(texts))))
+        return super().score_many(texts)
+
+
+BACKENDS = {backend.name: backend for backend in (TextBlobBackend, LexiconBackend)}
+
+
+class SentimentCache:
+    """Bounded LRU cache with a TTL, keyed by normalized message text.
+
+    Each entry holds named fields (polarity, subjectivity, analysis) so the
+    different call sites can share what was already computed for a text.
+    """
+
+    def __init__(self, maxsize=4096, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, field):
+        """Return the cached field for key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl and time.monotonic() - entry['_stored'] > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None or field not in entry:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[field]
+
+    def set(self, key, field, value):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = {'_stored': time.monotonic()}
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._entries.move_to_end(key)
+            entry[field] = value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# Polarity beyond +/- this is happy/stressed (app.polarity_to_emotion, bulk_sentiment.classify)
+EMOTION_THRESHOLD = 0.3
+
+# Batches with at least this many uncached texts use bulk_sentiment with the lexicon backend
+VECTORIZE_THRESHOLD = int(os.environ.get('SENTIMENT_VECTORIZE_THRESHOLD', 64))
+
+# One backend per deployment, chosen with SENTIMENT_BACKEND ('textblob' or 'lexicon')
+backend = BACKENDS[os.environ.get('SENTIMENT_BACKEND', 'textblob')]()
+
+sentiment_cache = SentimentCache(
+    maxsize=int(os.environ.get('SENTIMENT_CACHE_SIZE', 4096)),
+    ttl=int(os.environ.get('SENTIMENT_CACHE_TTL', 3600))
+)
+
+
+# Batches with at least this many uncached texts are scored over a process pool
+BATCH_PROCESS_THRESHOLD = int(os.environ.get('SENTIMENT_BATCH_PROCESS_THRESHOLD', 500))
+
+# Size of that pool (default: one process per CPU core)
+POOL_PROCESSES = int(os.environ.get('SENTIMENT_POOL_PROCESSES', 0)) or None
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def normalize(text):
+    """Cache key for a message: the text with collapsed whitespace.
+
+    Case is kept, because TextBlob scores emoticons case-sensitively (":D" is
+    stronger than ":d"); a lowercased key would cache whichever variant came first.
+    """
+    return ' '.join(text.split())
+
+
+def get_sentiment(text):
+    """Return (polarity, subjectivity) for text, scoring each normalized text once"""
+    return _cached_score(text)[:2]
+
+
+def get_polarity_sum(text, cache=True):
+    """Return (sum of phrase polarities, number of scored phrases) for text.
+
+    Backends report polarity as the mean over the phrases they score, so adding
+    these pairs across messages and dividing reproduces the polarity of the
+    messages joined together without re-scoring them. cache=False scores text
+    without storing it, for one-off strings that would only evict messages.
+    """
+    _, _, polarity_sum, count = _cached_score(text) if cache else _score(text)
+    return polarity_sum, count
+
+
+def _cached_score(text):
+    key = normalize(text)
+    scores = sentiment_cache.get(key, 'sentiment')
+    if scores is None:
+        scores = _score(text)
+        sentiment_cache.set(key, 'sentiment', scores)
+    return scores
+
+
+def score_many(texts, processes=None):
+    """Return (polarity, subjectivity) per text; duplicates and cached texts are scored once.
+
+    When the number of uncached texts reaches BATCH_PROCESS_THRESHOLD they are
+    spread over the process pool (processes=1 forces in-process scoring; any
+    other value sizes the pool if it does not exist yet); the lexicon backend
+    scores them in one vectorized pass instead.
+    """
+    keys = [normalize(text) for text in texts]
+    scores = {}
+    pending = {}
+    for key, text in zip(keys, texts):
+        if key in scores or key in pending:
+            continue
+        cached = sentiment_cache.get(key, 'sentiment')
+        if cached is None:
+            pending[key] = text
+        else:
+            scores[key] = cached
+
+    if pending:
+        todo = list(pending.items())
+        if len(todo) >= BATCH_PROCESS_THRESHOLD and processes != 1 and backend.parallel:
+            computed = list(_process_pool(processes).map(partial(_score_with, backend.name),
+                                                        [text for _, text in todo], chunksize=64))
+        else:
+            computed = backend.score_many([text for _, text in todo])
+        for (key, _), value in zip(todo, computed):
+            sentiment_cache.set(key, 'sentiment', value)
+            scores[key] = value
+
+    return [scores[key][:2] for key in keys]
+
+
+def warm_up():
+    """Load the backend's models (TextBlob/NLTK), e.g. in each pre-forked worker before it takes traffic"""
+    backend.warm_up()
+
+
+def set_backend(name):
+    """Switch the process to another backend; cached scores from the old one are dropped"""
+    global backend
+    backend = BACKENDS[name]()
+    sentiment_cache.clear()
+    return backend
+
+
+def _process_pool(processes=None):
+    """The process's scoring pool, created on first use and kept for later batches.
+
+    Pool processes come from a forkserver (spawn where that is unavailable)
+    rather than a fork of the calling process, so they never inherit locks
+    held by the log listener or session writer threads. Like any non-fork
+    pool, scripts using it need an `if __name__ == '__main__':` guard.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                _pool = ProcessPoolExecutor(max_workers=processes or POOL_PROCESSES, mp_context=context)
+    return _pool
+
+
+@timed('sentiment_score')
+def _score(text):
+    return backend.score(text)
+
+
+_pool_backends = {}
+
+
+def _score_with(name, text):
+    # Runs in process-pool workers, which keep one backend instance each
+    if name not in _pool_backends:
+        _pool_backends[name] = backend if backend.name == name else BACKENDS[name]()
+    return _pool_backends[name].score(text)
@@ -0,0 +1,101 @@
+import atexit
+import threading
+
+from event_log import get_logger
+from models import db, Session
+
+log = get_logger('yoga.session_writer')
+
+
+class SessionWriteBuffer:
+    """Write-behind buffer for session heartbeats and completions.
+
+    Updates are kept in memory, coalesced per session (latest duration wins,
+    completion is sticky) and written in one transaction every
+    `flush_interval` seconds or as soon as `max_pending` sessions are waiting.
+    Pending updates are flushed at interpreter exit and by close().
+    """
+
+    def __init__(self, app, flush_interval=0.5, max_pending=100):
+        self.app = app
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread = None
+        atexit.register(self.close)
+
+    def submit(self, session_id, duration=None, completed=False):
+        """Queue an update for session_id, merging it with any pending one"""
+        with self._lock:
+            update = self._pending.setdefault(session_id, {})
+            if duration is not None:
+                update['duration'] = duration
+            if completed:
+                update['completed'] = True
+            full = len(self._pending) >= self.max_pending
+            self._ensure_thread()
+        if full:
+            self._wakeup.set()
+
+    def pending(self, session_id):
+        """Return the not-yet-written update for session_id (empty dict if none)"""
+        with self._lock:
+            return dict(self._pending.get(session_id, {}))
+
+    def flush(self):
+        """Write all pending updates in a single transaction; returns the number of sessions written"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            with self.app.app_context():
+                try:
+                    for session in Session.query.filter(Session.id.in_(list(batch))).all():
+                        update = batch[session.id]
+                        if 'duration' in update:
+                            session.duration = update['duration']
+                        if update.get('completed'):
+                            session.completed = True
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    self._requeue(batch)
+                    log.error('session_flush_failed', requeued=len(batch), error=str(e))
+                    return 0
+            return len(batch)
+
+    def close(self):
+        """Stop the background flusher and write whatever is still pending"""
+        self._stopped = True
+        self._wakeup.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def _requeue(self, batch):
+        # Newer updates that arrived during the failed flush take precedence
+        with self._lock:
+            for session_id, update in batch.items():
+                merged = dict(update)
+                merged.update(self._pending.get(session_id, {}))
+                if update.get('completed'):
+                    merged['completed'] = True
+                self._pending[session_id] = merged
+
+    def _ensure_thread(self):
+        # Started lazily so pre-forked workers each get their own flusher
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name='session-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
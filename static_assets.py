@@ -0,0 +1,201 @@
+"""Fingerprinted, precompressed static assets.
+
+`python static_assets.py` is a deploy step. It copies the stylesheet and pose
+images to static/build/ under content-hashed names (css/style.<hash>.css),
+writes gzip variants of the text assets, and brotli variants too when the
+optional `brotli` package is installed. Everything is recorded in
+static/build/manifest.json. The app serves the build under /assets/ with
+one-year immutable caching, strong ETags and Accept-Encoding negotiation.
+Templates and catalog image paths resolve through asset_url().
+
+Without a build, or for a source file changed since the build, asset_url()
+returns the plain /static/ URL, so development needs no extra step.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+from collections import namedtuple
+
+from flask import Response, abort, request
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(ROOT, 'static')
+BUILD_DIR = os.path.join(STATIC_DIR, 'build')
+MANIFEST_FILE = os.path.join(BUILD_DIR, 'manifest.json')
+
+SOURCE_DIRS = ('css', 'images/asanas')
+# WebP is already compressed; text formats shrink several times over
+COMPRESSIBLE = frozenset({'.css', '.js', '.svg', '.json'})
+URL_PREFIX = '/assets/'
+CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Preferred first; the file suffix of each precompressed variant
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+mimetypes.add_type('image/webp', '.webp')
+mimetypes.add_type('image/svg+xml', '.svg')
+
+# `path` is relative to BUILD_DIR; `encodings` lists the variants written next to it
+BuiltAsset = namedtuple('BuiltAsset', ['source', 'path', 'digest', 'size', 'mtime_ns', 'content_type', 'encodings'])
+
+_assets = {}    # source path (relative to static/) -> BuiltAsset
+_served = {}    # hashed path -> BuiltAsset
+_contents = {}  # (hashed path, encoding) -> bytes, read on first request
+
+
+def _brotli_compress(data):
+    try:
+        import brotli  # optional dependency, only needed for .br variants
+    except ImportError:
+        return None
+    return brotli.compress(data, quality=11)
+
+
+def _write(path, data):
+    if os.path.exists(path):  # content-addressed: an existing file already has these bytes
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(data)
+    os.replace(temporary, path)
+
+
+def build_assets(static_dir=STATIC_DIR, build_dir=BUILD_DIR):
+    """Write hashed copies, compressed variants and the manifest; returns the manifest entries.
+
+    Files from earlier builds are left in place so workers still running the
+    previous manifest keep serving them during a rolling restart.
+    """
+    entries = {}
+    for source_dir in SOURCE_DIRS:
+        for directory, _, filenames in sorted(os.walk(os.path.join(static_dir, source_dir))):
+            for filename in sorted(filenames):
+                source_path = os.path.join(directory, filename)
+                source = os.path.relpath(source_path, static_dir).replace(os.sep, '/')
+                with open(source_path, 'rb') as f:
+                    data = f.read()
+                digest = hashlib.sha256(data).hexdigest()
+                stem, extension = os.path.splitext(source)
+                hashed = f'{stem}.{digest[:12]}{extension}'
+                _write(os.path.join(build_dir, hashed), data)
+
+                encodings = []
+                if extension in COMPRESSIBLE:
+                    variants = {'gzip': gzip.compress(data, compresslevel=9, mtime=0),
+                                'br': _brotli_compress(data)}
+                    for encoding, suffix in ENCODINGS:
+                        compressed = variants[encoding]
+                        if compressed is not None and len(compressed) < len(data):
+                            _write(os.path.join(build_dir, hashed + suffix), compressed)
+                            encodings.append(encoding)
+
+                stat = os.stat(source_path)
+                entries[source] = {
+                    'path': hashed,
+                    'digest': digest,
+                    'size': stat.st_size,
+                    'mtime_ns': stat.st_mtime_ns,
+                    'content_type': mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+                    'encodings': encodings
+                }
+
+    manifest_file = os.path.join(build_dir, 'manifest.json')
+    os.makedirs(build_dir, exist_ok=True)
+    with open(manifest_file + '.tmp', 'w') as f:
+        json.dump({'assets': entries}, f, indent=1, sort_keys=True)
+    os.replace(manifest_file + '.tmp', manifest_file)
+    return entries
+
+
+def _is_current(asset, static_dir):
+    """True when the source file still has the bytes the asset was built from"""
+    try:
+        stat = os.stat(os.path.join(static_dir, asset.source))
+    except OSError:
+        return False
+    if stat.st_size != asset.size:
+        return False
+    if stat.st_mtime_ns == asset.mtime_ns:
+        return True
+    with open(os.path.join(static_dir, asset.source), 'rb') as f:  # touched, e.g. by a checkout
+        return hashlib.sha256(f.read()).hexdigest() == asset.digest
+
+
+def load_manifest(manifest_file=MANIFEST_FILE, static_dir=STATIC_DIR):
+    """(Re)load the build manifest, skipping assets whose source changed since the build; returns the count"""
+    assets = {}
+    if os.path.exists(manifest_file):
+        with open(manifest_file) as f:
+            entries = json.load(f)['assets']
+        for source, entry in entries.items():
+            asset = BuiltAsset(source=source, path=entry['path'], digest=entry['digest'], size=entry['size'],
+                               mtime_ns=entry['mtime_ns'], content_type=entry['content_type'],
+                               encodings=tuple(entry['encodings']))
+            if _is_current(asset, static_dir):
+                assets[source] = asset
+    _assets.clear()
+    _assets.update(assets)
+    _served.clear()
+    _served.update({asset.path: asset for asset in assets.values()})
+    _contents.clear()
+    return len(assets)
+
+
+def asset_url(filename):
+    """URL for a file under static/: the fingerprinted /assets/ URL when built, else /static/<filename>"""
+    asset = _assets.get(filename)
+    return URL_PREFIX + asset.path if asset else '/static/' + filename
+
+
+def rewrite_static_url(url):
+    """Map a /static/... URL (as stored in the pose JSON files) to its fingerprinted URL"""
+    if url and url.startswith('/static/'):
+        return asset_url(url[len('/static/'):])
+    return url
+
+
+def _content(asset, encoding):
+    key = asset.path, encoding
+    data = _contents.get(key)
+    if data is None:
+        suffix = dict(ENCODINGS).get(encoding, '')
+        with open(os.path.join(BUILD_DIR, asset.path + suffix), 'rb') as f:
+            data = _contents[key] = f.read()
+    return data
+
+
+def serve_asset(filename):
+    asset = _served.get(filename)
+    if asset is None:
+        abort(404)
+    encoding = next((name for name in asset.encodings if request.accept_encodings[name]), None)
+    # Each representation gets its own strong validator
+    etag = asset.digest[:32] + ('-' + encoding if encoding else '')
+    headers = {'Cache-Control': CACHE_CONTROL, 'ETag': f'"{etag}"'}
+    if asset.encodings:
+        headers['Vary'] = 'Accept-Encoding'
+    if request.if_none_match.contains_weak(etag):
+        return Response(status=304, headers=headers)
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    return Response(_content(asset, encoding), content_type=asset.content_type, headers=headers)
+
+
+def register_assets(app):
+    """Serve the build under /assets/ and make asset_url() available to templates"""
+    app.add_template_global(asset_url)
+    app.add_url_rule(URL_PREFIX + '<path:filename>', 'assets', serve_asset)
+
+
+load_manifest()
+
+
+if __name__ == '__main__':
+    built = build_assets()
+    load_manifest()
+    variants = sum(len(entry['encodings']) for entry in built.values())
+    print(f"built {len(built)} assets ({variants} compressed variants) into "
+          f"{os.path.relpath(BUILD_DIR, ROOT)}; manifest {os.path.relpath(MANIFEST_FILE, ROOT)}")
@@ -0,0 +1,6 @@
+"""Test settings, applied before app is imported: an in-memory database and no compiled catalog file"""
+import os
+
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['CATALOG_FILE'] = ''
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
@@ -0,0 +1,65 @@
+import random
+import unittest
+
+import sentiment
+from app import polarity_to_emotion
+from lexicon import INTENSIFIERS, NEGATIONS, POST_NEGATIONS, SENTIMENT_WORDS
+from sentiment import LexiconBackend
+
+try:
+    from bulk_sentiment import classify
+except ImportError:  # NumPy is optional
+    classify = None
+
+# Texts whose scores depend on the words around a sentiment word, including at text boundaries
+CASES = [
+    'I am not happy at all',
+    'not really happy',
+    'never a b c happy',                # negation used up before the sentiment word
+    'no stress, not sad, very happy',
+    'work bagundi ledhu',               # post-negation
+    'santhosham ga ledhu',
+    'bahut dukhi nahi',
+    'super happy', 'super', 'super super', 'so so tired',  # super is an intensifier and a sentiment word
+    'extremely bad and really really good',
+    'I am very',                        # ends with an intensifier, next text starts with a sentiment word
+    'happy today',
+    'I am not',                         # ends with a negation, next text starts with a sentiment word
+    'good morning',
+    'terrible nahi',
+    '', '!!!', 'NOT Happy :)', 'text with a \x00 nul',
+]
+
+VOCABULARY = (sorted(NEGATIONS) + sorted(POST_NEGATIONS) + sorted(INTENSIFIERS) + sorted(SENTIMENT_WORDS)
+              + ['the', 'a', 'work', 'today', 'was', ',', '!', 'didn\'t', 'ga', 'hai'])
+
+
+@unittest.skipIf(classify is None, 'NumPy is not installed')
+class VectorizedLexiconTest(unittest.TestCase):
+    """LexiconBackend.score_many switches to bulk_sentiment at VECTORIZE_THRESHOLD texts"""
+
+    def setUp(self):
+        rng = random.Random(0)
+        self.texts = CASES + [' '.join(rng.choices(VOCABULARY, k=rng.randint(1, 12))) for _ in range(300)]
+        self.assertGreaterEqual(len(self.texts), sentiment.VECTORIZE_THRESHOLD)
+
+    def test_score_many_matches_score(self):
+        backend = LexiconBackend()
+        for text, (polarity, subjectivity, polarity_sum, count) in zip(self.texts, backend.score_many(self.texts)):
+            expected = backend.score(text)
+            with self.subTest(text=text):
+                self.assertAlmostEqual(polarity, expected[0], places=9)
+                self.assertAlmostEqual(subjectivity, expected[1], places=9)
+                self.assertAlmostEqual(polarity_sum, expected[2], places=9)
+                self.assertEqual(count, expected[3])
+
+    def test_classify_matches_polarity_to_emotion(self):
+        polarities = [score[0] for score in LexiconBackend().score_many(self.texts)]
+        polarities += [0.0, 1.0, -1.0, 0.3, -0.3, 0.3 + 1e-12, -0.3 - 1e-12, 0.30000001, -0.30000001, 0.7, -0.6]
+        emotions, intensities = classify(polarities)
+        for polarity, emotion, intensity in zip(polarities, emotions, intensities):
+            self.assertEqual((str(emotion), int(intensity)), polarity_to_emotion(polarity), f'polarity {polarity}')
+
+
+if __name__ == '__main__':
+    unittest.main()
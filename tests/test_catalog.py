@@ -0,0 +1,62 @@
+import unittest
+
+from app import app
+from catalog import INTENSITY_LEVELS, Catalog, query_sequence
+from models import db, Sequence
+from seed_data import seed_database
+
+# Emotions with no sequence of their own, resolved through the happy/default fallbacks
+FALLBACK_EMOTIONS = ('happy', 'neutral', 'unknown')
+
+
+class SequenceIndexTest(unittest.TestCase):
+    """Catalog.resolve_sequence (precomputed index) must pick what query_sequence (database) picks"""
+
+    def setUp(self):
+        self.context = app.app_context()
+        self.context.push()
+        db.drop_all()
+        seed_database()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def assert_index_matches_database(self):
+        catalog = Catalog.load()
+        emotions = sorted(catalog.by_emotion) + list(FALLBACK_EMOTIONS)
+        for emotion in emotions:
+            for intensity in INTENSITY_LEVELS:
+                with self.subTest(emotion=emotion, intensity=intensity):
+                    indexed = catalog.resolve_sequence(emotion, intensity)
+                    queried = query_sequence(emotion, intensity)
+                    self.assertEqual(indexed and indexed.id, queried and queried.id)
+
+    def test_seeded_catalog(self):
+        self.assert_index_matches_database()
+
+    def test_overlapping_and_open_ranges(self):
+        # Ranges that overlap, leave gaps, tie on width, or are open (NULL) exercise every fit_key tier
+        rows = [{'name': f'{emotion} {low}-{high}', 'emotion': emotion, 'intensity_min': low,
+                 'intensity_max': high, 'asana_sequence': '[{"asana_id": 1, "duration": 60}]', 'total_duration': 60}
+                for emotion, low, high in [('stressed', 4, 5), ('stressed', 2, 3), ('stressed', 3, 3),
+                                           ('sad', 5, 5), ('sad', None, 2), ('happy', 2, 4),
+                                           ('happy', 4, None), ('happy', 1, 1)]]
+        db.session.execute(db.insert(Sequence), rows)
+        # The column defaults replace None on insert; open ranges come from rows written without them
+        db.session.execute(db.update(Sequence).where(Sequence.name == 'sad None-2').values(intensity_min=None))
+        db.session.execute(db.update(Sequence).where(Sequence.name == 'happy 4-None').values(intensity_max=None))
+        db.session.commit()
+        self.assertEqual(Sequence.query.filter(Sequence.intensity_min.is_(None)).count(), 1)
+        self.assertEqual(Sequence.query.filter(Sequence.intensity_max.is_(None)).count(), 1)
+        self.assert_index_matches_database()
+
+    def test_empty_catalog(self):
+        Sequence.query.delete()
+        db.session.commit()
+        self.assert_index_matches_database()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import catalog
+import seed_data
+from app import app
+from catalog import get_catalog, invalidate_catalog
+from catalog_file import CatalogError, CompiledCatalog, compile_catalog, write_catalog_file
+from models import db, CatalogState
+from seed_data import asana_definitions, seed_database, sequence_definitions
+
+
+class CompiledCatalogVersionTest(unittest.TestCase):
+    """Workers use catalog.bin only while it was compiled at the database's catalog version"""
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'catalog.bin')
+        for module in (catalog, seed_data):
+            patcher = mock.patch.object(module, 'CATALOG_FILE', self.path)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.context = app.app_context()
+        self.context.push()
+        db.drop_all()
+        invalidate_catalog()
+
+    def tearDown(self):
+        invalidate_catalog()
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def file_version(self):
+        with CompiledCatalog(self.path) as compiled:
+            return compiled.catalog_version
+
+    def write_renamed_file(self, catalog_version):
+        """A file that differs from the database rows, to tell which source a catalog came from"""
+        asanas = asana_definitions()
+        asanas[0]['name'] = 'Compiled Name'
+        write_catalog_file(asanas, sequence_definitions(), self.path, catalog_version)
+
+    def set_stored_version(self, version):
+        db.session.get(CatalogState, 1).version = version
+        db.session.commit()
+
+    def test_seed_writes_the_file_at_the_stored_version(self):
+        result = seed_database()
+        self.assertTrue(result.compiled)
+        self.assertEqual(self.file_version(), result.version)
+        self.assertFalse(seed_database().compiled)  # unchanged: the file is left alone
+
+    def test_file_at_the_stored_version_is_used(self):
+        version = seed_database().version
+        self.write_renamed_file(version)
+        self.assertEqual(get_catalog().asanas[1].name, 'Compiled Name')
+
+    def test_stale_file_falls_back_to_the_database(self):
+        version = seed_database().version
+        self.write_renamed_file(version)
+        self.set_stored_version(version + 1)  # reseeded without rewriting the file
+        self.assertEqual(get_catalog().asanas[1].name, 'Mountain Pose')
+
+    def test_reseed_rewrites_a_stale_file(self):
+        version = seed_database().version
+        self.set_stored_version(version + 1)
+        result = seed_database()
+        self.assertTrue(result.compiled)
+        self.assertEqual(self.file_version(), version + 1)
+
+    def test_compile_needs_a_seeded_database(self):
+        db.create_all()
+        with self.assertRaises(CatalogError):
+            compile_catalog(self.path)
+        seed_database()
+        os.remove(self.path)
+        compile_catalog(self.path)
+        self.assertEqual(self.file_version(), db.session.get(CatalogState, 1).version)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+import random
+import unittest
+from unittest import mock
+
+import app
+import sentiment
+from app import aggregate_emotion, analyze_emotion_and_language, fold_message, record_user_message
+from conversation_store import new_conversation_id, new_state
+
+# Conversations whose meaning depends on words from different messages
+BOUNDARY_CASES = [
+    ['I am not', 'happy at all'],                  # negation ends the previous message
+    ['I am very', 'happy today'],                  # intensifier ends the previous message
+    ['I feel', 'not', 'good'],                     # negation alone in a message between two others
+    ['kaise', 'ho'],                               # Hindi greeting split over two messages
+    ['what are', 'you doing'],                     # English greeting split over two messages
+    ['work is', 'bagundi', 'ledhu'],               # post-negation (lexicon backend)
+    ['really', 'really', 'bad day'],               # intensifier chain over three messages
+    ['great :D', 'but', 'not', 'really great'],
+    # negation scope reaching past the last words, then a post-negation (lexicon backend)
+    ['hate but stress never too', 'little , ! awesome', 'not ledhu was terrible'],
+]
+
+# Negators, post-negators, intensifiers, sentiment words, phrase parts and punctuation
+VOCABULARY = ('not never no dont ledhu nahi illa very really too super chala happy sad awesome terrible '
+              'stressed great bad hate was is a I but little , ! ? kaise ho kya kar rahe').split()
+
+SENTENCES = [
+    'I am not happy at all with how work went',
+    'my manager was very rude and I feel terrible',
+    'the walk was really lovely but I am still worried',
+    'main theek nahi hoon, kaise ho aap',
+    'santhosham ga undi, not stressed anymore',
+]
+
+
+class ConversationAggregateTest(unittest.TestCase):
+    """The running aggregate must agree with analyzing the joined user messages from scratch"""
+
+    def tearDown(self):
+        sentiment.set_backend('textblob')
+
+    def assert_matches_full_recompute(self, messages):
+        aggregate = new_state()['analysis']
+        for turn, message in enumerate(messages, start=1):
+            fold_message(aggregate, message)
+            self.assertEqual(aggregate_emotion(aggregate), analyze_emotion_and_language(' '.join(messages[:turn])),
+                             f'after {messages[:turn]}')
+
+    def for_each_backend(self, check):
+        for name in ('textblob', 'lexicon'):
+            with self.subTest(backend=name):
+                sentiment.set_backend(name)
+                check()
+
+    def test_boundary_cases(self):
+        def check():
+            for messages in BOUNDARY_CASES:
+                self.assert_matches_full_recompute(messages)
+        self.for_each_backend(check)
+
+    def test_every_split_point(self):
+        def check():
+            for sentence in SENTENCES:
+                words = sentence.split()
+                for cut in range(1, len(words)):
+                    self.assert_matches_full_recompute([' '.join(words[:cut]), ' '.join(words[cut:])])
+        self.for_each_backend(check)
+
+    def test_random_conversations_lexicon(self):
+        # The lexicon's negation and intensifier rules have a fixed reach, so its aggregate is exact
+        sentiment.set_backend('lexicon')
+        rng = random.Random(0)
+        for _ in range(500):
+            messages = [' '.join(rng.choices(VOCABULARY, k=rng.randint(1, 6))) for _ in range(rng.randint(2, 4))]
+            self.assert_matches_full_recompute(messages)
+
+    def test_reported_cases(self):
+        for messages, expected in [(['I am not', 'happy at all'], ('stressed', 4)),
+                                   (['I am very', 'happy today'], ('happy', 5))]:
+            aggregate = new_state()['analysis']
+            for message in messages:
+                fold_message(aggregate, message)
+            self.assertEqual(aggregate_emotion(aggregate)[:2], expected)
+
+    def test_state_without_tail(self):
+        # Aggregates stored before the tail was added keep working
+        aggregate = new_state()['analysis']
+        del aggregate['tail']
+        fold_message(aggregate, 'I am happy')
+        self.assertEqual(aggregate['tail'], 'I am happy')
+
+
+
+class RecordUserMessageTest(unittest.TestCase):
+
+    def test_scores_outside_the_store_lock(self):
+        locked = []
+        score = sentiment._score
+
+        def checked_score(text):
+            locked.append(app.conversation_store._lock.locked())
+            return score(text)
+
+        conversation_id = new_conversation_id()
+        with mock.patch('sentiment._score', side_effect=checked_score):
+            for message in ['I am not', 'happy at all with how work went today']:
+                record_user_message(conversation_id, message)
+        self.assertTrue(locked)
+        self.assertNotIn(True, locked)
+
+    def test_windows_stay_out_of_the_cache(self):
+        messages = ['I am not', 'happy at all with how work went today', 'and my manager was very rude']
+        sentiment.sentiment_cache.clear()
+        conversation_id = new_conversation_id()
+        for message in messages:
+            record_user_message(conversation_id, message)
+        self.assertLessEqual(set(sentiment.sentiment_cache._entries), set(messages))
+
+    def test_message_folded_in_meanwhile(self):
+        # Another message of the conversation arrives while this one is scored
+        conversation_id = new_conversation_id()
+        record_user_message(conversation_id, 'I am not')
+        features = app.message_features
+
+        def interleaved(*args):
+            if not interleaved.done:
+                interleaved.done = True
+                record_user_message(conversation_id, 'happy at all')
+            return features(*args)
+        interleaved.done = False
+
+        with mock.patch('app.message_features', side_effect=interleaved):
+            self.assertEqual(record_user_message(conversation_id, 'good'), 3)
+        self.assertEqual(aggregate_emotion(app.conversation_store.get(conversation_id)['analysis']),
+                         analyze_emotion_and_language('I am not happy at all good'))
+
+
+
+class AnalyzeConversationEndpointTest(unittest.TestCase):
+    HISTORY = {'user_turns': 2, 'messages': [{'sender': 'user', 'content': 'I am not'},
+                                             {'sender': 'bot', 'content': 'Tell me more'},
+                                             {'sender': 'user', 'content': 'happy at all'}]}
+
+    def setUp(self):
+        self.client = app.app.test_client()
+
+    def analyze(self, **data):
+        return self.client.post('/api/analyze-conversation', json=data)
+
+    def test_unknown_conversation_falls_back_to_history(self):
+        # Expired or evicted on the server, while the page still has the transcript
+        response = self.analyze(conversation_id=new_conversation_id(), conversation_history=self.HISTORY)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['conversation_analysis'], 'Analyzed 2 messages')
+        self.assertEqual(response.get_json()['emotion'], 'stressed')
+
+    def test_known_conversation_uses_the_stored_state(self):
+        conversation_id = new_conversation_id()
+        for message in ['I feel great', 'work went well', 'and the walk was lovely']:
+            record_user_message(conversation_id, message)
+        response = self.analyze(conversation_id=conversation_id, conversation_history=self.HISTORY)
+        self.assertEqual(response.get_json()['conversation_analysis'], 'Analyzed 3 messages')
+
+    def test_unknown_conversation_without_history(self):
+        self.assertEqual(self.analyze(conversation_id=new_conversation_id()).status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
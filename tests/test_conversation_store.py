@@ -0,0 +1,35 @@
+import unittest
+
+from conversation_store import InProcessConversationStore, add_message
+
+
+class InProcessConversationStoreTest(unittest.TestCase):
+
+    def test_failed_update_leaves_a_usable_state(self):
+        store = InProcessConversationStore()
+
+        def fail(state):
+            raise ValueError('boom')
+
+        with self.assertRaises(ValueError):
+            store.update('new', fail)
+        self.assertEqual(store.get('new')['user_turns'], 0)
+        self.assertEqual(store.update('new', lambda state: add_message(state, 'user', 'hello')), 1)
+
+    def test_idle_conversations_expire(self):
+        store = InProcessConversationStore(idle_ttl=1)
+        store.update('old', lambda state: add_message(state, 'user', 'hello'))
+        store._states['old']['_touched'] -= 2
+        self.assertIsNone(store.get('old'))
+
+    def test_window_is_trimmed(self):
+        store = InProcessConversationStore(max_messages=3)
+        for number in range(5):
+            store.update('c', lambda state: add_message(state, 'user', str(number)))
+        state = store.get('c')
+        self.assertEqual([message['content'] for message in state['messages']], ['2', '3', '4'])
+        self.assertEqual(state['user_turns'], 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
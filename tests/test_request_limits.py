@@ -0,0 +1,30 @@
+import unittest
+
+from app import MAX_BATCH_REQUEST_BYTES, MAX_BATCH_SIZE, MAX_REQUEST_BYTES, app
+
+
+class RequestLimitTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_full_batch_fits_the_batch_limit(self):
+        # MAX_BATCH_SIZE ordinary messages; identical texts keep the scoring itself cheap
+        message = 'I feel a little tired after a long day at the office'
+        response = self.client.post('/api/analyze-batch', json={'messages': [message] * MAX_BATCH_SIZE})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()['results']), MAX_BATCH_SIZE)
+
+    def test_batch_above_its_limit(self):
+        response = self.client.post('/api/analyze-batch', data=b' ' * (MAX_BATCH_REQUEST_BYTES + 1),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 413)
+
+    def test_other_routes_keep_the_default_limit(self):
+        response = self.client.post('/api/chat-analyze', data=b' ' * (MAX_REQUEST_BYTES + 1),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 413)
+
+
+if __name__ == '__main__':
+    unittest.main()
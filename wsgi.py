@@ -0,0 +1,10 @@
+"""WSGI entry point for production servers:  gunicorn -c gunicorn.conf.py  (serves wsgi:application).
+
+The database is prepared once when this module is imported; with gunicorn's
+preload_app that happens in the master before it forks, and each worker then
+loads the catalog and sentiment models in post_worker_init. Other WSGI servers
+can import `application` the same way and call app.warm_up_worker() per worker.
+"""
+from app import create_app
+
+application = create_app()